@@ -12,6 +12,16 @@ def create_app():
     # This single line will now see all models because of the change above
     from app import models  # noqa
 
+    from app.services.job_queue_service import job_queue
+    from app.services import question_paper_job_service  # noqa: registers job handlers
+    job_queue.init_app(app)
+
+    from app.services.question_paper_render_pool_service import render_pool
+    render_pool.init_app(app)
+
+    from app.services.question_paper_pdf_service import pdf_converter
+    pdf_converter.init_app(app)
+
     from app.routes.auth_routes import auth_bp
     from app.routes.admin_routes import admin_bp
     from app.routes.staff_routes import staff_bp
@@ -22,6 +32,9 @@ def create_app():
     app.register_blueprint(staff_bp, url_prefix="/staff")
     app.register_blueprint(api_bp, url_prefix="/api")
 
+    from app.cli import register_cli
+    register_cli(app)
+
     @app.route('/')
     def index():
         return redirect(url_for('auth.login'))
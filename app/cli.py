@@ -0,0 +1,515 @@
+# app/cli.py
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import click
+from sqlalchemy import text
+
+from app.extensions import db
+
+
+def register_cli(app):
+    app.cli.add_command(explain_indexes)
+    app.cli.add_command(bench_docx)
+    app.cli.add_command(check_docx_engines)
+    app.cli.add_command(check_export)
+    app.cli.add_command(check_query_budget)
+    app.cli.add_command(reconcile_dashboard_stats_command)
+
+
+# =========================================================
+# INDEX CHECK — EXPLAIN the hot filter paths
+# =========================================================
+
+def _hot_queries():
+    """
+    (expected index, representative query) for every hot filter path.
+    """
+    from app.models.question_bank import QuestionBank, QuestionBankItem
+    from app.models.question_paper import QuestionPaper
+    from app.models.subject_version import SubjectVersion
+    from app.models.weightage import SubjectWeightage
+
+    return [
+        ("ix_qbank_item_bank_unit_marks",
+         QuestionBankItem.query.filter_by(question_bank_id=1, unit=1, marks=2)),
+        ("ix_question_paper_sv_status",
+         QuestionPaper.query.filter_by(subject_version_id=1, status="ACTIVE")),
+        ("ix_question_paper_creator_modified",
+         QuestionPaper.query.filter_by(created_by=1).order_by(QuestionPaper.last_modified_at.desc())),
+        ("ix_question_paper_status_modified",
+         QuestionPaper.query.filter_by(status="ACTIVE").order_by(QuestionPaper.last_modified_at.desc())),
+        ("ix_question_paper_modified",
+         QuestionPaper.query.order_by(QuestionPaper.last_modified_at.desc(), QuestionPaper.id.desc()).limit(50)),
+        ("ix_question_bank_sv_default_status",
+         QuestionBank.query.filter_by(subject_version_id=1, is_default=True, status="ACTIVE")),
+        ("ix_subject_weightage_sv_unit",
+         SubjectWeightage.query.filter_by(subject_version_id=1).order_by(SubjectWeightage.unit)),
+        ("ix_subject_version_dept_sem_batch_active",
+         SubjectVersion.query.filter_by(department_id=1, semester=1, batch=2024, is_active=True)),
+    ]
+
+
+def _explain(query) -> tuple[str, str]:
+    """
+    Returns (index actually chosen, all candidate indexes) as plain text.
+    """
+    dialect = db.session.get_bind().dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+    if dialect.name == "mysql":
+        rows = db.session.execute(text(f"EXPLAIN {sql}")).mappings().all()
+        chosen = " ".join(str(r.get("key") or "") for r in rows)
+        possible = " ".join(str(r.get("possible_keys") or "") for r in rows)
+        return chosen, possible
+
+    if dialect.name == "sqlite":
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        detail = " ".join(str(r[-1]) for r in rows)
+        return detail, detail
+
+    rows = db.session.execute(text(f"EXPLAIN {sql}")).all()
+    detail = " ".join(str(r[0]) for r in rows)
+    return detail, detail
+
+
+@click.command("explain-indexes")
+@click.option("--strict", is_flag=True,
+              help="Also fail when an index is usable but not chosen (for CI on a seeded database).")
+def explain_indexes(strict):
+    """EXPLAIN the hot list/selection queries and check they hit their indexes."""
+    failures = 0
+
+    for index_name, query in _hot_queries():
+        chosen, possible = _explain(query)
+
+        if index_name in chosen:
+            click.echo(f"OK       {index_name}")
+        elif index_name in possible and not strict:
+            # Optimizer may prefer a scan on tiny tables; index is still usable
+            click.echo(f"POSSIBLE {index_name} (not chosen: {chosen or 'full scan'})")
+        elif index_name in possible:
+            failures += 1
+            click.echo(f"UNUSED   {index_name} (not chosen: {chosen or 'full scan'})")
+        else:
+            failures += 1
+            click.echo(f"MISSING  {index_name} (plan: {chosen or 'full scan'})")
+
+    if failures:
+        raise SystemExit(1)
+
+
+# =========================================================
+# DOCX RENDER BENCHMARK
+# =========================================================
+
+def _synthetic_paper(question_count: int):
+    """
+    Detached stand-in for a QuestionPaper (no DB): 2/5/10-mark sections
+    split 50/30/20 across five units.
+    """
+    sections = {
+        "A": {"count": 10, "total": question_count // 2, "marks": 2, "note": "Answer any TEN"},
+        "B": {"count": 5, "total": question_count * 3 // 10, "marks": 5, "note": "Answer any FIVE"},
+        "C": {"count": 3, "total": question_count - question_count // 2 - question_count * 3 // 10,
+              "marks": 10, "note": "Answer any THREE"},
+    }
+
+    items = []
+    for sec, cfg in sections.items():
+        for i in range(cfg["total"]):
+            items.append(SimpleNamespace(
+                order_index=len(items) + 1,
+                section=sec,
+                unit=i % 5 + 1,
+                marks=cfg["marks"],
+                k_level=f"K{i % 6 + 1}",
+                display_text=f"Section {sec} question {i + 1}: " + "explain the concept in detail. " * 4
+            ))
+
+    subject_version = SimpleNamespace(
+        semester=3,
+        subject=SimpleNamespace(code="BENCH101", name="Benchmark Subject"),
+        pattern=SimpleNamespace(name="Benchmark", total_marks=100, structure_json={"sections": sections})
+    )
+    return SimpleNamespace(id=0, status="GENERATED", items=items, subject_version=subject_version)
+
+
+def _rss_mb() -> float:
+    """
+    Current resident set size (Linux /proc; falls back to peak RSS).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        import resource
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ImportError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@click.command("bench-docx")
+@click.option("--questions", default=60, show_default=True, help="Questions in the synthetic paper.")
+@click.option("--rounds", default=20, show_default=True, help="Timed renders per format.")
+@click.option("--concurrency", default=0, show_default=True,
+              help="Also time N simultaneous official renders, inline vs the render pool.")
+def bench_docx(questions, rounds, concurrency):
+    """Time draft/official DOCX rendering and report RSS and whether pandas is loaded."""
+    from io import BytesIO
+    from app.services.question_paper_docx_service import (
+        _BUILDERS,
+        generate_official_docx,
+        generate_question_paper_docx,
+        paper_snapshot
+    )
+
+    paper = _synthetic_paper(questions)
+    snapshot = paper_snapshot(paper)
+    # pandas is imported inside the Excel export functions only, so rendering must not load it
+    click.echo(f"questions={questions} rounds={rounds} pandas_loaded={'pandas' in sys.modules}")
+    click.echo(f"rss_before_render={_rss_mb():.1f}MB")
+
+    def from_scratch(fmt):
+        # Pre-template path: the whole document built with python-docx calls
+        return lambda snap: _BUILDERS[fmt](snap).save(BytesIO())
+
+    renders = (
+        ("draft", "scratch", from_scratch("draft")),
+        ("draft", "template", generate_question_paper_docx),
+        ("draft", "xml", lambda snap: generate_question_paper_docx(snap, engine="xml")),
+        ("official", "scratch", from_scratch("official")),
+        ("official", "template", generate_official_docx),
+        ("official", "xml", lambda snap: generate_official_docx(snap, engine="xml")),
+    )
+    for name, engine, render in renders:
+        render(snapshot)  # warm-up (builds the template once)
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            render(snapshot)
+            timings.append((time.perf_counter() - start) * 1000)
+        click.echo(
+            f"{name:<9} {engine:<9} median={statistics.median(timings):.1f}ms "
+            f"min={min(timings):.1f}ms max={max(timings):.1f}ms"
+        )
+
+    click.echo(f"rss_after_render={_rss_mb():.1f}MB pandas_loaded={'pandas' in sys.modules}")
+
+    if concurrency:
+        _bench_concurrent_renders(paper, concurrency)
+
+
+def _bench_concurrent_renders(paper, concurrency: int):
+    """
+    N request threads rendering at once: inline (GIL-bound) vs process pool.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from flask import current_app
+    from app.services.question_paper_docx_service import paper_snapshot
+    from app.services.question_paper_render_pool_service import render_pool, render_snapshot
+
+    snapshot = paper_snapshot(paper)
+    workers = current_app.config["RENDER_POOL_WORKERS"]
+
+    def run(render):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as threads:
+            list(threads.map(lambda _: render(snapshot, "official"), range(concurrency)))
+        return (time.perf_counter() - start) * 1000
+
+    inline_ms = run(lambda snap, fmt: render_snapshot(snap, fmt))
+    if workers > 0:
+        render_pool.render(snapshot, "official")  # start workers outside the timing
+    pool_ms = run(lambda snap, fmt: render_pool.render(snap, fmt))
+    render_pool.shutdown()
+
+    click.echo(
+        f"{concurrency} concurrent official renders: inline={inline_ms:.0f}ms "
+        f"pool({workers} workers)={pool_ms:.0f}ms"
+    )
+
+
+# =========================================================
+# DOCX ENGINE CHECK — direct XML writer vs python-docx
+# =========================================================
+
+def _engine_check_cases() -> dict:
+    """
+    Snapshots covering what the direct writer has to reproduce exactly.
+    """
+    import copy
+    from app.services.question_paper_docx_service import paper_snapshot
+
+    base = paper_snapshot(_synthetic_paper(30))
+    cases = {"regular": base}
+
+    tricky = copy.deepcopy(base)
+    tricky["subject"]["name"] = "Data & <Structures> {{downloaded_at}}"
+    tricky["items"][0]["text"] = "  Leading space\tand tab\r\nCRLF <b>&amp; {{subject_code}} \u0bb5\u0ba3\u0b95\u0bcd\u0b95\u0bae\u0bcd "
+    tricky["items"][1]["text"] = ""
+    tricky["items"][2]["k_level"] = None
+    cases["tricky-text"] = tricky
+
+    empty_section = copy.deepcopy(base)
+    empty_section["items"] = [i for i in base["items"] if i["section"] != "B"]
+    cases["empty-section"] = empty_section
+
+    no_items = copy.deepcopy(base)
+    no_items.update(items=[], status=None, semester=4)
+    cases["no-items"] = no_items
+
+    return cases
+
+
+def _docx_parts(data: bytes) -> list[tuple[str, bytes]]:
+    """
+    (member name, content) in package order; XML parts in canonical form
+    so attribute order and namespace declarations do not matter.
+    """
+    import io
+    import zipfile
+    from lxml import etree
+
+    parts = []
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        for name in package.namelist():
+            content = package.read(name)
+            if name.endswith((".xml", ".rels")):
+                content = etree.canonicalize(etree.fromstring(content)).encode("utf-8")
+            parts.append((name, content))
+    return parts
+
+
+@click.command("check-docx-engines")
+@click.option("--threads", default=8, show_default=True,
+              help="Threads rendering every case at once with the XML writer (0 = skip).")
+@click.option("--renders", default=200, show_default=True, help="Concurrent renders in total.")
+def check_docx_engines(threads, renders):
+    """Check the direct XML writer produces the same documents as python-docx, also under concurrency."""
+    from app.services.question_paper_docx_service import (
+        generate_official_docx,
+        generate_question_paper_docx
+    )
+
+    failures = 0
+    expected_by_case = {}
+    for case, snapshot in _engine_check_cases().items():
+        for fmt, render in (("draft", generate_question_paper_docx), ("official", generate_official_docx)):
+            expected = _docx_parts(render(snapshot, downloaded_at="T", engine="python-docx").getvalue())
+            expected_by_case[(case, fmt)] = (snapshot, render, expected)
+            actual = _docx_parts(render(snapshot, downloaded_at="T", engine="xml").getvalue())
+
+            if actual == expected:
+                click.echo(f"OK       {case} {fmt}")
+                continue
+
+            failures += 1
+            expected_names = [n for n, _ in expected]
+            actual_names = [n for n, _ in actual]
+            if actual_names != expected_names:
+                detail = f"members {actual_names} != {expected_names}"
+            else:
+                detail = "differs in " + ", ".join(
+                    name for (name, a), (_, e) in zip(actual, expected) if a != e
+                )
+            click.echo(f"MISMATCH {case} {fmt}: {detail}")
+
+    if threads:
+        failures += _check_concurrent_xml_renders(expected_by_case, threads, renders)
+
+    if failures:
+        raise SystemExit(1)
+
+
+def _check_concurrent_xml_renders(expected_by_case: dict, threads: int, renders: int) -> int:
+    """
+    Every case rendered from `threads` threads at once (as bulk export does
+    when rendering inline); the renders share cached skeleton fragments and
+    must still each produce a valid package equal to python-docx's.
+    Returns the number of bad renders.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    cases = list(expected_by_case.items())
+
+    def render_one(i):
+        (case, fmt), (snapshot, render, expected) = cases[i % len(cases)]
+        try:
+            ok = _docx_parts(render(snapshot, downloaded_at="T", engine="xml").getvalue()) == expected
+        except Exception:  # corrupt package (bad CRC, broken deflate stream)
+            ok = False
+        return case, fmt, ok
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(render_one, range(renders)))
+
+    bad = [(case, fmt) for case, fmt, ok in results if not ok]
+    if bad:
+        click.echo(f"MISMATCH {len(bad)}/{renders} concurrent XML renders ({threads} threads), "
+                   f"e.g. {bad[0][0]} {bad[0][1]}")
+    else:
+        click.echo(f"OK       {renders} concurrent XML renders ({threads} threads)")
+    return len(bad)
+
+
+# =========================================================
+# EXPORT CHECK — bulk ZIP with inline rendering
+# =========================================================
+
+@click.command("check-export")
+@click.option("--papers", default=20, show_default=True, help="Stored papers to export.")
+def check_export(papers):
+    """Export stored papers with RENDER_POOL_WORKERS=0 and check every member is a valid DOCX."""
+    import io
+    import tempfile
+    import zipfile
+    from flask import current_app
+    from app.models.question_paper import QuestionPaper
+    from app.models.subject import Subject
+    from app.models.subject_version import SubjectVersion
+    from app.services.question_paper_export_service import stream_papers_zip
+
+    rows = (
+        db.session.query(QuestionPaper.id, QuestionPaper.paper_code, Subject.code)
+        .join(SubjectVersion, QuestionPaper.subject_version_id == SubjectVersion.id)
+        .join(Subject, SubjectVersion.subject_id == Subject.id)
+        .order_by(QuestionPaper.id)
+        .limit(papers)
+        .all()
+    )
+    if not rows:
+        click.echo("SKIP     no stored papers")
+        return
+
+    app = current_app._get_current_object()
+    saved = {key: app.config.get(key) for key in ("RENDER_POOL_WORKERS", "RENDER_CACHE_DIR")}
+    failures = 0
+
+    # Inline renders on the export threads, into an empty cache (every paper rendered afresh)
+    with tempfile.TemporaryDirectory(prefix="qp-check-export-") as cache_dir:
+        app.config.update(RENDER_POOL_WORKERS=0, RENDER_CACHE_DIR=cache_dir)
+        try:
+            data = b"".join(stream_papers_zip(app, rows, ["student", "official"]))
+        finally:
+            app.config.update(saved)
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for name in archive.namelist():
+            if name.startswith("_errors/"):
+                bad_member = archive.read(name).decode("utf-8", "replace")
+            else:
+                try:
+                    with zipfile.ZipFile(io.BytesIO(archive.read(name))) as package:
+                        bad_member = package.testzip()
+                except Exception as e:  # unreadable package
+                    bad_member = str(e)
+            if bad_member is not None:
+                failures += 1
+                click.echo(f"BAD      {name}: {bad_member}")
+        members = len(archive.namelist())
+
+    if failures:
+        click.echo(f"{failures}/{members} export members invalid")
+        raise SystemExit(1)
+    click.echo(f"OK       {members} members from {len(rows)} papers")
+
+
+# =========================================================
+# QUERY BUDGET — SQL statements per list request
+# =========================================================
+
+# (endpoint, role, max statements per request whatever the page size)
+_LIST_QUERY_BUDGETS = [
+    ("admin.all_generated_papers", "admin", 6),
+    ("admin.all_question_banks", "admin", 6),
+    ("admin.all_questions", "admin", 6),
+    ("staff.all_generated_papers", "staff", 6),
+    ("staff.view_question_items", "staff", 5),
+]
+
+
+@click.command("check-query-budget")
+@click.option("--page-size", default=200, show_default=True, help="Rows per page for the large request.")
+@click.option("--verbose", is_flag=True, help="Print every statement of failing requests.")
+@click.option("--strict", is_flag=True,
+              help="Fail instead of skipping a view that has no user to request it (for CI).")
+def check_query_budget(page_size, verbose, strict):
+    """Fail when a list view issues more SQL statements than its budget, or more for bigger pages."""
+    from flask import current_app, url_for
+    from app.models.department import Department
+    from app.models.user import User
+    from app.utils.sql_counter import StatementCounter
+
+    client = current_app.test_client()
+    failures = 0
+
+    # Filtering by a department also fills the subject dropdown
+    department = Department.query.order_by(Department.id).first()
+    filters = {"department_id": department.id} if department else {}
+
+    for endpoint, role, budget in _LIST_QUERY_BUDGETS:
+        user = User.query.filter_by(role=role).order_by(User.id).first()
+        if user is None:
+            if strict:
+                failures += 1
+                click.echo(f"UNCHECKED {endpoint} (no {role} user)")
+            else:
+                click.echo(f"SKIP     {endpoint} (no {role} user)")
+            continue
+
+        with client.session_transaction() as sess:
+            sess.update(
+                user_id=user.id,
+                username=user.username,
+                role=user.role,
+                school_access_ids=[s.id for s in user.schools]
+            )
+        db.session.remove()  # the request must not reuse rows loaded here
+
+        counts = []
+        for size in (1, page_size):
+            with current_app.test_request_context():
+                url = url_for(endpoint, page_size=size, **filters)
+            client.get(url)  # warm-up: one-off first-request work is not counted
+            with StatementCounter(db.engine) as counter:
+                response = client.get(url)
+            counts.append((size, response.status_code, counter))
+
+        worst = max(c.count for _, _, c in counts)
+        flat = counts[0][2].count == counts[1][2].count
+        status_ok = all(code == 200 for _, code, _ in counts)
+        summary = ", ".join(f"page_size={size}: {c.count}" for size, _, c in counts)
+
+        if status_ok and worst <= budget and flat:
+            click.echo(f"OK       {endpoint} ({summary}; budget {budget})")
+            continue
+
+        failures += 1
+        reason = (
+            "HTTP " + "/".join(str(code) for _, code, _ in counts) if not status_ok
+            else "grows with page size" if not flat
+            else f"over budget {budget}"
+        )
+        click.echo(f"FAIL     {endpoint} ({summary}): {reason}")
+        if verbose:
+            for statement in counts[-1][2].statements:
+                click.echo("    " + " ".join(statement.split())[:160])
+
+    if failures:
+        raise SystemExit(1)
+
+
+# =========================================================
+# DASHBOARD STATS — nightly reconciliation
+# =========================================================
+
+@click.command("reconcile-dashboard-stats")
+def reconcile_dashboard_stats_command():
+    """Recount dashboard_stats from the source tables (run nightly from cron)."""
+    from app.services.dashboard_stats_service import reconcile_dashboard_stats
+
+    corrected = reconcile_dashboard_stats()
+    click.echo(f"dashboard_stats reconciled: {corrected} counter(s) corrected")
@@ -4,3 +4,58 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Background jobs (question-bank ingestion + paper generation)
+    JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", 4))
+    JOB_STALE_AFTER_SECONDS = int(os.getenv("JOB_STALE_AFTER_SECONDS", 900))
+
+    # Logged-in user/role/school snapshot per process; mutations evict it locally,
+    # other processes see changes within the TTL (0 = always read the DB)
+    USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+
+    # Dropdown reference data (schools, departments, patterns, batches) per process;
+    # local writes rebuild it at once, other processes within the TTL
+    REFERENCE_CACHE_TTL_SECONDS = int(os.getenv("REFERENCE_CACHE_TTL_SECONDS", 300))
+    WEIGHTAGE_PREVIEW_CACHE_SIZE = int(os.getenv("WEIGHTAGE_PREVIEW_CACHE_SIZE", 256))
+
+    # Unit x section weightage grids per process; local writes evict them,
+    # other processes see changes within the TTL (0 = always read the DB)
+    WEIGHTAGE_CACHE_TTL_SECONDS = int(os.getenv("WEIGHTAGE_CACHE_TTL_SECONDS", 30))
+    WEIGHTAGE_CACHE_SIZE = int(os.getenv("WEIGHTAGE_CACHE_SIZE", 512))
+
+    # Parsed pattern structures per process, keyed by pattern id + row version
+    COMPILED_PATTERN_CACHE_SIZE = int(os.getenv("COMPILED_PATTERN_CACHE_SIZE", 128))
+
+    # Max cached question-bank validations (each holds the parsed rows)
+    VALIDATION_CACHE_SIZE = int(os.getenv("VALIDATION_CACHE_SIZE", 32))
+
+    # Admin/staff list views: keyset pages, counts stop at LIST_COUNT_CAP
+    LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", 50))
+    LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", 200))
+    LIST_COUNT_CAP = int(os.getenv("LIST_COUNT_CAP", 10000))
+
+    # Pre-built DOCX skeletons (format x pattern header variant), kept in memory per process
+    DOCX_SKELETON_CACHE_SIZE = int(os.getenv("DOCX_SKELETON_CACHE_SIZE", 64))
+
+    # Rendered DOCX cache (local disk, evicted least-recently-used first)
+    RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR")  # default: <instance>/render_cache
+    RENDER_CACHE_MAX_MB = int(os.getenv("RENDER_CACHE_MAX_MB", 256))
+
+    # DOCX rendering worker processes (0 = render inline in the web worker)
+    RENDER_POOL_WORKERS = int(os.getenv("RENDER_POOL_WORKERS", os.cpu_count() or 2))
+    RENDER_POOL_START_METHOD = os.getenv("RENDER_POOL_START_METHOD", "spawn")
+    RENDER_TIMEOUT_SECONDS = int(os.getenv("RENDER_TIMEOUT_SECONDS", 60))
+
+    # Parallel DOCX renders behind one bulk ZIP export
+    EXPORT_RENDER_WORKERS = int(os.getenv("EXPORT_RENDER_WORKERS", 4))
+
+    # PDF copies via headless LibreOffice (one soffice run per batch of documents)
+    PDF_CONVERTER_BINARY = os.getenv("PDF_CONVERTER_BINARY", "soffice")
+    PDF_CONVERTER_WORKERS = int(os.getenv("PDF_CONVERTER_WORKERS", 2))
+    PDF_BATCH_SIZE = int(os.getenv("PDF_BATCH_SIZE", 16))
+    PDF_BATCH_WAIT_MS = int(os.getenv("PDF_BATCH_WAIT_MS", 200))
+    PDF_QUEUE_SIZE = int(os.getenv("PDF_QUEUE_SIZE", 256))
+    PDF_QUEUE_WAIT_SECONDS = int(os.getenv("PDF_QUEUE_WAIT_SECONDS", 10))
+    PDF_CONVERT_TIMEOUT_SECONDS = int(os.getenv("PDF_CONVERT_TIMEOUT_SECONDS", 180))
+    PDF_PERMISSION_PASSWORD = os.getenv("PDF_PERMISSION_PASSWORD")  # set => edit-locked PDFs
@@ -11,3 +11,5 @@ from .question_paper import QuestionPaper
 from .question_paper_item import QuestionPaperItem
 from .question_master import QuestionMaster
 from .subject_version_pattern import SubjectVersionPattern
+from .background_job import BackgroundJob
+from .dashboard_stat import DashboardStat
@@ -0,0 +1,69 @@
+# app/models/background_job.py
+
+import uuid
+from datetime import datetime
+import pytz
+from sqlalchemy.dialects import mysql
+from app.extensions import db
+
+# ✅ Helper for IST Time
+def get_ist_time():
+    return datetime.now(pytz.timezone('Asia/Kolkata'))
+
+
+def _new_job_id():
+    return uuid.uuid4().hex
+
+
+class BackgroundJob(db.Model):
+    __tablename__ = "background_job"
+
+    id = db.Column(db.String(32), primary_key=True, default=_new_job_id)
+
+    job_type = db.Column(db.String(50), nullable=False)
+
+    status = db.Column(db.String(20), nullable=False, default="QUEUED")
+    # QUEUED | RUNNING | SUCCEEDED | FAILED
+
+    stage = db.Column(db.String(30), nullable=False, default="QUEUED")
+    # e.g. VALIDATION | INGESTION | SKELETON | SELECTION | DONE
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0 - 100
+
+    # Inputs (persisted so a restart does not lose the job)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    input_file = db.Column(
+        db.LargeBinary().with_variant(mysql.LONGBLOB(), "mysql"),
+        nullable=True
+    )
+
+    # Outputs
+    result = db.Column(db.JSON, nullable=True)
+    errors = db.Column(db.JSON, nullable=True)
+
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+
+    created_at = db.Column(db.DateTime, default=get_ist_time, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    creator = db.relationship("User")
+
+    __table_args__ = (
+        db.Index("ix_background_job_status_created", "status", "created_at"),
+    )
+
+    @property
+    def is_finished(self):
+        return self.status in ("SUCCEEDED", "FAILED")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "job_type": self.job_type,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "result": self.result or {},
+            "errors": self.errors or []
+        }
@@ -0,0 +1,214 @@
+# app/models/dashboard_stat.py
+
+from collections import Counter
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.extensions import db
+
+
+class DashboardStat(db.Model):
+    """
+    Running dashboard counters per (owner, subject version):
+
+        banks        question banks uploaded
+        bank_items   questions in those banks
+        papers       question papers created
+        paper_items  questions in those papers
+        status:<S>   papers currently in status S
+
+    Kept current by the flush hook below (and by bulk inserts that bypass
+    the unit of work), and rebuilt nightly by reconcile_dashboard_stats().
+    """
+    __tablename__ = "dashboard_stats"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Paper creator / bank uploader
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    subject_version_id = db.Column(
+        db.Integer,
+        db.ForeignKey("subject_version.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    metric = db.Column(db.String(40), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "subject_version_id", "metric", name="uq_dashboard_stats_key"),
+        db.Index("ix_dashboard_stats_sv", "subject_version_id"),
+    )
+
+
+def apply_stat_deltas(connection, deltas: Counter):
+    """
+    Add {(user_id, subject_version_id, metric): delta} to the counters on
+    `connection`, i.e. inside the caller's transaction.
+    """
+    table = DashboardStat.__table__
+    rows = [
+        {"user_id": user_id, "subject_version_id": sv_id, "metric": metric, "total": delta}
+        for (user_id, sv_id, metric), delta in sorted(deltas.items())  # fixed lock order
+        if delta and user_id is not None and sv_id is not None
+    ]
+    if not rows:
+        return
+
+    if connection.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(total=table.c.total + stmt.inserted.total)
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        updated = connection.execute(
+            table.update()
+            .where(
+                table.c.user_id == row["user_id"],
+                table.c.subject_version_id == row["subject_version_id"],
+                table.c.metric == row["metric"]
+            )
+            .values(total=table.c.total + row["total"])
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert(), row)
+
+
+# ----------------------------
+# Incremental maintenance
+# ----------------------------
+_MOVED = "dashboard_stats_moved"
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_moved_dashboard_stats(session, flush_context, instances):
+    """
+    For papers/banks whose owner, subject version or status is about to
+    change, read what they currently count for from the database (the old
+    values are often not loaded, so attribute history cannot be trusted).
+    """
+    from app.models.question_bank import QuestionBank
+    from app.models.question_paper import QuestionPaper
+
+    moved = {}
+    for obj in session.dirty:
+        if isinstance(obj, (QuestionPaper, QuestionBank)) and _key_changed(obj):
+            moved[obj] = _stored_stats(session.connection(), obj)
+    session.info[_MOVED] = moved
+
+
+@event.listens_for(Session, "after_flush")
+def _track_dashboard_stats(session, flush_context):
+    """
+    Fold the papers, banks and items this flush inserted or deleted, and
+    the papers/banks that changed owner, subject version or status, into
+    dashboard_stats in the same transaction.
+    """
+    from app.models.question_bank import QuestionBank, QuestionBankItem
+    from app.models.question_paper import QuestionPaper
+    from app.models.question_paper_item import QuestionPaperItem
+
+    tracked = (QuestionPaper, QuestionBank, QuestionPaperItem, QuestionBankItem)
+    deltas = Counter()
+
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, tracked):
+                deltas.update(_stat_keys(session, obj))
+
+        for obj in session.deleted:
+            if isinstance(obj, tracked):
+                deltas.subtract(_stat_keys(session, obj))
+
+    # Moved rows carry the items they already had; items added or removed
+    # in this flush were counted above against the new key
+    for obj, (stored, item_count) in session.info.pop(_MOVED, {}).items():
+        if obj in session.deleted:
+            continue
+        deltas.subtract(stored)
+        deltas.update(_stat_keys(session, obj))
+        item_metric = "paper_items" if isinstance(obj, QuestionPaper) else "bank_items"
+        deltas[(*_owner_key(obj), item_metric)] += item_count
+
+    apply_stat_deltas(session.connection(), deltas)
+
+
+def _stat_keys(session, obj) -> Counter:
+    """
+    The counters `obj` itself contributes 1 to.
+    """
+    from app.models.question_bank import QuestionBank
+    from app.models.question_paper import QuestionPaper
+    from app.models.question_paper_item import QuestionPaperItem
+
+    if isinstance(obj, QuestionPaper):
+        key = _owner_key(obj)
+        return Counter([(*key, "papers"), (*key, f"status:{obj.status}")])
+
+    if isinstance(obj, QuestionBank):
+        return Counter([(*_owner_key(obj), "banks")])
+
+    if isinstance(obj, QuestionPaperItem):
+        parent = obj.question_paper or session.get(QuestionPaper, obj.question_paper_id)
+        return Counter([(*_owner_key(parent), "paper_items")]) if parent else Counter()
+
+    parent = obj.bank or session.get(QuestionBank, obj.question_bank_id)
+    return Counter([(*_owner_key(parent), "bank_items")]) if parent else Counter()
+
+
+def _owner_key(obj) -> tuple:
+    from app.models.question_paper import QuestionPaper
+
+    if isinstance(obj, QuestionPaper):
+        return obj.created_by, obj.subject_version_id
+    return obj.uploaded_by, obj.subject_version_id
+
+
+def _key_changed(obj) -> bool:
+    from app.models.question_paper import QuestionPaper
+
+    watched = ("created_by", "subject_version_id", "status") if isinstance(obj, QuestionPaper) \
+        else ("uploaded_by", "subject_version_id")
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in watched)
+
+
+def _stored_stats(connection, obj) -> tuple[Counter, int]:
+    """
+    (counters the database row of `obj` contributes to, its item count).
+    """
+    from sqlalchemy import func, select
+    from app.models.question_bank import QuestionBank, QuestionBankItem
+    from app.models.question_paper import QuestionPaper
+    from app.models.question_paper_item import QuestionPaperItem
+
+    if isinstance(obj, QuestionPaper):
+        item_count = (
+            select(func.count()).where(QuestionPaperItem.question_paper_id == QuestionPaper.id)
+            .scalar_subquery()
+        )
+        user_id, sv_id, status, items = connection.execute(
+            select(QuestionPaper.created_by, QuestionPaper.subject_version_id, QuestionPaper.status, item_count)
+            .where(QuestionPaper.id == obj.id)
+        ).one()
+        return Counter({
+            (user_id, sv_id, "papers"): 1,
+            (user_id, sv_id, f"status:{status}"): 1,
+            (user_id, sv_id, "paper_items"): items,
+        }), items
+
+    item_count = (
+        select(func.count()).where(QuestionBankItem.question_bank_id == QuestionBank.id)
+        .scalar_subquery()
+    )
+    user_id, sv_id, items = connection.execute(
+        select(QuestionBank.uploaded_by, QuestionBank.subject_version_id, item_count)
+        .where(QuestionBank.id == obj.id)
+    ).one()
+    return Counter({(user_id, sv_id, "banks"): 1, (user_id, sv_id, "bank_items"): items}), items
@@ -11,5 +11,16 @@ class Pattern(db.Model):
 
     is_active = db.Column(db.Boolean, default=True)
 
+    version = db.Column(
+        db.Integer,
+        nullable=False,
+        default=1,
+        server_default="1"
+    )
+    # Row version, bumped by the ORM on every update; (id, version) keys the
+    # compiled-pattern cache
+
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self):
         return f"<Pattern {self.name}>"
\ No newline at end of file
@@ -1,6 +1,10 @@
 # app/models/question_bank.py
+from collections import Counter
 from datetime import datetime
 import pytz  # ✅ Import pytz
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.orm.util import identity_key
 from app.extensions import db
 
 # ✅ Helper for IST Time
@@ -26,12 +30,24 @@ class QuestionBank(db.Model):
     uploaded_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     
     uploaded_at = db.Column(db.DateTime, default=get_ist_time)
+
+    # Question counts as [[unit, section, marks, k_level, count], ...]:
+    # set at ingestion, recounted by the flush hook below when items change
+    availability = db.Column(db.JSON, nullable=True)
+
+    items_revision = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Bumped by the same hook; papers record it with their selection seed
     
     items = db.relationship("QuestionBankItem", backref="bank", cascade="all, delete-orphan")
     subject_version = db.relationship(
         'SubjectVersion', 
         backref=db.backref('question_banks', cascade="all, delete-orphan")
     )
+
+    __table_args__ = (
+        # default-bank lookup: (subject_version_id, is_default, status)
+        db.Index("ix_question_bank_sv_default_status", "subject_version_id", "is_default", "status"),
+    )
 class QuestionBankItem(db.Model):
     __tablename__ = "question_bank_item"
 
@@ -55,3 +71,85 @@ class QuestionBankItem(db.Model):
     k_level = db.Column(db.String(20), nullable=True)
     
     created_at = db.Column(db.DateTime, default=get_ist_time)
+
+    __table_args__ = (
+        # auto-select / swap candidates: (bank, unit, marks)
+        db.Index("ix_qbank_item_bank_unit_marks", "question_bank_id", "unit", "marks"),
+    )
+
+
+def availability_rows(counts: Counter) -> list:
+    """
+    {(unit, section, marks, k_level): count} -> the stored histogram, sorted.
+    """
+    return [
+        [unit, section, marks, k_level, n]
+        for (unit, section, marks, k_level), n in sorted(
+            counts.items(), key=lambda kv: (kv[0][0], kv[0][1], kv[0][2], kv[0][3] or "")
+        )
+        if n
+    ]
+
+
+def refresh_bank_availability(connection, bank_ids, *, items_changed: bool = False) -> dict:
+    """
+    Recount the histogram of `bank_ids` from their items on `connection`
+    (one GROUP BY) and store it, bumping `items_revision` when the items
+    changed. Returns {bank_id: histogram}.
+    """
+    bank_ids = sorted(set(bank_ids))
+    if not bank_ids:
+        return {}
+
+    counts = {bank_id: Counter() for bank_id in bank_ids}
+    item = QuestionBankItem
+    for bank_id, unit, section, marks, k_level, n in connection.execute(
+        select(item.question_bank_id, item.unit, item.section, item.marks, item.k_level, func.count())
+        .where(item.question_bank_id.in_(bank_ids))
+        .group_by(item.question_bank_id, item.unit, item.section, item.marks, item.k_level)
+    ):
+        counts[bank_id][(unit, section, marks, k_level)] = n
+
+    table = QuestionBank.__table__
+    histograms = {}
+    for bank_id in bank_ids:
+        histograms[bank_id] = availability_rows(counts[bank_id])
+        values = {"availability": histograms[bank_id]}
+        if items_changed:
+            values["items_revision"] = table.c.items_revision + 1
+        connection.execute(table.update().where(table.c.id == bank_id).values(**values))
+    return histograms
+
+
+# ----------------------------
+# Incremental maintenance
+# ----------------------------
+
+@event.listens_for(Session, "after_flush")
+def _track_bank_availability(session, flush_context):
+    """
+    Recount the histogram (and bump items_revision) of every surviving bank
+    whose items this flush added, changed or removed (bulk inserts bypass
+    this and set the histogram themselves).
+    """
+    touched = set()
+
+    with session.no_autoflush:
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if not isinstance(obj, QuestionBankItem):
+                continue
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            bank = obj.bank
+            if bank is not None and bank in session.deleted:
+                continue
+            bank_id = bank.id if bank is not None else obj.question_bank_id
+            if bank_id is not None:
+                touched.add(bank_id)
+
+    refreshed = refresh_bank_availability(session.connection(), touched, items_changed=True)
+    for bank_id, histogram in refreshed.items():
+        bank = session.identity_map.get(identity_key(QuestionBank, bank_id))
+        if bank is not None:
+            attributes.set_committed_value(bank, "availability", histogram)
+            session.expire(bank, ["items_revision"])  # bumped in SQL
@@ -2,6 +2,8 @@
 
 from datetime import datetime
 import pytz  # ✅ Import pytz
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 from app.extensions import db
 
 # ✅ Helper for IST Time
@@ -47,6 +49,26 @@ class QuestionPaper(db.Model):
     )
     # Optional: "Emergency Paper", "Leak Replacement"
 
+    selection_seed = db.Column(
+        db.BigInteger,
+        nullable=True
+    )
+    # RNG seed of auto-selection; with the source bank and pattern it was
+    # drawn against it rebuilds the exact same item list
+
+    selection_bank_revision = db.Column(db.Integer, nullable=True)
+    selection_pattern_version = db.Column(db.Integer, nullable=True)
+    # QuestionBank.items_revision / Pattern.version when the seed was drawn;
+    # regeneration is refused once either has moved on
+
+    content_revision = db.Column(
+        db.Integer,
+        nullable=False,
+        default=1,
+        server_default="1"
+    )
+    # Bumped whenever items or status change; keys the rendered-DOCX cache
+
     created_by = db.Column(
         db.Integer,
         db.ForeignKey("users.id"),
@@ -101,6 +123,13 @@ class QuestionPaper(db.Model):
         order_by="QuestionPaperItem.order_index"
     )
 
+    __table_args__ = (
+        db.Index("ix_question_paper_sv_status", "subject_version_id", "status"),
+        db.Index("ix_question_paper_creator_modified", "created_by", "last_modified_at"),
+        db.Index("ix_question_paper_status_modified", "status", "last_modified_at"),
+        db.Index("ix_question_paper_modified", "last_modified_at"),
+    )
+
     # ----------------------------
     # Helpers
     # ----------------------------
@@ -111,4 +140,40 @@ class QuestionPaper(db.Model):
     @property
     def is_editable(self):
         # Always editable as per your final rule
-        return True
\ No newline at end of file
+        return True
+
+
+# ----------------------------
+# Content revision tracking
+# ----------------------------
+@event.listens_for(Session, "before_flush")
+def _bump_content_revision(session, flush_context, instances):
+    """
+    Bump `content_revision` once per flush for every paper whose status
+    changed or whose items were added, modified or removed.
+    """
+    from app.models.question_paper_item import QuestionPaperItem
+
+    touched = set()
+
+    for obj in session.dirty:
+        if isinstance(obj, QuestionPaper) and inspect(obj).attrs.status.history.has_changes():
+            touched.add(obj)
+
+    with session.no_autoflush:
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if not isinstance(obj, QuestionPaperItem):
+                continue
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            paper = obj.question_paper or (
+                session.get(QuestionPaper, obj.question_paper_id)
+                if obj.question_paper_id else None
+            )
+            if paper is not None:
+                touched.add(paper)
+
+    for paper in touched:
+        if paper in session.new:
+            continue  # a new paper starts at revision 1
+        paper.content_revision = (paper.content_revision or 0) + 1
@@ -42,6 +42,10 @@ class QuestionPaperItem(db.Model):
     # Relationships
     question_paper = db.relationship("QuestionPaper", back_populates="items")
 
+    __table_args__ = (
+        db.Index("ix_qpaper_item_paper_order", "question_paper_id", "order_index"),
+    )
+
     @property
     def display_text(self):
         """Returns the text to show (override wins if present)"""
@@ -29,4 +29,9 @@ class SubjectVersion(db.Model):
             "subject_id", "department_id", "batch", "version",
             name="uq_subject_version"
         ),
+        # staff dropdowns + subject filters
+        db.Index(
+            "ix_subject_version_dept_sem_batch_active",
+            "department_id", "semester", "batch", "is_active"
+        ),
     )
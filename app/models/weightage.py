@@ -13,4 +13,8 @@ class SubjectWeightage(db.Model):
     sec_c_count = db.Column(db.Integer, default=0)
 
     subject_version = db.relationship("SubjectVersion")
+
+    __table_args__ = (
+        db.Index("ix_subject_weightage_sv_unit", "subject_version_id", "unit"),
+    )
     
\ No newline at end of file
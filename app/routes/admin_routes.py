@@ -5,17 +5,25 @@ from app.models.question_paper import QuestionPaper
 from app.models.question_bank import QuestionBank
 from app.models.question_master import QuestionMaster
 import os
+from datetime import datetime
+from sqlalchemy.orm import contains_eager, joinedload
 from flask import (Response, jsonify, Blueprint,
-                   render_template, request,
+                   render_template, request, current_app,
                    redirect, url_for, flash, session, send_file)
 from app.models.subject_version import SubjectVersion
 from app.models.user import User
 from app.utils.decorators import login_required, role_required
+from app.utils.pagination import keyset_page
 # Update the import source and function names
-from app.services.question_paper_docx_service import (
-    generate_question_paper_docx, 
-    generate_official_docx
+from app.services.question_paper_pdf_service import PdfConversionError
+from app.services.question_paper_render_cache_service import (
+    purge_paper_renders,
+    render_paper_docx,
+    render_paper_pdf
 )
+from app.services.question_paper_export_service import PaperExportError, stream_papers_zip
+from app.services.dashboard_stats_service import get_admin_dashboard_stats
+from app.services.reference_data_service import get_reference_data
 from app.services.user_service import (
     get_all_users,
     create_user,
@@ -31,12 +39,10 @@ from app.services.school_service import (
     get_schools_as_csv
 )
 from app.services.department_service import (
-     get_departments,
     add_department,
     delete_department,
     can_delete_department,
     get_departments_as_csv,
-    get_departments_by_school,
 )
 from app.services.subject_service import (
     get_batches_by_department_and_semester,
@@ -45,7 +51,6 @@ from app.services.subject_service import (
     get_subjects,
     add_subject_version,
     get_subjects_as_csv,
-    get_grid_types,
     delete_subject_version_only,
     delete_subject_and_weightage,
     get_subject_version_by_id,
@@ -59,7 +64,6 @@ from app.services.weightage_service import (
 )
 
 from app.services.pattern_service import (
-    get_patterns,
     create_pattern_from_form,
     delete_pattern,
     format_pattern_sections
@@ -72,23 +76,10 @@ admin_bp = Blueprint("admin", __name__)
 @login_required
 @role_required('admin')
 def dashboard():  # Ensure this function name matches your template's url_for('admin.dashboard')
-    from app.models.school import School
-    from app.models.department import Department
-    from app.models.user import User
-    from app.models.subject_version import SubjectVersion
     from app.models.question_paper import QuestionPaper
 
-    # Gather System Statistics
-    stats = {
-        'total_schools': School.query.count(),
-        'total_departments': Department.query.count(),
-        'total_users': User.query.count(),
-        'total_subjects': SubjectVersion.query.filter_by(is_active=True).count(),
-        'total_papers': QuestionPaper.query.count(),
-        'DRAFT': QuestionPaper.query.filter_by(status='DRAFT').count(),
-        'UNDER_SCRUTINY': QuestionPaper.query.filter_by(status='UNDER_SCRUTINY').count(),
-        'ACTIVE': QuestionPaper.query.filter_by(status='ACTIVE').count()
-    }
+    # Gather System Statistics (one query over dashboard_stats)
+    stats = get_admin_dashboard_stats()
 
     # ---------------------------------------------------------
     # ✅ ADD THIS: Fetch Recently Activated Papers
@@ -133,7 +124,7 @@ def manage_users():
     return render_template(
         "admin/users.html",
         users=get_all_users(),
-        schools=get_all_schools(), # Reusing school service
+        schools=get_reference_data().schools,
         error=error_msg,
         success=success_msg
     )
@@ -228,7 +219,7 @@ def manage_schools():
             flash(str(e), "danger")
         return redirect(url_for("admin.manage_schools"))
 
-    schools = get_all_schools()
+    schools = get_reference_data().schools
     return render_template("admin/schools.html", schools=schools)
 
 
@@ -303,8 +294,8 @@ def manage_departments():
 
     return render_template(
         "admin/departments.html",
-        departments=get_departments(),
-        schools=get_all_schools()
+        departments=get_reference_data().departments,
+        schools=get_reference_data().schools
     )
 
 
@@ -392,9 +383,9 @@ def manage_subjects():
     return render_template(
             "admin/subjects.html",
             subjects=subjects,
-            schools=get_all_schools(),   # 🔥 THIS WAS MISSING
-            grid_types=get_grid_types(),
-            patterns=get_patterns(),
+            schools=get_reference_data().schools,
+            grid_types=get_reference_data().grid_types,
+            patterns=get_reference_data().patterns,
             department_id=department_id,
             semester=semester,
             batch=batch
@@ -419,7 +410,7 @@ def download_subjects_csv():
 @login_required
 @role_required("admin")
 def get_departments_for_subject(school_id):
-    depts = get_departments_by_school(school_id)
+    depts = get_reference_data().departments_of(school_id)
     return jsonify([
         {"id": d.id, "name": d.name}
         for d in depts
@@ -508,7 +499,7 @@ def manage_weightage():
     return render_template(
         "admin/weightage.html",
         subjects=subjects,
-        departments=get_departments(),
+        departments=get_reference_data().departments,
         semesters=semesters,
         batches=batches,
         selected_subject_id=subject_version_id,
@@ -556,7 +547,7 @@ def manage_patterns():
             db.session.rollback()
             error = str(e)
 
-    patterns = get_patterns()
+    patterns = get_reference_data().patterns
 
     pattern_views = []
     for p in patterns:
@@ -583,8 +574,7 @@ def remove_pattern():
     try:
         name = request.form["pattern_name"]
         pattern = Pattern.query.filter_by(name=name).first_or_404()
-        db.session.delete(pattern)
-        db.session.commit()
+        delete_pattern(pattern.id)
         return redirect(url_for("admin.manage_patterns", success=f'Pattern "{name}" deleted'))
     except Exception as e:
         db.session.rollback()
@@ -602,11 +592,8 @@ def all_generated_papers():
     """
     Admin View: ALL generated papers from ALL users with Delete option.
     """
-    from app.models.question_paper import QuestionPaper
     from app.models.subject_version import SubjectVersion
-    from app.models.department import Department
-    from app.models.user import User
-    
+
     # 1. Get Filters
     school_id = request.args.get("school_id", type=int)
     dept_id = request.args.get("department_id", type=int)
@@ -615,7 +602,65 @@ def all_generated_papers():
     f_status = request.args.get("status")
     f_type = request.args.get("paper_type")
 
-    # 2. Build Query (No User Filter = View All)
+    # 2-4. Filtered query (shared with the bulk ZIP export), one keyset page.
+    # The grid shows version, subject and creator: load them with the page
+    # from the joins already in place instead of one query per card.
+    query = _filtered_papers_query(request.args).options(
+        contains_eager(QuestionPaper.subject_version).joinedload(SubjectVersion.subject),
+        contains_eager(QuestionPaper.subject_version).lazyload(SubjectVersion.pattern),
+        contains_eager(QuestionPaper.creator)
+    )
+    page = keyset_page(
+        query,
+        order=[QuestionPaper.last_modified_at, QuestionPaper.id],
+        args=request.args
+    )
+
+    # 5. Dropdown Data
+    reference = get_reference_data()
+    schools = reference.schools
+    departments = reference.departments_of(school_id) if school_id else []
+    
+    # Fetch subjects based on context
+    subjects_query = SubjectVersion.query.options(joinedload(SubjectVersion.subject))
+    if dept_id: subjects_query = subjects_query.filter_by(department_id=dept_id)
+    subjects = subjects_query.all() if dept_id else []
+
+    batches = list(reference.batches)
+
+    return render_template(
+        "admin/all_papers.html",
+        papers=page.items,
+        page=page,
+        total_count=page.count,
+        schools=schools,
+        departments=departments,
+        subjects=subjects,
+        batches=batches,
+        sel_school=school_id,
+        sel_dept=dept_id,
+        sel_subject=subject_id,
+        sel_batch=batch,
+        sel_status=f_status,
+        sel_type=f_type
+    )
+
+def _filtered_papers_query(args):
+    """
+    Papers matching the archive filters (school, dept, subject, batch, status, type).
+    """
+    from app.models.subject_version import SubjectVersion
+    from app.models.department import Department
+    from app.models.user import User
+
+    school_id = args.get("school_id", type=int)
+    dept_id = args.get("department_id", type=int)
+    subject_id = args.get("subject_version_id", type=int)
+    batch = args.get("batch", type=int)
+    f_status = args.get("status")
+    f_type = args.get("paper_type")
+
+    # Build Query (No User Filter = View All)
     query = (
         db.session.query(QuestionPaper)
         .join(SubjectVersion)
@@ -623,7 +668,7 @@ def all_generated_papers():
         .join(User, QuestionPaper.created_by == User.id)
     )
 
-    # 3. Apply Filters
+    # Apply Filters
     if school_id:
         query = query.filter(Department.school_id == school_id)
     if dept_id:
@@ -637,36 +682,45 @@ def all_generated_papers():
     if f_type:
         query = query.filter(QuestionPaper.paper_type == f_type)
 
-    # 4. Execute
-    papers = query.order_by(QuestionPaper.last_modified_at.desc()).all()
-    total_count = len(papers)
+    return query
 
-    # 5. Dropdown Data
-    schools = get_all_schools()
-    departments = get_departments_by_school(school_id) if school_id else []
-    
-    # Fetch subjects based on context
-    subjects_query = SubjectVersion.query
-    if dept_id: subjects_query = subjects_query.filter_by(department_id=dept_id)
-    subjects = subjects_query.all() if dept_id else []
+@admin_bp.route("/all-papers/export")
+@login_required
+@role_required("admin")
+def export_papers_zip():
+    """
+    Bulk export: every paper matching the archive filters as one streamed ZIP.
+    ?copies=student|official|pdf|both (default both = student + official DOCX)
+    """
+    from app.models.subject import Subject
+    from app.models.subject_version import SubjectVersion
 
-    batches = db.session.query(SubjectVersion.batch).distinct().order_by(SubjectVersion.batch.desc()).all()
-    batches = [b[0] for b in batches]
+    copies = request.args.get("copies", "both")
+    formats = ["student", "official"] if copies == "both" else [copies]
 
-    return render_template(
-        "admin/all_papers.html",
-        papers=papers,
-        total_count=total_count,
-        schools=schools,
-        departments=departments,
-        subjects=subjects,
-        batches=batches,
-        sel_school=school_id,
-        sel_dept=dept_id,
-        sel_subject=subject_id,
-        sel_batch=batch,
-        sel_status=f_status,
-        sel_type=f_type
+    papers = (
+        _filtered_papers_query(request.args)
+        .join(Subject, SubjectVersion.subject_id == Subject.id)
+        .with_entities(QuestionPaper.id, QuestionPaper.paper_code, Subject.code)
+        .order_by(Subject.code, QuestionPaper.paper_code, QuestionPaper.id)
+        .all()
+    )
+
+    if not papers:
+        flash("No papers match the current filters.", "warning")
+        return redirect(url_for("admin.all_generated_papers", **request.args))
+
+    try:
+        stream = stream_papers_zip(current_app._get_current_object(), papers, formats)
+    except PaperExportError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("admin.all_generated_papers", **request.args))
+
+    filename = f"question_papers_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+    return Response(
+        stream,
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
 @admin_bp.route("/all-papers/delete", methods=["POST"])
@@ -682,6 +736,7 @@ def delete_paper():
     try:
         db.session.delete(paper)
         db.session.commit()
+        purge_paper_renders(paper_id)
         flash(f"Paper {paper.paper_code} deleted successfully.", "success")
     except Exception as e:
         db.session.rollback()
@@ -697,8 +752,8 @@ def delete_paper():
 def download_student_paper(paper_id):
     paper = QuestionPaper.query.get_or_404(paper_id)
     
-    # ✅ FIX: Get the BytesIO stream directly (Service does NOT accept filepath)
-    docx_stream = generate_question_paper_docx(paper)
+    # ✅ Cached per content revision; only the download time is patched in
+    docx_stream = render_paper_docx(paper, "draft")
     
     return send_file(
         docx_stream,
@@ -713,8 +768,8 @@ def download_student_paper(paper_id):
 def download_official_paper(paper_id):
     paper = QuestionPaper.query.get_or_404(paper_id)
     
-    # ✅ FIX: Get the BytesIO stream directly (Service does NOT accept filepath)
-    docx_stream = generate_official_docx(paper)
+    # ✅ Cached per content revision; only the download time is patched in
+    docx_stream = render_paper_docx(paper, "official")
     
     return send_file(
         docx_stream,
@@ -723,6 +778,26 @@ def download_official_paper(paper_id):
         mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     )
 
+@admin_bp.route("/paper/<int:paper_id>/download/official-pdf")
+@login_required
+@role_required("admin")
+def download_official_paper_pdf(paper_id):
+    paper = QuestionPaper.query.get_or_404(paper_id)
+
+    # ✅ Converted once per content revision, then served from the cache
+    try:
+        pdf_stream = render_paper_pdf(paper, "official")
+    except PdfConversionError as e:
+        flash(str(e), "danger")
+        return redirect(request.referrer or url_for("admin.all_generated_papers"))
+
+    return send_file(
+        pdf_stream,
+        as_attachment=True,
+        download_name=f"{paper.paper_code}_Official_Copy.pdf",
+        mimetype="application/pdf"
+    )
+
 
 # =========================================================
 # QUESTION BANK ARCHIVE (ADMIN)
@@ -774,25 +849,29 @@ def all_question_banks():
         is_def = True if f_default == '1' else False
         query = query.filter(QuestionBank.is_default == is_def)
 
-    # 5. Execute
-    banks = query.order_by(QuestionBank.uploaded_at.desc()).all()
-    total_count = len(banks)
+    # 5. Execute (one keyset page, newest upload first), version + subject loaded with it
+    query = query.options(
+        contains_eager(QuestionBank.subject_version).joinedload(SubjectVersion.subject),
+        contains_eager(QuestionBank.subject_version).lazyload(SubjectVersion.pattern)
+    )
+    page = keyset_page(query, order=[QuestionBank.id], args=request.args)
 
     # 6. Dropdown Data
-    schools = get_all_schools()
-    departments = get_departments_by_school(school_id) if school_id else []
+    reference = get_reference_data()
+    schools = reference.schools
+    departments = reference.departments_of(school_id) if school_id else []
     
-    subjects_query = SubjectVersion.query
+    subjects_query = SubjectVersion.query.options(joinedload(SubjectVersion.subject))
     if dept_id: subjects_query = subjects_query.filter_by(department_id=dept_id)
     subjects = subjects_query.all() if dept_id else []
 
-    batches = db.session.query(SubjectVersion.batch).distinct().order_by(SubjectVersion.batch.desc()).all()
-    batches = [b[0] for b in batches]
+    batches = list(reference.batches)
 
     return render_template(
         "admin/all_question_banks.html",
-        banks=banks,
-        total_count=total_count,
+        banks=page.items,
+        page=page,
+        total_count=page.count,
         schools=schools,
         departments=departments,
         subjects=subjects,
@@ -885,25 +964,27 @@ def all_questions():
     if f_klevel:
         query = query.filter(QuestionMaster.k_level == f_klevel)
 
-    # 6. Execute (Distinct is crucial here due to joins)
-    questions = query.distinct(QuestionMaster.id).order_by(QuestionMaster.id.desc()).all()
-    total_count = len(questions)
+    # 6. Execute (Distinct is crucial here due to joins), one keyset page;
+    # the subject columns ride along on the Subject join
+    query = query.options(contains_eager(QuestionMaster.subject))
+    page = keyset_page(query.distinct(), order=[QuestionMaster.id], args=request.args)
 
     # 7. Dropdown Data
-    schools = get_all_schools()
-    departments = get_departments_by_school(school_id) if school_id else []
+    reference = get_reference_data()
+    schools = reference.schools
+    departments = reference.departments_of(school_id) if school_id else []
     
-    subjects_query = SubjectVersion.query
+    subjects_query = SubjectVersion.query.options(joinedload(SubjectVersion.subject))
     if dept_id: subjects_query = subjects_query.filter_by(department_id=dept_id)
     subjects = subjects_query.all() if dept_id else []
 
-    batches = db.session.query(SubjectVersion.batch).distinct().order_by(SubjectVersion.batch.desc()).all()
-    batches = [b[0] for b in batches]
+    batches = list(reference.batches)
 
     return render_template(
         "admin/all_questions.html",
-        questions=questions,
-        total_count=total_count,
+        questions=page.items,
+        page=page,
+        total_count=page.count,
         schools=schools,
         departments=departments,
         subjects=subjects,
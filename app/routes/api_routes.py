@@ -1,7 +1,40 @@
-from flask import Blueprint
+from flask import Blueprint, jsonify, session, url_for, abort
+
+from app.utils.decorators import login_required
+from app.models.background_job import BackgroundJob
 
 api_bp = Blueprint("api", __name__)
 
 @api_bp.route("/ping")
 def ping():
     return {"status": "ok"}
+
+
+# =========================================================
+# BACKGROUND JOBS — STATUS POLLING
+# =========================================================
+
+@api_bp.route("/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    """
+    Progress of a background job (validation -> ingestion -> selection).
+    """
+    job = BackgroundJob.query.get_or_404(job_id)
+
+    # 🔒 Only the owner (or an admin) may poll a job
+    if job.created_by != session["user_id"] and session.get("role") != "admin":
+        abort(403)
+
+    data = job.to_dict()
+
+    paper_id = data["result"].get("paper_id")
+    if job.status == "SUCCEEDED" and paper_id:
+        data["redirect_url"] = url_for("staff.review_generated_paper", paper_id=paper_id)
+    elif job.status == "SUCCEEDED" and data["result"].get("paper_ids"):
+        data["redirect_url"] = url_for(
+            "staff.list_question_papers",
+            subject_version_id=job.payload["subject_version_id"]
+        )
+
+    return jsonify(data)
@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, g
 from app.services.auth_service import authenticate_user
-from app.models.user import User  # Import User model for the DB check
+from app.services.user_service import get_session_user
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -11,8 +11,8 @@ def load_logged_in_user():
     if user_id is None:
         g.user = None
     else:
-        # Fetch the user from the DB to ensure they still exist
-        user = User.query.get(user_id)
+        # Make sure the user still exists (cached briefly, evicted by user_service)
+        user = get_session_user(user_id)
         
         # ✅ SECURITY: If user was deleted/disabled, invalidate session immediately
         if user is None:
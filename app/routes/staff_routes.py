@@ -1,29 +1,34 @@
 # app/routes/staff_routes.py
 from flask import (Blueprint, render_template, request, session, redirect, url_for, jsonify,flash, send_file)
-from sqlalchemy import distinct,func
+from sqlalchemy import distinct
+from sqlalchemy.orm import contains_eager, joinedload
 
 from app.utils.decorators import login_required, role_required
+from app.utils.http_cache import conditional_json
+from app.utils.pagination import keyset_page
 from app.extensions import db
 from app.models.user import User
 from app.models.department import Department
-from app.models.question_bank import QuestionBank, QuestionBankItem
+from app.models.question_bank import QuestionBankItem
 from app.models.subject_version import SubjectVersion
-from app.models.pattern import Pattern
 from app.models.question_paper import QuestionPaper
 from app.models.question_paper_item import QuestionPaperItem
 
 from app.services.subject_service import get_subject_versions
+from app.services.dashboard_stats_service import get_staff_dashboard_stats
+from app.services.reference_data_service import get_reference_data
+from app.services.compiled_pattern_service import get_compiled_pattern
+from app.services.bank_availability_service import paper_shortfalls
+from app.services.subject_weightage_preview_service import get_generation_preview, WeightagePreviewError
 from app.services.weightage_service import get_weightage_by_subject_version
-from app.services.school_service import get_all_schools
-from app.services.department_service import get_departments_by_school
-from app.services.question_paper_service import generate_question_paper_skeleton
 from app.services.question_bank_excel_validation_service import validate_question_bank_excel
-from app.services.question_paper_docx_service import generate_official_docx, generate_question_paper_docx
-from app.services.question_paper_selection_service import auto_select_questions_for_paper
+from app.services.question_paper_pdf_service import PdfConversionError
+from app.services.question_paper_render_cache_service import render_paper_docx, render_paper_pdf
 from app.services.question_paper_edit_service import swap_question_with_bank
 from app.services.question_paper_edit_service import apply_manual_edit
 from app.services.question_paper_activation_service import activate_question_paper
 from app.services.question_paper_edit_service import mark_duplicate
+from app.services.question_paper_selection_service import regenerate_paper_from_seed
 
 
 
@@ -47,47 +52,31 @@ def staff_home():
     dept_id = request.args.get("department_id", type=int)
     subject_id = request.args.get("subject_version_id", type=int)
 
-    # 3. Base Queries (User Isolated)
-    banks_query = QuestionBank.query.filter_by(uploaded_by=user_id)
+    # 3. Base Query (User Isolated)
     papers_query = QuestionPaper.query.filter_by(created_by=user_id)
 
     # 4. Apply Filters dynamically
     if subject_id:
-        banks_query = banks_query.filter_by(subject_version_id=subject_id)
         papers_query = papers_query.filter_by(subject_version_id=subject_id)
     elif dept_id:
         # Join SubjectVersion to filter by Dept
-        banks_query = banks_query.join(SubjectVersion).filter(SubjectVersion.department_id == dept_id)
         papers_query = papers_query.join(SubjectVersion).filter(SubjectVersion.department_id == dept_id)
     elif school_id:
         # Join SubjectVersion -> Department to filter by School
-        banks_query = banks_query.join(SubjectVersion).join(SubjectVersion.department).filter(Department.school_id == school_id)
         papers_query = papers_query.join(SubjectVersion).join(SubjectVersion.department).filter(Department.school_id == school_id)
 
-    # 5. Execute Stats
-    total_banks = banks_query.count()
-    total_papers = papers_query.count()
-
-    # Status Breakdown
-    # Get IDs first to avoid ambiguous join issues in the group_by query
-    paper_ids_for_status = [p.id for p in papers_query.with_entities(QuestionPaper.id).all()]
-    
-    status_counts = []
-    if paper_ids_for_status:
-        status_counts = (
-            db.session.query(QuestionPaper.status, func.count(QuestionPaper.id))
-            .filter(QuestionPaper.id.in_(paper_ids_for_status))
-            .group_by(QuestionPaper.status)
-            .all()
-        )
-    stats = {status: count for status, count in status_counts}
-
-    # Total Questions
-    bank_ids = [b.id for b in banks_query.with_entities(QuestionBank.id).all()]
-    total_bank_questions = QuestionBankItem.query.filter(QuestionBankItem.question_bank_id.in_(bank_ids)).count() if bank_ids else 0
-
-    paper_ids = [p.id for p in papers_query.with_entities(QuestionPaper.id).all()]
-    total_paper_questions = QuestionPaperItem.query.filter(QuestionPaperItem.question_paper_id.in_(paper_ids)).count() if paper_ids else 0
+    # 5. Stats: one query over the dashboard_stats counters, same filters
+    summary = get_staff_dashboard_stats(
+        user_id,
+        subject_version_id=subject_id,
+        department_id=dept_id,
+        school_id=school_id
+    )
+    total_banks = summary["total_banks"]
+    total_papers = summary["total_papers"]
+    stats = summary["status"]
+    total_bank_questions = summary["total_bank_questions"]
+    total_paper_questions = summary["total_paper_questions"]
 
     # 6. Fetch Active Papers (Filtered)
     # ✅ FIX: Use explicit QuestionPaper.status instead of filter_by to avoid ambiguity
@@ -100,11 +89,12 @@ def staff_home():
 
     # 7. Fetch Filter Options for Dropdowns
     allowed_schools = session.get("school_access_ids", [])
-    schools = [s for s in get_all_schools() if s.id in allowed_schools]
-    departments = get_departments_by_school(school_id) if school_id else []
+    reference = get_reference_data()
+    schools = reference.schools_for(allowed_schools)
+    departments = reference.departments_of(school_id) if school_id else []
     
     # Fetch subjects dynamically based on selection
-    subjects_query = SubjectVersion.query
+    subjects_query = SubjectVersion.query.options(joinedload(SubjectVersion.subject))
     if dept_id: subjects_query = subjects_query.filter_by(department_id=dept_id)
     subjects = subjects_query.all() if dept_id else []
 
@@ -157,17 +147,14 @@ def my_subjects():
 
     subjects = query.order_by(SubjectVersion.semester, SubjectVersion.subject_id).all()
 
-    # 3. Fetch Dynamic Filter Options (Distinct Values from DB)
-    schools = [s for s in get_all_schools() if s.id in allowed_school_ids]
-    departments = get_departments_by_school(school_id) if school_id else []
+    # 3. Fetch Dynamic Filter Options (cached reference data)
+    reference = get_reference_data()
+    schools = reference.schools_for(allowed_school_ids)
+    departments = reference.departments_of(school_id) if school_id else []
     
-    # Distinct Batches
-    batches_data = db.session.query(SubjectVersion.batch).distinct().order_by(SubjectVersion.batch.desc()).all()
-    batches = [b[0] for b in batches_data]
-
-    # Distinct Semesters
-    semesters_data = db.session.query(SubjectVersion.semester).distinct().order_by(SubjectVersion.semester).all()
-    semesters = [s[0] for s in semesters_data]
+    # Distinct Batches / Semesters
+    batches = list(reference.batches)
+    semesters = list(reference.semesters)
 
     # Subjects List for Dropdown
     all_subjects = SubjectVersion.query.filter(SubjectVersion.department_id == dept_id).all() if dept_id else []
@@ -231,8 +218,9 @@ def view_weightage():
 
     # Fetch dropdown data
     subjects = get_subject_versions(school_id=school_id, department_id=dept_id, semester=semester, batch=batch)
-    my_schools = [s for s in get_all_schools() if s.id in allowed_school_ids]
-    current_depts = get_departments_by_school(school_id) if school_id else []
+    reference = get_reference_data()
+    my_schools = reference.schools_for(allowed_school_ids)
+    current_depts = reference.departments_of(school_id) if school_id else []
 
     return render_template(
         "staff/view_weightage.html",
@@ -258,27 +246,23 @@ def view_weightage():
 @login_required
 @role_required("staff")
 def view_patterns():
-    from app.models.pattern import Pattern
-    patterns = Pattern.query.all()
+    patterns = get_reference_data().patterns
     
     pattern_views = []
     for p in patterns:
         sections = []
-        struct = p.structure_json or {}
-        sec_data = struct.get("sections", {})
+        compiled = get_compiled_pattern(p)
         
         # We sort alphabetically (A, B, C)
-        for s_name in sorted(sec_data.keys()):
-            cfg = sec_data[s_name]
-            
-            # Use the exact keys from your admin function: count, marks, total
-            count = cfg.get('count', 0)
-            marks = cfg.get('marks', 0)
-            total = cfg.get('total', count) # Fallback to count if total isn't specified
+        for section in sorted(compiled.sections, key=lambda s: s.key):
+            # Compiled: total falls back to count if it isn't specified
+            count = section.count
+            marks = section.marks
+            total = section.total
             
             sections.append({
-                "section": f"Sec {s_name}",
-                "expression": f"{count} × {marks} = {count * marks}",
+                "section": f"Sec {section.key}",
+                "expression": f"{count} × {marks} = {section.section_marks}",
                 "details": f"{marks} marks, answer {count} out of {total}",
                 "note": "Answer All Questions" if count == total else f"Answer Any {count} Questions"
             })
@@ -309,33 +293,23 @@ def generate_paper_entry():
 
 @staff_bp.route("/ajax/departments")
 def ajax_departments():
-    from app.models.department import Department
-    return jsonify([
+    return conditional_json([
         {"id": d.id, "name": d.name}
-        for d in Department.query.all()
+        for d in get_reference_data().departments
     ])
 
 @staff_bp.route("/ajax/batches")
 def ajax_batches():
     department_id = request.args.get("department_id", type=int)
-    rows = (
-        db.session.query(distinct(SubjectVersion.batch))
-        .filter_by(department_id=department_id)
-        .all()
-    )
-    return jsonify([r[0] for r in rows])
+    return conditional_json(list(get_reference_data().batches_by_department.get(department_id, ())))
 
 @staff_bp.route("/ajax/semesters")
 def ajax_semesters():
     department_id = request.args.get("department_id", type=int)
     batch = request.args.get("batch", type=int)
 
-    rows = (
-        db.session.query(distinct(SubjectVersion.semester))
-        .filter_by(department_id=department_id, batch=batch)
-        .all()
-    )
-    return jsonify([r[0] for r in rows])
+    semesters = get_reference_data().semesters_by_batch.get((department_id, batch), ())
+    return conditional_json(list(semesters))
 
 @staff_bp.route("/ajax/subjects")
 def ajax_subjects():
@@ -343,18 +317,13 @@ def ajax_subjects():
     batch = request.args.get("batch", type=int)
     semester = request.args.get("semester", type=int)
 
-    versions = SubjectVersion.query.filter_by(
-        department_id=department_id,
-        batch=batch,
-        semester=semester,
-        is_active=True
-    ).all()
+    versions = get_reference_data().subjects_by_term.get((department_id, batch, semester), ())
 
-    return jsonify([
+    return conditional_json([
         {
             "id": v.id,
-            "name": v.subject.name,
-            "code": v.subject.code
+            "name": v.name,
+            "code": v.code
         }
         for v in versions
     ])
@@ -377,9 +346,11 @@ def check_default_bank():
         status="ACTIVE"
     ).first()
 
+    # Shortfalls are read from the bank's availability histogram, not its items
     return jsonify({
         "exists": bool(bank),
-        "bank_id": bank.id if bank else None
+        "bank_id": bank.id if bank else None,
+        "shortfalls": paper_shortfalls(bank) if bank else []
     })
     
 # =========================================================
@@ -394,37 +365,12 @@ def subject_weightage_preview():
     if not subject_version_id:
         return jsonify({"error": "subject_version_id required"}), 400
 
-    sv = SubjectVersion.query.get_or_404(subject_version_id)
-
-    weightages = get_weightage_by_subject_version(subject_version_id)
-    if not weightages:
-        return jsonify({"error": "Weightage not defined for this subject"}), 400
-
-    pattern = sv.pattern
-    if not pattern:
-        return jsonify({"error": "Pattern not assigned"}), 400
-
-    # Build response
-    sections = pattern.structure_json.get("sections", {})
+    try:
+        preview = get_generation_preview(subject_version_id)
+    except WeightagePreviewError as e:
+        return jsonify({"error": str(e)}), 400
 
-    return jsonify({
-        "subject_version_id": sv.id,
-        "pattern": {
-            "name": pattern.name,
-            "sectionA": sections.get("A", {}).get("total", 0),
-            "sectionB": sections.get("B", {}).get("total", 0),
-            "sectionC": sections.get("C", {}).get("total", 0),
-        },
-        "weightage": [
-            {
-                "unit": w.unit,
-                "A": w.sec_a_count,
-                "B": w.sec_b_count,
-                "C": w.sec_c_count
-            }
-            for w in weightages
-        ]
-    })
+    return conditional_json(preview)
 
 
 @staff_bp.route("/ajax/validate-question-bank", methods=["POST"])
@@ -530,10 +476,15 @@ def list_question_papers():
 @login_required
 @role_required("staff")
 def generate_question_paper():
+    """
+    Queues the validate -> ingest -> skeleton -> auto-select pipeline and
+    returns a job id immediately. Poll `api.job_status` for progress.
+    """
     subject_version_id = request.form.get("subject_version_id", type=int)
     source_mode = request.form.get("source_mode") # 'default' or 'upload'
     
     bank_id = None
+    file_bytes = None
 
     # =====================================================
     # SCENARIO A: USE DEFAULT QUESTION BANK
@@ -560,7 +511,7 @@ def generate_question_paper():
     # SCENARIO B: UPLOAD NEW QUESTION BANK
     # =====================================================
     else:
-        # 1. Check File
+        # 1. Check File (validation + ingestion run in the background job)
         file = request.files.get("file")
         if not file:
             return jsonify({
@@ -570,54 +521,28 @@ def generate_question_paper():
 
         file_bytes = file.read() 
 
-        # 2. Validate Excel (Existing Logic)
-        from app.services.question_bank_excel_validation_service import validate_question_bank_excel
-        validation = validate_question_bank_excel(
-            file_bytes=file_bytes,
-            subject_version_id=subject_version_id
-        )
-
-        if not validation["valid"]:
-            return jsonify(validation), 400
-
-        # 3. Ingest Question Bank (Existing Logic)
-        from app.services.question_bank_ingestion_service import ingest_question_bank_excel
-        try:
-            bank = ingest_question_bank_excel(
-                file_bytes=file_bytes,
-                subject_version_id=subject_version_id,
-                uploaded_by=session["user_id"]
-            )
-            bank_id = bank.id
-        except Exception as e:
-            return jsonify({
-                "valid": False,
-                "errors": [{"message": f"Ingestion failed: {str(e)}"}]
-            }), 500
-
     # =====================================================
-    # COMMON FLOW: GENERATE PAPER SKELETON & SELECT
+    # COMMON FLOW: QUEUE GENERATION JOB
     # =====================================================
-    
-    # 1. Create Skeleton
-    paper = generate_question_paper_skeleton(
+    from app.services.question_paper_job_service import enqueue_paper_generation
+
+    job = enqueue_paper_generation(
         subject_version_id=subject_version_id,
         created_by=session["user_id"],
         paper_code=request.form["paper_code"],
         paper_type=request.form["paper_type"],
-        question_bank_id=bank_id 
+        question_bank_id=bank_id,
+        file_bytes=file_bytes,
+        set_count=max(1, min(request.form.get("set_count", 1, type=int), 26)),
+        max_overlap=max(0, request.form.get("max_overlap", 0, type=int))
     )
 
-    # 2. Auto-Select Questions
-    try:
-        auto_select_questions_for_paper(paper.id)
-    except Exception as e:
-        return jsonify({
-            "valid": False,
-            "errors": [{"message": f"Auto-selection failed: {str(e)}"}]
-        }), 400
+    return jsonify({
+        "job_id": job.id,
+        "status_url": url_for("api.job_status", job_id=job.id)
+    }), 202
+
 
-    return redirect(url_for("staff.review_generated_paper", paper_id=paper.id))
 @staff_bp.route("/papers/<int:paper_id>/download-official")
 @login_required
 @role_required("staff")
@@ -627,8 +552,8 @@ def download_official_question_paper(paper_id):
     """
     paper = QuestionPaper.query.get_or_404(paper_id)
 
-    # 1. Generate the OFFICIAL DOCX file
-    docx_buffer = generate_official_docx(paper)
+    # 1. Generate the OFFICIAL DOCX file (cached per content revision)
+    docx_buffer = render_paper_docx(paper, "official")
 
     # 2. Update Status (Trigger Scrutiny if not already)
     if paper.status == "GENERATED":
@@ -642,6 +567,36 @@ def download_official_question_paper(paper_id):
         download_name=f"{paper.paper_code}_OFFICIAL.docx",
         mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     )
+
+
+@staff_bp.route("/papers/<int:paper_id>/download-official-pdf")
+@login_required
+@role_required("staff")
+def download_official_question_paper_pdf(paper_id):
+    """
+    OFFICIAL copy as PDF (for exam cells), cached per content revision
+    """
+    paper = QuestionPaper.query.get_or_404(paper_id)
+
+    # 1. Convert (or reuse) the PDF
+    try:
+        pdf_buffer = render_paper_pdf(paper, "official")
+    except PdfConversionError as e:
+        flash(str(e), "danger")
+        return redirect(request.referrer or url_for("staff.review_generated_paper", paper_id=paper.id))
+
+    # 2. Update Status (Trigger Scrutiny if not already)
+    if paper.status == "GENERATED":
+        paper.status = "UNDER_SCRUTINY"
+        db.session.commit()
+
+    # 3. Send file to user
+    return send_file(
+        pdf_buffer,
+        as_attachment=True,
+        download_name=f"{paper.paper_code}_OFFICIAL.pdf",
+        mimetype="application/pdf"
+    )
 # =========================================================
 # PHASE 5D & 6 — REVIEW, SWAP & EDIT
 # =========================================================
@@ -690,8 +645,8 @@ def download_question_paper(paper_id):
     """
     paper = QuestionPaper.query.get_or_404(paper_id)
 
-    # 1. Generate the DOCX file
-    docx_buffer = generate_question_paper_docx(paper)
+    # 1. Generate the DOCX file (cached per content revision)
+    docx_buffer = render_paper_docx(paper, "draft")
 
     # 2. Update Status (Phase 6 Trigger)
     if paper.status == "GENERATED":
@@ -731,6 +686,24 @@ def activate_paper_route(paper_id):
     return redirect(url_for("staff.review_generated_paper", paper_id=paper_id))
 
 
+@staff_bp.route("/papers/<int:paper_id>/regenerate", methods=["POST"])
+@login_required
+@role_required("staff")
+def regenerate_paper_route(paper_id):
+    """
+    Rebuild the originally generated questions from the stored seed.
+    """
+
+    try:
+        regenerate_paper_from_seed(paper_id, user_id=session["user_id"])
+        flash("Paper regenerated: the original question selection has been restored.", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error regenerating paper: {str(e)}", "danger")
+
+    return redirect(url_for("staff.review_generated_paper", paper_id=paper_id))
+
+
 # app/routes/staff_routes.py (Add to the bottom)
 
 @staff_bp.route("/ajax/edit-question", methods=["POST"])
@@ -810,12 +783,11 @@ def scrutiny_list():
     papers = query.order_by(QuestionPaper.last_modified_at.desc()).all()
 
     # Fetch filters for dropdowns
-    from app.services.school_service import get_all_schools
-    from app.services.department_service import get_departments_by_school
     
     allowed_schools = session.get("school_access_ids", [])
-    schools = [s for s in get_all_schools() if s.id in allowed_schools]
-    departments = get_departments_by_school(school_id) if school_id else []
+    reference = get_reference_data()
+    schools = reference.schools_for(allowed_schools)
+    departments = reference.departments_of(school_id) if school_id else []
 
     return render_template(
         "staff/scrutiny_list.html",
@@ -840,8 +812,6 @@ def view_question_items():
     from app.models.subject_version import SubjectVersion
     from app.models.department import Department
     from app.models.school import School
-    from app.services.school_service import get_all_schools
-    from app.services.department_service import get_departments_by_school
 
     user_id = session["user_id"]
     
@@ -886,26 +856,28 @@ def view_question_items():
     if f_klevel:
         query = query.filter(QuestionMaster.k_level == f_klevel)
 
-    # 5. Distinct & Execute
+    # 5. Distinct & Execute (one keyset page)
     # We MUST use distinct() because joining SubjectVersion (1-to-Many) will create duplicates
     # if a Subject has multiple versions (e.g. Batch 2024, Batch 2025).
-    items = query.distinct(QuestionMaster.id).order_by(QuestionMaster.id.desc()).all()
-    
-    total_count = len(items)
+    # The subject code/name shown per row comes from the Subject join.
+    query = query.options(contains_eager(QuestionMaster.subject))
+    page = keyset_page(query.distinct(), order=[QuestionMaster.id], args=request.args)
 
     # 6. Dropdowns
     allowed_schools = session.get("school_access_ids", [])
-    schools = [s for s in get_all_schools() if s.id in allowed_schools]
-    departments = get_departments_by_school(school_id) if school_id else []
+    reference = get_reference_data()
+    schools = reference.schools_for(allowed_schools)
+    departments = reference.departments_of(school_id) if school_id else []
     
-    subjects_query = SubjectVersion.query
+    subjects_query = SubjectVersion.query.options(joinedload(SubjectVersion.subject))
     if dept_id: subjects_query = subjects_query.filter_by(department_id=dept_id)
     subjects = subjects_query.all() if dept_id else []
 
     return render_template(
         "staff/question_bank_items.html",
-        items=items,
-        total_count=total_count,
+        items=page.items,
+        page=page,
+        total_count=page.count,
         schools=schools,
         departments=departments,
         subjects=subjects,
@@ -934,8 +906,6 @@ def all_generated_papers():
     from app.models.subject_version import SubjectVersion
     from app.models.department import Department
     from app.models.user import User
-    from app.services.school_service import get_all_schools
-    from app.services.department_service import get_departments_by_school
 
     user_id = session["user_id"]
 
@@ -976,26 +946,36 @@ def all_generated_papers():
     if f_type:
         query = query.filter(QuestionPaper.paper_type == f_type)
 
-    # 5. Execute (Sort by newest first)
-    papers = query.order_by(QuestionPaper.last_modified_at.desc()).all()
-    total_count = len(papers)
+    # 5. Execute (one keyset page, newest first), with version, subject and
+    # creator loaded from the joins above instead of one query per card
+    query = query.options(
+        contains_eager(QuestionPaper.subject_version).joinedload(SubjectVersion.subject),
+        contains_eager(QuestionPaper.subject_version).lazyload(SubjectVersion.pattern),
+        contains_eager(QuestionPaper.creator)
+    )
+    page = keyset_page(
+        query,
+        order=[QuestionPaper.last_modified_at, QuestionPaper.id],
+        args=request.args
+    )
 
     # 6. Fetch Dropdown Options
     allowed_schools = session.get("school_access_ids", [])
-    schools = [s for s in get_all_schools() if s.id in allowed_schools]
-    departments = get_departments_by_school(school_id) if school_id else []
+    reference = get_reference_data()
+    schools = reference.schools_for(allowed_schools)
+    departments = reference.departments_of(school_id) if school_id else []
     
-    subjects_query = SubjectVersion.query
+    subjects_query = SubjectVersion.query.options(joinedload(SubjectVersion.subject))
     if dept_id: subjects_query = subjects_query.filter_by(department_id=dept_id)
     subjects = subjects_query.all() if dept_id else []
 
-    batches = db.session.query(SubjectVersion.batch).distinct().order_by(SubjectVersion.batch.desc()).all()
-    batches = [b[0] for b in batches]
+    batches = list(reference.batches)
 
     return render_template(
         "staff/all_papers.html",
-        papers=papers,
-        total_count=total_count,
+        papers=page.items,
+        page=page,
+        total_count=page.count,
         schools=schools,
         departments=departments,
         subjects=subjects,
@@ -0,0 +1,114 @@
+# app/services/bank_availability_service.py
+
+from collections import Counter
+
+from sqlalchemy.orm import attributes
+
+from app.extensions import db
+from app.models.question_bank import refresh_bank_availability
+from app.services.compiled_pattern_service import PAPER_SECTIONS, get_compiled_pattern
+from app.services.question_constraint_service import k_level_bucket
+from app.services.weightage_matrix_service import get_weightage_matrix
+
+
+class BankAvailability:
+    """
+    Question counts of one bank per (unit, section, marks, k_level), read
+    from QuestionBank.availability: feasibility checks cost the same for a
+    bank of 50 questions or 50,000 and never load its items.
+    """
+    __slots__ = ("bank_id", "cells")
+
+    def __init__(self, bank_id, cells: dict):
+        self.bank_id = bank_id
+        self.cells = cells              # {(unit, section, marks, k_level): count}
+
+    def __repr__(self):
+        return f"<BankAvailability bank={self.bank_id} {sum(self.cells.values())} questions>"
+
+    @classmethod
+    def from_stored(cls, bank_id, stored) -> "BankAvailability":
+        return cls(bank_id, {
+            (unit, section, marks, k_level): n
+            for unit, section, marks, k_level, n in stored or ()
+        })
+
+    def by_unit_marks(self) -> Counter:
+        """
+        {(unit, marks): count}: the groups candidate pools are loaded by.
+        """
+        counts = Counter()
+        for (unit, _, marks, _), n in self.cells.items():
+            counts[(unit, marks)] += n
+        return counts
+
+    def shortfalls(self, required: dict, *, times: int = 1) -> list[dict]:
+        """
+        One {"unit", "marks", "required", "available"} entry per group of
+        `required` ({(unit, marks): count}) holding fewer than `times` x the
+        required questions, in `required` order.
+        """
+        have = self.by_unit_marks()
+        return [
+            {"unit": unit, "marks": marks, "required": need * times, "available": have[(unit, marks)]}
+            for (unit, marks), need in required.items()
+            if have[(unit, marks)] < need * times
+        ]
+
+    def k_level_availability(self, group_of: dict, quotas: dict) -> dict:
+        """
+        {(section, unit, bucket): count} for the slot groups `group_of`
+        ({(section, unit): (unit, marks)}), each group's questions bucketed
+        by its section's K-level quotas: the `availability` argument of
+        plan_k_level_counts.
+        """
+        by_level = {}
+        for (unit, _, marks, k_level), n in self.cells.items():
+            levels = by_level.setdefault((unit, marks), Counter())
+            levels[k_level] += n
+
+        cells = Counter()
+        for (section, unit), key in group_of.items():
+            for k_level, n in by_level.get(key, {}).items():
+                cells[(section, unit, k_level_bucket(k_level, quotas.get(section)))] += n
+        return dict(cells)
+
+
+# ---------------------------------------------------
+# Public API
+# ---------------------------------------------------
+
+def get_bank_availability(bank) -> BankAvailability:
+    """
+    The histogram stored on `bank` (a QuestionBank row); counted once from
+    the items and stored if the bank has none yet.
+    """
+    stored = bank.availability
+    if stored is None:
+        stored = refresh_bank_availability(db.session.connection(), [bank.id])[bank.id]
+        attributes.set_committed_value(bank, "availability", stored)
+    return BankAvailability.from_stored(bank.id, stored)
+
+
+def paper_shortfalls(bank) -> list[dict]:
+    """
+    What `bank` lacks for one paper of its subject version under the
+    current pattern and weightage (see BankAvailability.shortfalls); empty
+    when either is missing, which generation reports by itself.
+    """
+    subject_version = bank.subject_version
+    if not subject_version or not subject_version.pattern:
+        return []
+
+    weightages = get_weightage_matrix(subject_version.id)
+    if not weightages:
+        return []
+
+    marks_map = get_compiled_pattern(subject_version.pattern).marks_map()
+    required = Counter()
+    for unit, *counts in weightages.rows():
+        for section, n in zip(PAPER_SECTIONS, counts):
+            if n:
+                required[(unit, marks_map[section])] += n
+
+    return get_bank_availability(bank).shortfalls(required)
@@ -0,0 +1,174 @@
+# app/services/compiled_pattern_service.py
+
+from app.config import Config
+from app.utils.cache import LRUCache
+
+
+# Sections a question paper is laid out in
+PAPER_SECTIONS = ("A", "B", "C")
+
+
+class PatternStructureError(ValueError):
+    pass
+
+
+class CompiledSection:
+    """
+    One section of a pattern: `total` questions printed, `count` of them
+    answered, `marks` each.
+    """
+    __slots__ = ("key", "count", "total", "marks", "note", "k_levels", "section_marks")
+
+    def __init__(self, key: str, count: int, total: int, marks: int, note: str | None, k_levels: tuple):
+        self.key = key
+        self.count = count
+        self.total = total
+        self.marks = marks
+        self.note = note                # None when the pattern has no note
+        self.k_levels = k_levels        # ((k_level, quota), ...) in pattern order
+        self.section_marks = count * marks
+
+    def __repr__(self):
+        return f"<CompiledSection {self.key} {self.count}/{self.total} x {self.marks}>"
+
+
+class CompiledPattern:
+    """
+    Pattern.structure_json validated once, with section order, marks,
+    counts, totals and K-level quotas laid out for direct lookup.
+    Shared between requests (and pickled into render workers): read only.
+    """
+    __slots__ = ("id", "version", "name", "total_marks", "sections", "signature", "_by_key")
+
+    def __init__(self, id, version, name, total_marks, sections: tuple):
+        self.id = id
+        self.version = version
+        self.name = name
+        self.total_marks = total_marks
+        self.sections = sections        # CompiledSection, in pattern order
+        self._by_key = {sec.key: sec for sec in sections}
+        # Hashable stand-in for the layout (cache keys of rendered output)
+        self.signature = (total_marks,) + tuple(
+            (sec.key, sec.count, sec.total, sec.marks, sec.note, sec.k_levels) for sec in sections
+        )
+
+    def __repr__(self):
+        return f"<CompiledPattern {self.name} {'/'.join(self._by_key)}>"
+
+    @property
+    def section_keys(self) -> tuple:
+        return tuple(self._by_key)
+
+    def section(self, key: str) -> CompiledSection | None:
+        return self._by_key.get(key)
+
+    def marks_of(self, key: str) -> int:
+        sec = self._by_key.get(key)
+        return sec.marks if sec else 0
+
+    def total_of(self, key: str) -> int:
+        sec = self._by_key.get(key)
+        return sec.total if sec else 0
+
+    def marks_map(self) -> dict:
+        """
+        {"A": marks, "B": marks, "C": marks}; 0 for a section the pattern lacks.
+        """
+        return {key: self.marks_of(key) for key in PAPER_SECTIONS}
+
+    def k_level_quotas(self) -> dict:
+        """
+        {section: {k_level: count}} for sections whose pattern sets quotas.
+        """
+        return {sec.key: dict(sec.k_levels) for sec in self.sections if sec.k_levels}
+
+
+# (pattern id, row version) -> CompiledPattern
+_compiled_cache = LRUCache(maxsize=Config.COMPILED_PATTERN_CACHE_SIZE)
+
+
+# ---------------------------------------------------
+# Public API
+# ---------------------------------------------------
+
+def get_compiled_pattern(pattern) -> CompiledPattern:
+    """
+    `pattern` is a Pattern row or a reference-data PatternRef. Compiled once
+    per process for each (id, version); an update gives the row a new
+    version, so outdated entries are never hit, only aged out.
+    """
+    if getattr(pattern, "id", None) is None:
+        return compile_pattern(pattern)  # not a stored pattern (e.g. benchmarks)
+
+    key = (pattern.id, pattern.version)
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        compiled = compile_pattern(pattern)
+        _compiled_cache.put(key, compiled)
+    return compiled
+
+
+def forget_compiled_pattern(pattern_id: int):
+    """
+    Call after deleting a pattern (its id may be handed out again).
+    """
+    _compiled_cache.discard_where(lambda key, _: key[0] == pattern_id)
+
+
+def compile_pattern(pattern) -> CompiledPattern:
+    """
+    Validate and lay out `pattern.structure_json` (uncached). A missing
+    count/marks means 0 and a missing total means `count`.
+    """
+    structure = pattern.structure_json or {}
+    raw_sections = structure.get("sections") or {}
+    if not isinstance(raw_sections, dict):
+        raise PatternStructureError(f"Pattern {pattern.name}: 'sections' must be a mapping")
+
+    sections = []
+    for key, cfg in raw_sections.items():
+        if not isinstance(cfg, dict):
+            raise PatternStructureError(f"Pattern {pattern.name}: section {key} must be a mapping")
+
+        count = _non_negative(pattern, key, "count", cfg.get("count", 0))
+        total = _non_negative(pattern, key, "total", cfg.get("total", count))
+        marks = _non_negative(pattern, key, "marks", cfg.get("marks", 0))
+
+        k_levels = cfg.get("k_levels") or {}
+        if not isinstance(k_levels, dict):
+            raise PatternStructureError(f"Pattern {pattern.name}: section {key} K-levels must be a mapping")
+
+        sections.append(CompiledSection(
+            key=key,
+            count=count,
+            total=total,
+            marks=marks,
+            note=cfg.get("note"),
+            k_levels=tuple(
+                (level, _non_negative(pattern, key, level, quota)) for level, quota in k_levels.items()
+            )
+        ))
+
+    return CompiledPattern(
+        id=getattr(pattern, "id", None),
+        version=getattr(pattern, "version", None),
+        name=pattern.name,
+        total_marks=pattern.total_marks,
+        sections=tuple(sections)
+    )
+
+
+# ---------------------------------------------------
+# Helpers
+# ---------------------------------------------------
+
+def _non_negative(pattern, section: str, field: str, value) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = -1
+    if number < 0:
+        raise PatternStructureError(
+            f"Pattern {pattern.name}: section {section} {field} must be a non-negative number (got {value!r})"
+        )
+    return number
@@ -0,0 +1,186 @@
+# app/services/dashboard_stats_service.py
+
+from collections import Counter
+
+from sqlalchemy import func, literal, select, union_all
+
+from app.extensions import db
+from app.models.dashboard_stat import DashboardStat
+from app.models.department import Department
+from app.models.question_bank import QuestionBank, QuestionBankItem
+from app.models.question_paper import QuestionPaper
+from app.models.question_paper_item import QuestionPaperItem
+from app.models.school import School
+from app.models.subject_version import SubjectVersion
+from app.models.user import User
+
+
+# ---------------------------------------------------
+# Dashboard reads (one query each)
+# ---------------------------------------------------
+
+def get_admin_dashboard_stats() -> dict:
+    """
+    System-wide totals for the admin dashboard:
+    {"total_schools", "total_departments", "total_users", "total_subjects",
+     "total_papers", "<STATUS>": papers in that status, ...}
+    """
+    entity_counts = [
+        select(literal("total_schools").label("metric"), func.count().label("total")).select_from(School),
+        select(literal("total_departments"), func.count()).select_from(Department),
+        select(literal("total_users"), func.count()).select_from(User),
+        select(literal("total_subjects"), func.count()).select_from(SubjectVersion)
+        .where(SubjectVersion.is_active.is_(True)),
+    ]
+    stat_totals = select(DashboardStat.metric, func.sum(DashboardStat.total)).group_by(DashboardStat.metric)
+
+    totals = _metric_totals(db.session.execute(union_all(*entity_counts, stat_totals)))
+
+    stats = {key: totals.get(key, 0) for key in
+             ("total_schools", "total_departments", "total_users", "total_subjects")}
+    stats["total_papers"] = totals.get("papers", 0)
+    stats.update(_status_counts(totals))
+    return stats
+
+
+def get_staff_dashboard_stats(
+    user_id: int,
+    *,
+    subject_version_id: int | None = None,
+    department_id: int | None = None,
+    school_id: int | None = None
+) -> dict:
+    """
+    One staff member's banks, papers and their question counts, narrowed
+    to a subject version, else a department, else a school:
+    {"total_banks", "total_bank_questions", "total_papers",
+     "total_paper_questions", "status": {<STATUS>: papers}}
+    """
+    query = (
+        select(DashboardStat.metric, func.sum(DashboardStat.total))
+        .where(DashboardStat.user_id == user_id)
+        .group_by(DashboardStat.metric)
+    )
+    if subject_version_id:
+        query = query.where(DashboardStat.subject_version_id == subject_version_id)
+    elif department_id:
+        query = query.join(SubjectVersion).where(SubjectVersion.department_id == department_id)
+    elif school_id:
+        query = (
+            query.join(SubjectVersion)
+            .join(Department, SubjectVersion.department_id == Department.id)
+            .where(Department.school_id == school_id)
+        )
+
+    totals = _metric_totals(db.session.execute(query))
+
+    return {
+        "total_banks": totals.get("banks", 0),
+        "total_bank_questions": totals.get("bank_items", 0),
+        "total_papers": totals.get("papers", 0),
+        "total_paper_questions": totals.get("paper_items", 0),
+        "status": _status_counts(totals),
+    }
+
+
+# ---------------------------------------------------
+# Nightly reconciliation
+# ---------------------------------------------------
+
+def reconcile_dashboard_stats() -> int:
+    """
+    Recount every counter from the source tables and repair the ones that
+    drifted (writes that bypass the ORM, e.g. bulk deletes or database-side
+    cascades). Returns the number of counters corrected.
+    """
+    actual = count_dashboard_stats()
+
+    stored = {
+        (row.user_id, row.subject_version_id, row.metric): row
+        for row in DashboardStat.query.all()
+    }
+
+    corrected = 0
+    for key, row in stored.items():
+        total = actual.pop(key, 0)
+        if total == 0:
+            db.session.delete(row)
+            corrected += row.total != 0
+        elif row.total != total:
+            row.total = total
+            corrected += 1
+
+    for (user_id, sv_id, metric), total in actual.items():
+        if total:
+            db.session.add(DashboardStat(
+                user_id=user_id,
+                subject_version_id=sv_id,
+                metric=metric,
+                total=total
+            ))
+            corrected += 1
+
+    db.session.commit()
+    return corrected
+
+
+def count_dashboard_stats() -> Counter:
+    """
+    {(user_id, subject_version_id, metric): total} counted from scratch.
+    """
+    counts = Counter()
+
+    papers = (
+        db.session.query(
+            QuestionPaper.created_by,
+            QuestionPaper.subject_version_id,
+            QuestionPaper.status,
+            func.count()
+        )
+        .group_by(QuestionPaper.created_by, QuestionPaper.subject_version_id, QuestionPaper.status)
+    )
+    for user_id, sv_id, status, total in papers:
+        counts[(user_id, sv_id, "papers")] += total
+        counts[(user_id, sv_id, f"status:{status}")] += total
+
+    banks = (
+        db.session.query(QuestionBank.uploaded_by, QuestionBank.subject_version_id, func.count())
+        .group_by(QuestionBank.uploaded_by, QuestionBank.subject_version_id)
+    )
+    for user_id, sv_id, total in banks:
+        counts[(user_id, sv_id, "banks")] += total
+
+    paper_items = (
+        db.session.query(QuestionPaper.created_by, QuestionPaper.subject_version_id, func.count())
+        .join(QuestionPaperItem, QuestionPaperItem.question_paper_id == QuestionPaper.id)
+        .group_by(QuestionPaper.created_by, QuestionPaper.subject_version_id)
+    )
+    for user_id, sv_id, total in paper_items:
+        counts[(user_id, sv_id, "paper_items")] += total
+
+    bank_items = (
+        db.session.query(QuestionBank.uploaded_by, QuestionBank.subject_version_id, func.count())
+        .join(QuestionBankItem, QuestionBankItem.question_bank_id == QuestionBank.id)
+        .group_by(QuestionBank.uploaded_by, QuestionBank.subject_version_id)
+    )
+    for user_id, sv_id, total in bank_items:
+        counts[(user_id, sv_id, "bank_items")] += total
+
+    return counts
+
+
+# ---------------------------------------------------
+# Helpers
+# ---------------------------------------------------
+
+def _metric_totals(rows) -> dict:
+    # SUM() comes back as Decimal on MySQL
+    return {metric: int(total or 0) for metric, total in rows}
+
+
+def _status_counts(totals: dict) -> dict:
+    return {
+        metric.split(":", 1)[1]: total
+        for metric, total in totals.items()
+        if metric.startswith("status:") and total
+    }
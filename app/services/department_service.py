@@ -1,4 +1,3 @@
-import pandas as pd
 from io import StringIO
 from sqlalchemy.sql import exists
 
@@ -6,6 +5,7 @@ from app.extensions import db
 from app.models.department import Department
 from app.models.school import School
 from app.models.subject_version import SubjectVersion
+from app.services.reference_data_service import bump_reference_generation
 
 
 # ----------------------------
@@ -46,6 +46,7 @@ def add_department(code: str, name: str, level: str, school_id: int):
     )
     db.session.add(dept)
     db.session.commit()
+    bump_reference_generation("departments")
 
 
 # ----------------------------
@@ -71,6 +72,7 @@ def delete_department(dept_id: int):
 
     db.session.delete(dept)
     db.session.commit()
+    bump_reference_generation("departments")
 
 
 # ----------------------------
@@ -90,6 +92,7 @@ def get_departments_as_csv():
         for d in depts
     ]
 
+    import pandas as pd
     df = pd.DataFrame(data)
     buffer = StringIO()
     df.to_csv(buffer, index=False)
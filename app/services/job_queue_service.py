@@ -0,0 +1,178 @@
+# app/services/job_queue_service.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models.background_job import BackgroundJob, get_ist_time
+
+logger = logging.getLogger(__name__)
+
+
+class JobError(Exception):
+    """
+    Raised by a job handler to fail the job with user-facing errors.
+    """
+
+    def __init__(self, message: str, errors: list | None = None):
+        super().__init__(message)
+        self.errors = errors or [{"message": message}]
+
+
+class JobQueue:
+    """
+    In-process job runner backed by a thread pool.
+    Every job is persisted in `background_job`, so QUEUED jobs (and RUNNING
+    jobs whose heartbeat went stale) are picked up again after a restart.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._executor = None
+        self._handlers = {}
+        self._resumed = False
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------
+    # Setup
+    # -------------------------------------------------
+    def init_app(self, app):
+        self._app = app
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config["JOB_QUEUE_WORKERS"],
+            thread_name_prefix="qp-job"
+        )
+        app.extensions["job_queue"] = self
+
+        # Resume persisted jobs lazily (keeps `flask db upgrade` DB-free)
+        app.before_request(self._resume_pending_once)
+
+    def handler(self, job_type: str):
+        def decorator(fn):
+            self._handlers[job_type] = fn
+            return fn
+        return decorator
+
+    # -------------------------------------------------
+    # Producer side
+    # -------------------------------------------------
+    def submit(self, job_type: str, *, created_by: int, payload: dict,
+               input_file: bytes | None = None) -> BackgroundJob:
+        if job_type not in self._handlers:
+            raise JobError(f"Unknown job type '{job_type}'")
+
+        job = BackgroundJob(
+            job_type=job_type,
+            status="QUEUED",
+            stage="QUEUED",
+            progress=0,
+            payload=payload,
+            input_file=input_file,
+            created_by=created_by
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self._dispatch(job.id)
+        return job
+
+    # -------------------------------------------------
+    # Worker side
+    # -------------------------------------------------
+    def _dispatch(self, job_id: str):
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id: str):
+        with self._app.app_context():
+            if not self._claim(job_id):
+                return  # another worker/process owns it
+
+            job = BackgroundJob.query.get(job_id)
+            try:
+                self._handlers[job.job_type](job)
+            except JobError as e:
+                self._finish(job_id, "FAILED", errors=e.errors)
+            except Exception as e:
+                logger.exception("Background job %s failed", job_id)
+                self._finish(job_id, "FAILED", errors=[{"message": str(e)}])
+            else:
+                self._finish(job_id, "SUCCEEDED")
+
+    def _claim(self, job_id: str) -> bool:
+        now = get_ist_time()
+        claimed = (
+            BackgroundJob.query
+            .filter_by(id=job_id, status="QUEUED")
+            .update({"status": "RUNNING", "started_at": now, "heartbeat_at": now})
+        )
+        db.session.commit()
+        return claimed == 1
+
+    def _finish(self, job_id: str, status: str, errors: list | None = None):
+        db.session.rollback()  # discard anything the handler left half-done
+
+        job = BackgroundJob.query.get(job_id)
+        job.status = status
+        job.errors = errors
+        job.finished_at = get_ist_time()
+        job.input_file = None  # inputs are not needed once the job is done
+        if status == "SUCCEEDED":
+            job.stage = "DONE"
+            job.progress = 100
+        db.session.commit()
+
+    # -------------------------------------------------
+    # Restart recovery
+    # -------------------------------------------------
+    def _resume_pending_once(self):
+        if self._resumed:
+            return
+        with self._lock:
+            if self._resumed:
+                return
+            self._resumed = True
+
+        stale_before = get_ist_time() - timedelta(
+            seconds=self._app.config["JOB_STALE_AFTER_SECONDS"]
+        )
+        try:
+            BackgroundJob.query.filter(
+                BackgroundJob.status == "RUNNING",
+                BackgroundJob.heartbeat_at < stale_before
+            ).update({"status": "QUEUED"}, synchronize_session=False)
+            db.session.commit()
+
+            pending = [
+                row.id for row in
+                BackgroundJob.query
+                .with_entities(BackgroundJob.id)
+                .filter_by(status="QUEUED")
+                .order_by(BackgroundJob.created_at)
+                .all()
+            ]
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.exception("Could not resume background jobs")
+            return
+
+        for job_id in pending:
+            self._dispatch(job_id)
+
+
+def update_job_progress(job: BackgroundJob, stage: str, progress: int, **result):
+    """
+    Record stage/progress (and partial results) for pollers; doubles as heartbeat.
+    """
+    job.stage = stage
+    job.progress = progress
+    if result:
+        job.result = {**(job.result or {}), **result}
+    job.heartbeat_at = get_ist_time()
+    db.session.commit()
+
+
+job_queue = JobQueue()
@@ -1,5 +1,9 @@
 from app.extensions import db
 from app.models.pattern import Pattern
+from app.services.compiled_pattern_service import forget_compiled_pattern, get_compiled_pattern
+from app.services.question_bank_excel_validation_service import invalidate_validation_cache
+from app.services.question_constraint_service import parse_k_level_quotas
+from app.services.reference_data_service import bump_reference_generation
 
 
 # ----------------------------
@@ -34,16 +38,26 @@ def create_pattern_from_form(form):
             total = int(form.get(f"total_{sec}", 0))
             marks = int(form.get(f"marks_{sec}", 0))
             note = form.get(f"note_{sec}", "").strip()
+            k_levels = parse_k_level_quotas(form.get(f"k_levels_{sec}", ""))
 
             if count == 0 and total == 0:
                 continue  # skip unused sections
 
+            # Quotas are counted over the questions printed in the paper
+            if sum(k_levels.values()) > total:
+                raise ValueError(
+                    f"Section {sec}: K-level quotas add up to {sum(k_levels.values())} "
+                    f"but only {total} questions are in the paper"
+                )
+
             sections[sec] = {
                 "count": count,
                 "total": total,
                 "marks": marks,
                 "note": note
             }
+            if k_levels:
+                sections[sec]["k_levels"] = k_levels
 
             total_marks += count * marks
 
@@ -59,6 +73,7 @@ def create_pattern_from_form(form):
 
         db.session.add(pattern)
         db.session.commit()
+        bump_reference_generation("patterns")
 
     except Exception:
         db.session.rollback() # ✅ ALWAYS rollback on error
@@ -68,43 +83,38 @@ def create_pattern_from_form(form):
 def format_pattern_sections(pattern):
     sections_view = []
 
-    structure = pattern.structure_json or {}
-    sections = structure.get("sections", {})  # ✅ correct level
-
-    for sec, cfg in sections.items():
-        count = cfg.get("count", 0)
-        marks = cfg.get("marks", 0)
-        total_in_paper = cfg.get("total")
-        note = cfg.get("note", "")
+    for section in get_compiled_pattern(pattern).sections:
+        count = section.count
+        marks = section.marks
 
-        section_total = count * marks
+        expression = f"{marks} × {count} = {section.section_marks}"
 
-        expression = f"{marks} × {count} = {section_total}"
-
-        if total_in_paper:
-            details = f"{marks} marks, answer {count} out of {total_in_paper}"
+        if section.total:
+            details = f"{marks} marks, answer {count} out of {section.total}"
         else:
             details = f"{marks} marks per question"
 
+        if section.k_levels:
+            details += "; " + ", ".join(f"{k}: {n}" for k, n in sorted(section.k_levels))
+
         sections_view.append({
-            "section": f"Sec {sec}",
+            "section": f"Sec {section.key}",
             "expression": expression,
             "details": details,
-            "note": note
+            "note": section.note or ""
         })
 
     return sections_view
 
 def format_pattern_for_subject(pattern: Pattern):
-    sections = pattern.structure_json.get("sections", {})
     view = []
 
-    for sec, cfg in sections.items():
+    for section in get_compiled_pattern(pattern).sections:
         view.append({
-            "section": f"Sec {sec}",
-            "expression": f"{cfg['marks']} × {cfg['count']}",
-            "details": f"{cfg['count']} out of {cfg['total']}",
-            "note": cfg.get("note", "")
+            "section": f"Sec {section.key}",
+            "expression": f"{section.marks} × {section.count}",
+            "details": f"{section.count} out of {section.total}",
+            "note": section.note or ""
         })
 
     return view
@@ -117,6 +127,9 @@ def delete_pattern(pattern_id: int):
     pattern = get_pattern_by_id(pattern_id)
     db.session.delete(pattern)
     db.session.commit()
+    invalidate_validation_cache(pattern_id=pattern_id)
+    forget_compiled_pattern(pattern_id)
+    bump_reference_generation("patterns")
 
 
 def get_active_pattern_for_subject_version(subject_version_id: int):
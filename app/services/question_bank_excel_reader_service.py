@@ -0,0 +1,154 @@
+# app/services/question_bank_excel_reader_service.py
+
+from io import BytesIO
+from typing import Iterator, NamedTuple
+
+from openpyxl import load_workbook
+
+
+REQUIRED_COLUMNS = {"UNIT", "SECTION", "MARKS", "K LEVEL", "QUESTIONS"}
+
+SUBJECT_CODE_SCAN_ROWS = 15
+HEADER_SCAN_ROWS = 40
+
+
+class ExcelReadError(Exception):
+    pass
+
+
+class QuestionBankRow(NamedTuple):
+    excel_row: int
+    unit: int | None
+    raw_unit: object
+    section: str
+    k_level: str
+    question: str
+
+
+class ParsedQuestionBank:
+    """
+    Result of ONE streaming pass over a Question Bank workbook.
+    Shared by validation and ingestion so the file is parsed once.
+    """
+
+    def __init__(self, preamble: list[str], header_row: int | None, rows: list[QuestionBankRow]):
+        self.preamble = preamble          # upper-cased text of the first 15 rows
+        self.header_row = header_row      # 1-based Excel row of the header (None if missing)
+        self.rows = rows
+
+    def contains_subject_code(self, subject_code: str) -> bool:
+        code = subject_code.strip().upper()
+        return any(code in text for text in self.preamble)
+
+
+# ---------------------------------------------------
+# Public API
+# ---------------------------------------------------
+
+def iter_question_bank_rows(file_bytes: bytes) -> Iterator[QuestionBankRow]:
+    """
+    Lazily yield typed data rows (header detection happens on the fly).
+    """
+    yield from _stream(file_bytes, {})
+
+
+def read_question_bank_excel(file_bytes: bytes) -> ParsedQuestionBank:
+    """
+    Parse the workbook in a single read-only pass.
+    Raises ExcelReadError if the file cannot be opened.
+    """
+    meta = {}
+    rows = list(_stream(file_bytes, meta))
+
+    return ParsedQuestionBank(
+        preamble=meta.get("preamble", []),
+        header_row=meta.get("header_row"),
+        rows=rows
+    )
+
+
+# ---------------------------------------------------
+# Internals
+# ---------------------------------------------------
+
+def _stream(file_bytes: bytes, meta: dict) -> Iterator[QuestionBankRow]:
+    try:
+        wb = load_workbook(BytesIO(file_bytes), read_only=True, data_only=True)
+    except Exception:
+        raise ExcelReadError("Unable to read Excel file")
+
+    preamble = []
+    meta["preamble"] = preamble
+    meta["header_row"] = None
+
+    try:
+        ws = wb.active
+        columns = None
+
+        for excel_row, values in enumerate(ws.iter_rows(values_only=True), start=1):
+            # 1️⃣ Preamble / header detection
+            if columns is None:
+                cells = [_cell_text(v) for v in values]
+
+                if excel_row <= SUBJECT_CODE_SCAN_ROWS:
+                    preamble.append(" ".join(c for c in cells if c).upper())
+
+                if excel_row > HEADER_SCAN_ROWS:
+                    break  # no header -> nothing to yield
+
+                header = {c.upper(): idx for idx, c in enumerate(cells) if c}
+                if REQUIRED_COLUMNS.issubset(header):
+                    columns = header
+                    meta["header_row"] = excel_row
+                continue
+
+            # 2️⃣ Typed data rows
+            if excel_row <= SUBJECT_CODE_SCAN_ROWS:
+                preamble.append(
+                    " ".join(_cell_text(v) for v in values if v is not None).upper()
+                )
+
+            if all(v is None or _cell_text(v) == "" for v in values):
+                continue  # skip blank lines
+
+            yield _to_row(excel_row, values, columns)
+    finally:
+        wb.close()
+
+
+def _to_row(excel_row: int, values: tuple, columns: dict) -> QuestionBankRow:
+    def get(name):
+        idx = columns[name]
+        return values[idx] if idx < len(values) else None
+
+    raw_unit = get("UNIT")
+    k_level = _cell_text(get("K LEVEL"))
+
+    return QuestionBankRow(
+        excel_row=excel_row,
+        unit=_to_int(raw_unit),
+        raw_unit=raw_unit,
+        section=_cell_text(get("SECTION")).upper(),
+        k_level=k_level or "N/A",
+        question=_cell_text(get("QUESTIONS"))
+    )
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _to_int(value) -> int | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
@@ -1,24 +1,58 @@
 #app/services/question_bank_excel_validation_service.py
-import pandas as pd
-from io import BytesIO
+import hashlib
+import json
+from collections import Counter
 
+from app.config import Config
 from app.models.subject_version import SubjectVersion
-from app.models.weightage import SubjectWeightage
-
-
-REQUIRED_COLUMNS = {"UNIT", "SECTION","MARKS", "K LEVEL", "QUESTIONS"}
+from app.services.compiled_pattern_service import PAPER_SECTIONS, get_compiled_pattern
+from app.services.question_bank_excel_reader_service import (
+    ExcelReadError,
+    ParsedQuestionBank,
+    read_question_bank_excel
+)
+from app.services.weightage_matrix_service import get_weightage_matrix
+from app.utils.cache import LRUCache
 
 
 class ExcelValidationError(Exception):
     pass
 
 
+# (file sha256, subject_version_id, rules revision) -> (result, parsed, pattern_id)
+_validation_cache = LRUCache(maxsize=Config.VALIDATION_CACHE_SIZE)
+
+
 def validate_question_bank_excel(
     *,
-    file_bytes: bytes,
-    subject_version_id: int
+    file_bytes: bytes | None = None,
+    subject_version_id: int,
+    parsed: ParsedQuestionBank | None = None
 ) -> dict:
-    errors = []
+    """
+    Validate a Question Bank workbook against pattern + weightage.
+    Pass `parsed` (from read_question_bank_excel) to reuse an existing parse.
+    """
+    result, _ = validate_and_parse_question_bank(
+        file_bytes=file_bytes,
+        subject_version_id=subject_version_id,
+        parsed=parsed
+    )
+    return result
+
+
+def validate_and_parse_question_bank(
+    *,
+    file_bytes: bytes | None = None,
+    subject_version_id: int,
+    parsed: ParsedQuestionBank | None = None,
+    file_hash: str | None = None
+) -> tuple[dict, ParsedQuestionBank | None]:
+    """
+    Same as validate_question_bank_excel, but also returns the parsed rows.
+    Results are cached per (file sha256, subject version, weightage/pattern
+    revision), so validate -> generate on the same file parses it once.
+    """
 
     # -------------------------------------------------
     # 1️⃣ Load SubjectVersion + Pattern + Weightage
@@ -26,95 +60,99 @@ def validate_question_bank_excel(
     sv = SubjectVersion.query.get_or_404(subject_version_id)
 
     if not sv.pattern:
-        return _fail("PATTERN_MISSING", "Pattern not assigned to subject")
+        return _fail("PATTERN_MISSING", "Pattern not assigned to subject"), parsed
 
-    sections_cfg = sv.pattern.structure_json.get("sections", {})
-    allowed_sections = set(sections_cfg.keys())
-
-    weightages = (
-        SubjectWeightage.query
-        .filter_by(subject_version_id=subject_version_id)
-        .all()
-    )
+    weightages = get_weightage_matrix(subject_version_id)
 
     if not weightages:
-        return _fail("WEIGHTAGE_MISSING", "Weightage not defined for subject")
-
-    # (unit, section) → required count
-    weightage_map = {}
-    for w in weightages:
-        weightage_map[(w.unit, "A")] = w.sec_a_count or 0
-        weightage_map[(w.unit, "B")] = w.sec_b_count or 0
-        weightage_map[(w.unit, "C")] = w.sec_c_count or 0
-
-    used_count = {k: 0 for k in weightage_map.keys()}
+        return _fail("WEIGHTAGE_MISSING", "Weightage not defined for subject"), parsed
 
     # -------------------------------------------------
-    # 2️⃣ Load Excel (raw)
+    # 2️⃣ Cache Lookup
     # -------------------------------------------------
-    try:
-        raw_df = pd.read_excel(BytesIO(file_bytes), header=None)
-    except Exception:
-        return _fail("FILE_INVALID", "Unable to read Excel file")
+    cache_key = None
+    if file_bytes is not None:
+        cache_key = (
+            file_hash or hashlib.sha256(file_bytes).hexdigest(),
+            subject_version_id,
+            _rules_revision(sv, weightages)
+        )
+        hit = _validation_cache.get(cache_key)
+        if hit is not None:
+            return hit[0], hit[1]
 
     # -------------------------------------------------
-    # 3️⃣ Subject Code Validation (first 15 rows, any cell)
+    # 3️⃣ Load Excel (single streaming pass)
     # -------------------------------------------------
-    subject_code = sv.subject.code.strip().upper()
-    found_code = False
+    if parsed is None:
+        try:
+            parsed = read_question_bank_excel(file_bytes)
+        except ExcelReadError:
+            return _fail("FILE_INVALID", "Unable to read Excel file"), None
+
+    result = _validate_parsed(sv, weightages, parsed)
+
+    if cache_key is not None:
+        _validation_cache.put(cache_key, (result, parsed, sv.pattern_id))
+
+    return result, parsed
 
-    for r in range(min(15, len(raw_df))):
-        row_text = " ".join(
-            str(v).upper() for v in raw_df.iloc[r].values if pd.notna(v)
+
+def invalidate_validation_cache(*, subject_version_id: int | None = None, pattern_id: int | None = None):
+    """
+    Drop cached validations after a weightage or pattern change.
+    """
+    _validation_cache.discard_where(
+        lambda key, value: (
+            (subject_version_id is not None and key[1] == subject_version_id)
+            or (pattern_id is not None and value[2] == pattern_id)
         )
-        if subject_code in row_text:
-            found_code = True
-            break
+    )
+
+
+def _validate_parsed(sv, weightages, parsed: ParsedQuestionBank) -> dict:
+    errors = []
+
+    allowed_sections = set(get_compiled_pattern(sv.pattern).section_keys)
+
+    # (unit, section) → questions provided
+    used_count = Counter()
+
+    # -------------------------------------------------
+    # 4️⃣ Subject Code Validation (first 15 rows, any cell)
+    # -------------------------------------------------
+    subject_code = sv.subject.code.strip().upper()
 
-    if not found_code:
+    if not parsed.contains_subject_code(subject_code):
         return _fail(
             "SUBJECT_CODE_MISMATCH",
             f"Subject code '{subject_code}' not found in first 15 rows"
         )
 
     # -------------------------------------------------
-    # 4️⃣ Detect Header Row (scan first 40 rows)
+    # 5️⃣ Header Row (detected by the reader in first 40 rows)
     # -------------------------------------------------
-    header_row_idx = None
-    for i in range(min(40, len(raw_df))):
-        row_values = {
-            str(v).strip().upper()
-            for v in raw_df.iloc[i].values
-            if pd.notna(v)
-        }
-        if REQUIRED_COLUMNS.issubset(row_values):
-            header_row_idx = i
-            break
-
-    if header_row_idx is None:
+    if parsed.header_row is None:
         return _fail(
             "HEADER_NOT_FOUND",
             "Required columns not found within first 40 rows"
         )
 
-    df = pd.read_excel(BytesIO(file_bytes), header=header_row_idx)
-    df.columns = [c.strip().upper() for c in df.columns]
-
     # -------------------------------------------------
-    # 5️⃣ Row-level Structural Validation + Counting
+    # 6️⃣ Row-level Structural Validation + Counting
     # -------------------------------------------------
-    for idx, row in df.iterrows():
-        excel_row = header_row_idx + idx + 2
+    for row in parsed.rows:
+        excel_row = row.excel_row
 
-        unit = row.get("UNIT")
-        section = str(row.get("SECTION")).strip().upper()
+        unit = row.unit
+        section = row.section
 
         # Unit validation
         if unit not in range(1, 6):
             errors.append(_row_err(
                 "UNIT_INVALID",
                 excel_row,
-                f"Invalid unit '{unit}' (allowed 1–5)"
+                f"Invalid unit '{row.raw_unit}' (allowed 1–5)"
             ))
             continue
 
@@ -130,7 +168,7 @@ def validate_question_bank_excel(
         key = (unit, section)
 
         # Weightage existence
-        if key not in weightage_map:
+        if not weightages.defines(unit) or section not in PAPER_SECTIONS:
             errors.append(_row_err(
                 "WEIGHTAGE_NOT_ALLOWED",
                 excel_row,
@@ -141,24 +179,20 @@ def validate_question_bank_excel(
         used_count[key] += 1
 
     # -------------------------------------------------
-    # 6️⃣ Aggregate Validation (ONCE per unit/section)
+    # 7️⃣ Aggregate Validation (whole unit x section grid at once)
     # -------------------------------------------------
-    for (unit, section), required in weightage_map.items():
-        provided = used_count.get((unit, section), 0)
+    for unit, section, required, provided in weightages.shortfalls(used_count):
+        errors.append({
+            "type": "INSUFFICIENT_QUESTIONS",
+            "message": (
+                f"Unit {unit} Section {section}: "
+                f"required {required}, found {provided}"
+            )
+        })
 
-        if provided < required:
-            errors.append({
-                "type": "INSUFFICIENT_QUESTIONS",
-                "message": (
-                    f"Unit {unit} Section {section}: "
-                    f"required {required}, found {provided}"
-                )
-            })
-
-        
 
     # -------------------------------------------------
-    # 7️⃣ Final Decision
+    # 8️⃣ Final Decision
     # -------------------------------------------------
     if errors:
         return {"valid": False, "errors": errors}
@@ -166,8 +200,8 @@ def validate_question_bank_excel(
     return {
         "valid": True,
         "summary": {
-            "rows": len(df),
-            "units": sorted(df["UNIT"].dropna().unique().tolist())
+            "rows": len(parsed.rows),
+            "units": sorted({r.unit for r in parsed.rows if r.unit is not None})
         }
     }
 
@@ -175,6 +209,20 @@ def validate_question_bank_excel(
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
+def _rules_revision(sv, weightages) -> str:
+    """
+    Fingerprint of everything validation depends on besides the file.
+    Any weightage/pattern edit yields a new revision (and so a cache miss).
+    """
+    rules = {
+        "subject_code": sv.subject.code,
+        "pattern_id": sv.pattern_id,
+        "pattern_version": sv.pattern.version,
+        "weightage": list(weightages.rows())
+    }
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+
+
 def _fail(code, message):
     return {
         "valid": False,
@@ -1,19 +1,23 @@
 # app/services/question_bank_ingestion_service.py
 
-import pandas as pd
-from io import BytesIO
-
 from app.extensions import db
 from app.models.subject_version import SubjectVersion
-from app.models.question_bank import QuestionBank, QuestionBankItem
+from app.models.question_bank import QuestionBank, QuestionBankItem, availability_rows
 from app.models.question_master import QuestionMaster
+from app.models.dashboard_stat import apply_stat_deltas
 
+from app.services.compiled_pattern_service import get_compiled_pattern
 from app.services.question_bank_excel_validation_service import (
-    validate_question_bank_excel
+    validate_and_parse_question_bank
 )
+from app.services.question_bank_excel_reader_service import ParsedQuestionBank
 
 import hashlib
 import re
+from collections import Counter
+
+
+BULK_CHUNK_SIZE = 500
 
 
 class QuestionBankIngestionError(Exception):
@@ -42,10 +46,12 @@ def ingest_question_bank_excel(
     *,
     file_bytes: bytes,
     subject_version_id: int,
-    uploaded_by: int
+    uploaded_by: int,
+    parsed: ParsedQuestionBank | None = None
 ) -> QuestionBank:
     """
     Ingest Question Bank with File-Level Deduplication.
+    `parsed` lets the caller reuse the parse it already validated.
     """
 
     # ---------------------------------------------
@@ -69,9 +75,12 @@ def ingest_question_bank_excel(
     # ---------------------------------------------
     # 3️⃣ Validation (If not duplicate)
     # ---------------------------------------------
-    validation = validate_question_bank_excel(
+    # Cached by file hash: a file just validated is neither re-parsed nor re-validated
+    validation, parsed = validate_and_parse_question_bank(
         file_bytes=file_bytes,
-        subject_version_id=subject_version_id
+        subject_version_id=subject_version_id,
+        parsed=parsed,
+        file_hash=file_hash
     )
 
     if not validation["valid"]:
@@ -99,63 +108,118 @@ def ingest_question_bank_excel(
     db.session.flush()
 
     # ---------------------------------------------
-    # 5️⃣ Insert Items (Same logic as before)
+    # 5️⃣ Bulk Insert (constant number of queries)
     # ---------------------------------------------
-    
-    # Reload Excel
-    raw_df = pd.read_excel(BytesIO(file_bytes), header=None)
-    header_row_idx = None
-    REQUIRED_COLUMNS = {"UNIT", "SECTION", "K LEVEL", "QUESTIONS"}
+    sv = SubjectVersion.query.get(subject_version_id)
+    pattern = get_compiled_pattern(sv.pattern)
+
+    # Hash every row up-front (first occurrence defines master metadata)
+    hashed_rows = []
+    new_masters = {}
+
+    for row in parsed.rows:
+        marks = pattern.section(row.section).marks
+        q_hash = _hash(row.question)
+        hashed_rows.append((q_hash, row, marks))
+
+        new_masters.setdefault(q_hash, {
+            "subject_id": sv.subject_id,
+            "question_hash": q_hash,
+            "question_text": row.question,
+            "default_unit": row.unit,
+            "default_section": row.section,
+            "default_marks": marks,
+            "k_level": row.k_level
+        })
+
+    # Existing masters -> one IN (...) query per chunk. question_hash is
+    # unique across subjects, so a question already stored under another
+    # subject is reused rather than inserted again
+    master_ids = _fetch_master_ids(list(new_masters))
+
+    missing = [m for h, m in new_masters.items() if h not in master_ids]
+    if missing:
+        _insert_masters(missing)
+        master_ids.update(
+            _fetch_master_ids([m["question_hash"] for m in missing])
+        )
 
-    for i in range(min(40, len(raw_df))):
-        row_values = {str(v).strip().upper() for v in raw_df.iloc[i].values if pd.notna(v)}
-        if REQUIRED_COLUMNS.issubset(row_values):
-            header_row_idx = i
-            break
+    unresolved = [row.question for q_hash, row, _ in hashed_rows if q_hash not in master_ids]
+    if unresolved:
+        raise QuestionBankIngestionError(
+            f"Could not store question '{unresolved[0][:80]}' in the question master"
+        )
 
-    df = pd.read_excel(BytesIO(file_bytes), header=header_row_idx)
-    df.columns = [c.strip().upper() for c in df.columns]
+    # Items -> one multi-row insert
+    if hashed_rows:
+        db.session.execute(
+            QuestionBankItem.__table__.insert(),
+            [
+                {
+                    "question_bank_id": bank.id,
+                    "question_id": master_ids[q_hash],
+                    "unit": row.unit,
+                    "section": row.section,
+                    "marks": marks,
+                    "k_level": row.k_level
+                }
+                for q_hash, row, marks in hashed_rows
+            ]
+        )
+        # Core insert: invisible to the flush hooks that maintain dashboard_stats
+        # and the bank's availability histogram
+        apply_stat_deltas(
+            db.session.connection(),
+            Counter({(bank.uploaded_by, bank.subject_version_id, "bank_items"): len(hashed_rows)})
+        )
 
-    sv = SubjectVersion.query.get(subject_version_id)
+    # Availability histogram, counted from the parsed rows
+    bank.availability = availability_rows(Counter(
+        (row.unit, row.section, marks, row.k_level) for _, row, marks in hashed_rows
+    ))
+
+    db.session.commit()
+    return bank
 
-    for _, row in df.iterrows():
-        question_text = str(row["QUESTIONS"]).strip()
-        unit = int(row["UNIT"])
-        section = str(row["SECTION"]).strip().upper()
-        k_level = str(row.get("K LEVEL", "N/A")).strip()
-        marks = sv.pattern.structure_json["sections"][section]["marks"]
-
-        q_hash = _hash(question_text) # (Uses the helper _hash function for text)
-
-        # Check QuestionMaster
-        master = QuestionMaster.query.filter_by(
-            subject_id=sv.subject_id,
-            question_hash=q_hash
-        ).first()
-
-        if not master:
-            master = QuestionMaster(
-                subject_id=sv.subject_id,
-                question_hash=q_hash,
-                question_text=question_text,
-                default_unit=unit,
-                default_section=section,
-                default_marks=marks,
-                k_level=k_level
-            )
-            db.session.add(master)
-            db.session.flush()
-
-        # Insert Item
-        item = QuestionBankItem(
-            question_bank_id=bank.id,
-            question_id=master.id,
-            unit=unit,
-            section=section,
-            marks=marks,
-            k_level=k_level
+
+# ---------------------------------------------------
+# Bulk Helpers
+# ---------------------------------------------------
+
+def _fetch_master_ids(hashes: list[str]) -> dict:
+    """
+    Returns {question_hash: master_id} using one IN (...) query per chunk.
+    Looked up by hash alone: that is the key the unique constraint enforces.
+    """
+    found = {}
+
+    for i in range(0, len(hashes), BULK_CHUNK_SIZE):
+        chunk = hashes[i:i + BULK_CHUNK_SIZE]
+        rows = (
+            db.session.query(QuestionMaster.question_hash, QuestionMaster.id)
+            .filter(QuestionMaster.question_hash.in_(chunk))
+            .all()
         )
-        db.session.add(item)
+        found.update(rows)
 
-    db.session.commit()
-    return bank
\ No newline at end of file
+    return found
+
+
+def _insert_masters(masters: list[dict]):
+    """
+    Multi-row insert of new QuestionMaster rows.
+    On MySQL a concurrent upload of the same question is absorbed by
+    INSERT ... ON DUPLICATE KEY UPDATE instead of failing the whole bank.
+    """
+    table = QuestionMaster.__table__
+
+    if db.session.get_bind().dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(question_hash=stmt.inserted.question_hash)
+    else:
+        stmt = table.insert()
+
+    for i in range(0, len(masters), BULK_CHUNK_SIZE):
+        db.session.execute(stmt, masters[i:i + BULK_CHUNK_SIZE])
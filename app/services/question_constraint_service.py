@@ -0,0 +1,260 @@
+# app/services/question_constraint_service.py
+
+import re
+from collections import defaultdict, deque
+
+
+K_LEVELS = ("K1", "K2", "K3", "K4", "K5", "K6")
+
+OTHER = None  # bucket for K-levels a section does not set a quota for
+
+_PATH_START = object()
+
+
+class KLevelInfeasibleError(Exception):
+    """
+    No selection satisfies unit x section x K-level counts together.
+    `report` holds one entry per violated constraint, each with a `message`.
+    """
+
+    def __init__(self, report: list[dict]):
+        super().__init__("; ".join(r["message"] for r in report))
+        self.report = report
+
+
+# -------------------------------------------------
+# Pattern quotas
+# -------------------------------------------------
+
+def parse_k_level_quotas(text: str) -> dict:
+    """
+    "K1:4, K2:6" -> {"K1": 4, "K2": 6}. Blank input means no quota.
+    """
+    quotas = {}
+    for part in filter(None, (p.strip() for p in (text or "").split(","))):
+        match = re.fullmatch(r"(K[1-6])\s*[:=]\s*(\d+)", part, re.IGNORECASE)
+        if not match:
+            raise ValueError(f"Invalid K-level quota '{part}' (expected e.g. K1:4)")
+
+        level, count = match.group(1).upper(), int(match.group(2))
+        if level in quotas:
+            raise ValueError(f"K-level {level} listed twice")
+        if count:
+            quotas[level] = count
+
+    return quotas
+
+
+def k_level_bucket(k_level: str | None, section_quotas: dict | None):
+    """
+    The quota bucket a question counts against within its section.
+    """
+    if section_quotas and k_level in section_quotas:
+        return k_level
+    return OTHER
+
+
+# -------------------------------------------------
+# Planner: greedy + augmenting-path repair
+# -------------------------------------------------
+
+def plan_k_level_counts(
+    *,
+    demand: dict,
+    availability: dict,
+    quotas: dict,
+    rng
+) -> dict:
+    """
+    Decide how many questions each (section, unit) slot group takes from
+    each K-level bucket.
+
+      demand        {(section, unit): questions needed}
+      availability  {(section, unit, bucket): candidate questions}
+      quotas        {section: {k_level: count}} (sections without quota are free)
+
+    Returns {(section, unit, bucket): count}. Every section is a small
+    transportation problem (units -> K-level buckets); a randomized greedy
+    pass fills it and stuck slots are repaired along augmenting paths, so
+    the plan is found whenever one exists. Otherwise KLevelInfeasibleError
+    reports the exact constraint that cannot be met.
+    """
+    units_by_section = defaultdict(list)
+    for (section, unit), need in demand.items():
+        if need:
+            units_by_section[section].append(unit)
+
+    plan = {}
+    report = []
+
+    for section, units in units_by_section.items():
+        section_quotas = quotas.get(section) or {}
+        total = sum(demand[(section, u)] for u in units)
+
+        # -------------------------------------------------
+        # 1️⃣ Bucket demand (quota levels + everything else)
+        # -------------------------------------------------
+        quota_total = sum(section_quotas.values())
+        if quota_total > total:
+            report.append({
+                "section": section,
+                "message": (
+                    f"Section {section}: K-level quotas add up to {quota_total} "
+                    f"but the paper has only {total} questions"
+                )
+            })
+            continue
+
+        bucket_demand = {**section_quotas, OTHER: total - quota_total}
+        remaining = dict(bucket_demand)
+        cap = {
+            (u, b): availability.get((section, u, b), 0)
+            for u in units for b in remaining
+        }
+
+        # -------------------------------------------------
+        # 2️⃣ Direct shortfalls (clearest messages first)
+        # -------------------------------------------------
+        direct = []
+        for b, need in bucket_demand.items():
+            have = sum(cap[(u, b)] for u in units)
+            if have < need:
+                direct.append({
+                    "section": section,
+                    "k_level": b,
+                    "required": need,
+                    "available": have,
+                    "message": (
+                        f"Section {section}: {_bucket_label(b, section_quotas)} "
+                        f"needs {need} questions, bank has {have}"
+                    )
+                })
+        if direct:
+            report.extend(direct)
+            continue
+
+        # -------------------------------------------------
+        # 3️⃣ Randomized greedy + repair
+        # -------------------------------------------------
+        x = defaultdict(int)
+        order = [u for u in units for _ in range(demand[(section, u)])]
+        rng.shuffle(order)
+
+        for unit in order:
+            open_buckets = [
+                b for b in remaining
+                if remaining[b] > 0 and cap[(unit, b)] > x[(unit, b)]
+            ]
+            if open_buckets:
+                b = rng.choice(open_buckets)
+                x[(unit, b)] += 1
+                remaining[b] -= 1
+                continue
+
+            path, reached_units, reached_buckets = _augmenting_path(
+                unit, units, remaining, cap, x
+            )
+            if path is None:
+                report.append(_cut_report(
+                    section, section_quotas, bucket_demand, demand, cap,
+                    reached_units, reached_buckets
+                ))
+                break
+
+            for u, b, sign in path:
+                x[(u, b)] += sign
+            remaining[path[0][1]] -= 1  # path starts at the bucket with spare quota
+
+        else:
+            for (u, b), n in x.items():
+                if n:
+                    plan[(section, u, b)] = n
+
+    if report:
+        raise KLevelInfeasibleError(report)
+
+    return plan
+
+
+def _augmenting_path(start_unit, units, remaining, cap, x):
+    """
+    BFS over buckets: start_unit takes bucket b; if b is full, some unit u
+    holding b moves one question to another bucket, and so on until a
+    bucket with spare quota is reached.
+    Returns (path of (unit, bucket, +1/-1), reached units, reached buckets).
+    """
+    parent = {}
+    queue = deque()
+
+    for b in remaining:
+        if cap[(start_unit, b)] > x[(start_unit, b)]:
+            parent[b] = (start_unit, _PATH_START)
+            queue.append(b)
+
+    reached_units = {start_unit}
+
+    while queue:
+        b = queue.popleft()
+
+        if remaining[b] > 0:
+            path = []
+            while True:
+                unit, prev = parent[b]
+                path.append((unit, b, +1))
+                if prev is _PATH_START:
+                    return path, reached_units, set(parent)
+                path.append((unit, prev, -1))
+                b = prev
+
+        for u in units:
+            if x[(u, b)] <= 0:
+                continue
+            reached_units.add(u)
+            for nb in remaining:
+                if nb not in parent and cap[(u, nb)] > x[(u, nb)]:
+                    parent[nb] = (u, b)
+                    queue.append(nb)
+
+    return None, reached_units, set(parent)
+
+
+def _cut_report(section, section_quotas, bucket_demand, demand, cap,
+                reached_units, reached_buckets):
+    """
+    Hall violation found by the failed repair: the reached units can only be
+    served by the (full) reached buckets plus their own saturated questions
+    at other K-levels, and together that is less than they need.
+    """
+    needed = sum(demand[(section, u)] for u in reached_units)
+    supply = sum(bucket_demand[b] for b in reached_buckets) + sum(
+        cap[(u, b)] for u in reached_units for b in bucket_demand
+        if b not in reached_buckets
+    )
+
+    units_label = (
+        f"Unit {next(iter(reached_units))} needs" if len(reached_units) == 1
+        else f"Units {', '.join(str(u) for u in sorted(reached_units))} need"
+    )
+    buckets_label = ", ".join(
+        f"{_bucket_label(b, section_quotas)} = {bucket_demand[b]}"
+        for b in sorted(reached_buckets, key=lambda b: b or "~")
+    ) or "none"
+
+    return {
+        "section": section,
+        "units": sorted(reached_units),
+        "k_levels": sorted(b or "OTHER" for b in reached_buckets),
+        "required": needed,
+        "available": supply,
+        "message": (
+            f"Section {section}: {units_label} {needed} questions "
+            f"but can be given at most {supply} under the K-level quotas "
+            f"(their K-levels: {buckets_label})"
+        )
+    }
+
+
+def _bucket_label(bucket, section_quotas) -> str:
+    if bucket is OTHER:
+        return "other K-levels" if section_quotas else "any K-level"
+    return bucket
@@ -1,21 +1,87 @@
 # app/services/question_paper_docx_service.py
 
-import pandas as pd
 from io import BytesIO
 import datetime
+import re
+import zipfile
+from collections import defaultdict
+from copy import deepcopy
+from xml.sax.saxutils import escape
 from docx import Document
 from docx.shared import Pt, Cm, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml import OxmlElement, parse_xml
+from lxml import etree
+
+from app.config import Config
+from app.services.compiled_pattern_service import get_compiled_pattern
+from app.utils.cache import LRUCache
+
+# "python-docx" fills the skeleton through the object model; "xml" writes
+# word/document.xml as text (see DIRECT XML WRITER), used for bulk export
+DOCX_ENGINES = ("python-docx", "xml")
+
+# Pre-built documents (everything except the questions), as .docx bytes
+_skeleton_cache = LRUCache(maxsize=Config.DOCX_SKELETON_CACHE_SIZE)
+# The same skeletons pre-split into XML text fragments for the direct writer
+_fragment_cache = LRUCache(maxsize=Config.DOCX_SKELETON_CACHE_SIZE)
+
+_TOKEN = re.compile(r"\{\{(\w+)\}\}")
+_QUESTION_TOKEN = re.compile(r"\{\{question:(\w+)\}\}")
 
 # =========================================================
 # HELPER FUNCTIONS
 # =========================================================
 
+def paper_snapshot(paper) -> dict:
+    """
+    Everything the renderers read from a QuestionPaper, as plain
+    (picklable) data, so rendering can run away from the ORM session.
+    """
+    subject_version = paper.subject_version
+    pattern = subject_version.pattern
+    return {
+        "id": paper.id,
+        "status": paper.status,
+        "subject": {
+            "code": subject_version.subject.code,
+            "name": subject_version.subject.name
+        },
+        "semester": subject_version.semester,
+        "total_marks": pattern.total_marks,
+        "pattern": get_compiled_pattern(pattern),
+        "items": [
+            {
+                "order_index": item.order_index,
+                "section": item.section,
+                "unit": item.unit,
+                "marks": item.marks,
+                "k_level": item.k_level,
+                "text": item.display_text
+            }
+            for item in paper.items
+        ]
+    }
+
+def _as_snapshot(paper) -> dict:
+    return paper if isinstance(paper, dict) else paper_snapshot(paper)
+
 def _safe_str(x, default=""):
     return default if x is None else str(x)
 
+def _items_by_section(snapshot: dict) -> dict:
+    """
+    One pass over the items (in paper order) into plain per-section tuples:
+    {section: [(text, marks, unit, k_level), ...]}
+    """
+    grouped = defaultdict(list)
+    for item in sorted(snapshot["items"], key=lambda x: x["order_index"]):
+        grouped[item["section"]].append(
+            (item["text"], item["marks"], item["unit"], item["k_level"] or "N/A")
+        )
+    return grouped
+
 def _section_label(sec_key: str) -> str:
     return sec_key[-1].upper() if isinstance(sec_key, str) and len(sec_key) >= 4 else "?"
 
@@ -80,13 +146,15 @@ def _setup_document(doc: Document):
     _add_page_number(section)
 
 # ✅ NEW HELPER: ADDS STATUS AND TIMESTAMP
-def _add_status_header(doc: Document, paper):
+def _add_status_header(doc: Document, snapshot: dict, downloaded_at: str | None = None):
     """
     Adds a small metadata header at the top left with Status and Download Time.
+    `downloaded_at` overrides the timestamp text (the render cache passes a
+    placeholder and patches the real time in on every download).
     """
     # 1. Prepare Data
-    status = paper.status.upper() if paper.status else "UNKNOWN"
-    current_time = datetime.datetime.now().strftime("%d-%b-%Y %I:%M %p")
+    status = snapshot["status"].upper() if snapshot["status"] else "UNKNOWN"
+    current_time = downloaded_at or format_download_time()
     
     # 2. Create Paragraph
     p = doc.add_paragraph()
@@ -121,7 +189,10 @@ def _add_status_header(doc: Document, paper):
     run_line.font.size = Pt(6)
     run_line.font.color.rgb = RGBColor(200, 200, 200) # Light Grey
 
-def _add_header(doc: Document, subject_obj, pattern_data: dict, semester: int):
+def format_download_time(moment: datetime.datetime | None = None) -> str:
+    return (moment or datetime.datetime.now()).strftime("%d-%b-%Y %I:%M %p")
+
+def _add_header(doc: Document, subject_code: str, pattern_data: dict, semester: int):
     reg_box = doc.add_paragraph()
     reg_box.alignment = WD_ALIGN_PARAGRAPH.LEFT
     reg_box.paragraph_format.space_after = Pt(0)
@@ -154,7 +225,7 @@ def _add_header(doc: Document, subject_obj, pattern_data: dict, semester: int):
     code_p = doc.add_paragraph()
     code_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
     code_p.paragraph_format.space_after = Pt(0)
-    r = code_p.add_run(_safe_str(subject_obj.code))
+    r = code_p.add_run(_safe_str(subject_code))
     r.bold = True
     r.font.size = Pt(12)
     r.font.name = "Times New Roman"
@@ -198,45 +269,47 @@ def _add_section_heading(doc: Document, sec_key: str, answer_count: int, marks:
 # =========================================================
 # 1. DRAFT GENERATOR (Regular format)
 # =========================================================
-def generate_question_paper_docx(paper):
+def generate_question_paper_docx(paper, *, downloaded_at: str | None = None, engine: str = "python-docx"):
+    """
+    `paper` is a QuestionPaper or a paper_snapshot() dict.
+    `engine` is one of DOCX_ENGINES; both produce the same document.
+    """
+    return _render("draft", _as_snapshot(paper), downloaded_at, engine)
+
+def _build_draft_document(snapshot: dict, downloaded_at: str | None = None) -> Document:
     doc = Document()
     _setup_document(doc)
     
     # ✅ INSERT STATUS HEADER
-    _add_status_header(doc, paper)
+    _add_status_header(doc, snapshot, downloaded_at)
 
-    subject = paper.subject_version.subject
-    semester = paper.subject_version.semester
-    db_pattern = paper.subject_version.pattern.structure_json
-    pattern_data = {"total_marks": paper.subject_version.pattern.total_marks}
-    
-    if "sections" in db_pattern:
-        for key, cfg in db_pattern["sections"].items():
-            pattern_data[f"Sec{key}"] = cfg.copy()
+    subject_code = snapshot["subject"]["code"]
+    semester = snapshot["semester"]
+    pattern = snapshot["pattern"]
+    pattern_data = {"total_marks": snapshot["total_marks"]}
 
-    paper_data = []
-    for item in sorted(paper.items, key=lambda x: x.order_index):
-        paper_data.append({"Question": item.display_text, "Marks": item.marks, "Section": item.section})
+    questions_by_section = _items_by_section(snapshot)
 
-    _add_header(doc, subject, pattern_data, semester)
-    df = pd.DataFrame(paper_data)
+    _add_header(doc, subject_code, pattern_data, semester)
     global_qno = 1
 
     for sec_code in ["A", "B", "C"]:
         sec_key = f"Sec{sec_code}"
-        if sec_key not in pattern_data: continue
-        sec_cfg = pattern_data[sec_key]
-        marks = int(sec_cfg.get("marks", 0))
-        answer_count = int(sec_cfg.get("count", 0))
-        note = sec_cfg.get("note", f"Answer Any {answer_count} Questions" if sec_cfg.get('total', answer_count) != answer_count else "Answer All Questions")
+        sec_cfg = pattern.section(sec_code)
+        if sec_cfg is None: continue
+        marks = sec_cfg.marks
+        answer_count = sec_cfg.count
+        note = sec_cfg.note if sec_cfg.note is not None else (
+            f"Answer Any {answer_count} Questions" if sec_cfg.total != answer_count else "Answer All Questions"
+        )
         
-        sec_qs = df[df["Section"] == sec_code]
-        if sec_qs.empty: continue
+        sec_qs = questions_by_section.get(sec_code)
+        if not sec_qs: continue
 
         _add_section_heading(doc, sec_key, answer_count, marks, note)
-        for _, row in sec_qs.iterrows():
+        for question, _, _, _ in sec_qs:
             p = doc.add_paragraph()
-            r = p.add_run(f"{global_qno}. {row.get('Question', '')}")
+            r = p.add_run(f"{global_qno}. {question}")
             r.font.size = Pt(12)
             r.font.name = "Times New Roman"
             global_qno += 1
@@ -247,19 +320,23 @@ def generate_question_paper_docx(paper):
     r = footer.add_run("******")
     r.bold = True
     r.font.size = Pt(12)
-    b = BytesIO()
-    doc.save(b)
-    b.seek(0)
-    return b
+    return doc
 
 # =========================================================
 # 2. OFFICIAL GENERATOR (Table format from your prompt)
 # =========================================================
-def generate_official_docx(paper):
+def generate_official_docx(paper, *, downloaded_at: str | None = None, engine: str = "python-docx"):
+    """
+    `paper` is a QuestionPaper or a paper_snapshot() dict.
+    `engine` is one of DOCX_ENGINES; both produce the same document.
+    """
+    return _render("official", _as_snapshot(paper), downloaded_at, engine)
+
+def _build_official_document(snapshot: dict, downloaded_at: str | None = None) -> Document:
     doc = Document()
     
     # ✅ INSERT STATUS HEADER
-    _add_status_header(doc, paper)
+    _add_status_header(doc, snapshot, downloaded_at)
 
     style = doc.styles['Normal']
     font = style.font
@@ -275,14 +352,11 @@ def generate_official_docx(paper):
     
     _add_page_number(section)
 
-    subject_obj = paper.subject_version.subject
-    semester = paper.subject_version.semester
-    db_pattern = paper.subject_version.pattern.structure_json
+    subject = snapshot["subject"]
+    semester = snapshot["semester"]
+    pattern = snapshot["pattern"]
     
-    pattern_data = {"total_marks": paper.subject_version.pattern.total_marks}
-    if "sections" in db_pattern:
-        for key, cfg in db_pattern["sections"].items():
-            pattern_data[f"Sec{key}"] = cfg.copy()
+    pattern_data = {"total_marks": snapshot["total_marks"]}
 
     header = doc.add_paragraph()
     header.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -290,8 +364,8 @@ def generate_official_docx(paper):
     current_year = datetime.datetime.now().year
     exam_session = f"APRIL {current_year}" if semester % 2 == 0 else f"NOV {current_year}"
     header.add_run(f"{exam_session}\n").bold = True
-    header.add_run(f"{subject_obj.name}\n").bold = True
-    header.add_run(f"{subject_obj.code}").bold = True
+    header.add_run(f"{subject['name']}\n").bold = True
+    header.add_run(f"{subject['code']}").bold = True
     
     marks_time = doc.add_paragraph()
     marks_time.alignment = WD_ALIGN_PARAGRAPH.RIGHT
@@ -299,17 +373,7 @@ def generate_official_docx(paper):
         f"MAX. MARKS: {pattern_data.get('total_marks', '')}\nTIME: 3 HRS."
     ).bold = True
 
-    paper_data = []
-    for item in sorted(paper.items, key=lambda x: x.order_index):
-        paper_data.append({
-            "Question": item.display_text,
-            "Marks": item.marks,
-            "Unit": item.unit,
-            "Section": item.section,
-            "K Level": item.k_level if item.k_level else "N/A" 
-        })
-
-    df = pd.DataFrame(paper_data)
+    questions_by_section = _items_by_section(snapshot)
     global_qno = 1
 
     col_widths = [Inches(0.6), Inches(4.3), Inches(0.7), Inches(1.0), Inches(0.9)]
@@ -317,10 +381,10 @@ def generate_official_docx(paper):
     
     for sec_code in ["A", "B", "C"]:
         sec_key = f"Sec{sec_code}"
-        if sec_key not in pattern_data: 
+        sec_cfg = pattern.section(sec_code)
+        if sec_cfg is None: 
             continue
             
-        sec_cfg = pattern_data[sec_key]        
         table = doc.add_table(rows=1, cols=5)
         table.style = 'Table Grid'
         table.autofit = False 
@@ -330,10 +394,10 @@ def generate_official_docx(paper):
             hdr_cells[i].width = width
 
         hdr_cells[0].text = "Q. No"
-        total_sec_marks = int(sec_cfg['count']) * int(sec_cfg['marks'])
+        total_sec_marks = sec_cfg.section_marks
         instruction = f"SECTION - {sec_code} " \
-                      f"({sec_cfg['count']} X {sec_cfg['marks']} = {total_sec_marks} MARKS)\n" \
-                      f"{sec_cfg.get('note', 'Answer as required')}"
+                      f"({sec_cfg.count} X {sec_cfg.marks} = {total_sec_marks} MARKS)\n" \
+                      f"{sec_cfg.note if sec_cfg.note is not None else 'Answer as required'}"
         hdr_cells[1].text = instruction
         hdr_cells[2].text = "Marks"
         hdr_cells[3].text = "Course Outcome"
@@ -347,21 +411,19 @@ def generate_official_docx(paper):
                 for run in paragraph.runs:
                     run.bold = True
 
-        sec_qs = df[df["Section"] == sec_code]
-
-        for _, row in sec_qs.iterrows():
+        for question, q_marks, unit, k_level in questions_by_section.get(sec_code, ()):
             row_cells = table.add_row().cells
             for i, width in enumerate(col_widths):
                 row_cells[i].width = width
             
             row_cells[0].text = str(global_qno)
             row_cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-            row_cells[1].text = str(row['Question'])
-            row_cells[2].text = str(row['Marks'])
+            row_cells[1].text = str(question)
+            row_cells[2].text = str(q_marks)
             row_cells[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-            row_cells[3].text = f"CO{row.get('Unit', 'N/A')}" 
+            row_cells[3].text = f"CO{unit}" 
             row_cells[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-            row_cells[4].text = f"{row.get('K Level', 'N/A')}"
+            row_cells[4].text = f"{k_level}"
             row_cells[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
             
             for cell in row_cells:
@@ -370,7 +432,269 @@ def generate_official_docx(paper):
             
             global_qno += 1
 
-    target_stream = BytesIO()
-    doc.save(target_stream)
-    target_stream.seek(0)
-    return target_stream
\ No newline at end of file
+    return doc
+
+# =========================================================
+# 3. SKELETONS (built once per header variant, filled per paper)
+# =========================================================
+_BUILDERS = {
+    "draft": _build_draft_document,
+    "official": _build_official_document,
+}
+
+def _render(fmt: str, snapshot: dict, downloaded_at: str | None, engine: str) -> BytesIO:
+    if engine == "xml":
+        return _write_document_xml(fmt, snapshot, downloaded_at)
+    if engine == "python-docx":
+        return _render_from_skeleton(fmt, snapshot, downloaded_at)
+    raise ValueError(f"Unknown DOCX engine '{engine}'")
+
+def _skeleton_key(fmt: str, snapshot: dict) -> tuple:
+    return (
+        fmt,
+        snapshot["status"],
+        snapshot["semester"] % 2,
+        datetime.datetime.now().year,
+        snapshot["total_marks"],
+        snapshot["pattern"].signature
+    )
+
+def _skeleton(fmt: str, snapshot: dict) -> bytes:
+    """
+    The whole document for this format and header variant except the
+    questions: one {{question:<section>}} placeholder per section marks
+    where they go, and {{subject_code}} / {{subject_name}} /
+    {{downloaded_at}} stand in for the per-paper header text.
+    Everything else (status colour, exam session, marks, section
+    instructions) depends only on the cache key, i.e. on the pattern.
+    """
+    key = _skeleton_key(fmt, snapshot)
+
+    data = _skeleton_cache.get(key)
+    if data is None:
+        template = {
+            **snapshot,
+            "subject": {"code": "{{subject_code}}", "name": "{{subject_name}}"},
+            "items": [
+                {
+                    "order_index": i,
+                    "section": sec,
+                    "unit": "",
+                    "marks": "",
+                    "k_level": "",
+                    "text": f"{{{{question:{sec}}}}}"
+                }
+                for i, sec in enumerate(snapshot["pattern"].section_keys)
+            ]
+        }
+        out = BytesIO()
+        _BUILDERS[fmt](template, "{{downloaded_at}}").save(out)
+        data = out.getvalue()
+        _skeleton_cache.put(key, data)
+
+    return data
+
+def _render_from_skeleton(fmt: str, snapshot: dict, downloaded_at: str | None) -> BytesIO:
+    doc = Document(BytesIO(_skeleton(fmt, snapshot)))
+    body = doc.element.body
+
+    # 1️⃣ Per-paper header text; collect the question placeholders
+    values = _header_values(snapshot, downloaded_at)
+    placeholders = {}
+    for t in body.iter(qn("w:t")):
+        text = t.text or ""
+        question = _QUESTION_TOKEN.search(text)
+        if question:
+            placeholders[question.group(1)] = t
+        elif "{{" in text:
+            t.text = _TOKEN.sub(lambda m: values.get(m.group(1), m.group(0)), text)
+
+    # 2️⃣ Questions: clone the placeholder paragraph / table row per question
+    questions_by_section = _items_by_section(snapshot)
+    global_qno = 1
+
+    for sec_code in ["A", "B", "C"]:
+        marker = placeholders.get(sec_code)
+        if marker is None:
+            continue  # section not in the pattern
+        sec_qs = questions_by_section.get(sec_code, ())
+
+        if fmt == "official":
+            proto = next(marker.iterancestors(qn("w:tr")))
+            for question, q_marks, unit, k_level in sec_qs:
+                row = _clone_before(proto)
+                cell_texts = (str(global_qno), str(question), str(q_marks), f"CO{unit}", f"{k_level}")
+                for tc, cell_text in zip(row.iterchildren(qn("w:tc")), cell_texts):
+                    tc.find(qn("w:p")).find(qn("w:r")).text = cell_text
+                global_qno += 1
+        else:
+            proto = next(marker.iterancestors(qn("w:p")))
+            if not sec_qs:
+                # The draft omits the heading of a section without questions
+                note = proto.getprevious()
+                body.remove(note.getprevious())
+                body.remove(note)
+            for question, _, _, _ in sec_qs:
+                _clone_before(proto).find(qn("w:r")).text = f"{global_qno}. {question}"
+                global_qno += 1
+
+        proto.getparent().remove(proto)
+
+    out = BytesIO()
+    doc.save(out)
+    out.seek(0)
+    return out
+
+def _header_values(snapshot: dict, downloaded_at: str | None) -> dict:
+    return {
+        "subject_code": _safe_str(snapshot["subject"]["code"]),
+        "subject_name": _safe_str(snapshot["subject"]["name"]),
+        "downloaded_at": downloaded_at or format_download_time()
+    }
+
+def _clone_before(element):
+    clone = deepcopy(element)
+    element.addprevious(clone)
+    return clone
+
+# =========================================================
+# 4. DIRECT XML WRITER (bulk export)
+# =========================================================
+# python-docx creates a proxy object per row, cell, paragraph and run;
+# for bulk export the question rows are instead formatted as text from
+# the skeleton's own XML and zipped next to its untouched parts.
+
+_DOCUMENT_PART = "word/document.xml"
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+def _document_fragments(fmt: str, snapshot: dict) -> dict:
+    """
+    The skeleton's document.xml cut at the question placeholders:
+
+      head        text before the first section
+      sections    [(code, heading, row, tail)] where `row` holds
+                  {{cell:N}} tokens and `tail` runs to the next section
+      members     [(name, date_time, compress_type, external_attr, data)]
+                  in package order; data is None for document.xml
+
+    Cached alongside the skeleton it is cut from and shared between
+    concurrent renders, so it holds no ZipInfo: writestr() updates the
+    ZipInfo it is given (CRC, sizes, header offset) in place.
+    """
+    key = _skeleton_key(fmt, snapshot)
+    fragments = _fragment_cache.get(key)
+    if fragments is not None:
+        return fragments
+
+    with zipfile.ZipFile(BytesIO(_skeleton(fmt, snapshot))) as package:
+        members = [
+            (
+                info.filename, info.date_time, info.compress_type, info.external_attr,
+                None if info.filename == _DOCUMENT_PART else package.read(info)
+            )
+            for info in package.infolist()
+        ]
+        root = parse_xml(package.read(_DOCUMENT_PART))
+
+    # 1️⃣ Fence every placeholder (and, in the draft, its section heading)
+    #    with comments, turning its text into cell tokens
+    for t in list(root.iter(qn("w:t"))):
+        match = _QUESTION_TOKEN.search(t.text or "")
+        if not match:
+            continue
+        code = match.group(1)
+
+        if fmt == "official":
+            proto = next(t.iterancestors(qn("w:tr")))
+            runs = [tc.find(qn("w:p")).find(qn("w:r")) for tc in proto.iterchildren(qn("w:tc"))]
+            heading_start = proto
+        else:
+            proto = next(t.iterancestors(qn("w:p")))
+            runs = [proto.find(qn("w:r"))]
+            heading_start = proto.getprevious().getprevious()
+
+        for i, r in enumerate(runs):
+            r.text = f"{{{{cell:{i}}}}}"
+        heading_start.addprevious(etree.Comment(f"qp:{code}:heading"))
+        proto.addprevious(etree.Comment(f"qp:{code}:row"))
+        proto.addnext(etree.Comment(f"qp:{code}:end"))
+
+    # 2️⃣ Serialize once (exactly as python-docx does) and cut
+    xml = etree.tostring(root, encoding="UTF-8", standalone=True).decode("utf-8")
+    # The fenced <w:t> becomes a bare token so text may expand to runs content
+    xml = re.sub(r"<w:t>(\{\{cell:\d+\}\})</w:t>", r"\1", xml)
+
+    # [head, code, heading, code, row, code, tail, code, heading, ...]
+    pieces = re.split(r"<!--qp:(\w+):(?:heading|row|end)-->", xml)
+    sections = [
+        (pieces[i], pieces[i + 1], pieces[i + 3], pieces[i + 5])
+        for i in range(1, len(pieces), 6)
+    ]
+    head = pieces[0]
+
+    fragments = {"head": head, "sections": sections, "members": members}
+    _fragment_cache.put(key, fragments)
+    return fragments
+
+def _write_document_xml(fmt: str, snapshot: dict, downloaded_at: str | None) -> BytesIO:
+    fragments = _document_fragments(fmt, snapshot)
+    values = {k: escape(v) for k, v in _header_values(snapshot, downloaded_at).items()}
+
+    def fill_header(text: str) -> str:
+        return _TOKEN.sub(lambda m: values.get(m.group(1), m.group(0)), text)
+
+    questions_by_section = _items_by_section(snapshot)
+    global_qno = 1
+    parts = [fill_header(fragments["head"])]
+
+    for code, heading, row, tail in fragments["sections"]:
+        sec_qs = questions_by_section.get(code, ())
+
+        # The draft omits the heading of a section without questions
+        if sec_qs or fmt == "official":
+            parts.append(fill_header(heading))
+
+        for question, q_marks, unit, k_level in sec_qs:
+            if fmt == "official":
+                cells = (str(global_qno), str(question), str(q_marks), f"CO{unit}", f"{k_level}")
+            else:
+                cells = (f"{global_qno}. {question}",)
+
+            filled = row
+            for i, cell_text in enumerate(cells):
+                filled = filled.replace(f"{{{{cell:{i}}}}}", _run_content_xml(cell_text), 1)
+            parts.append(filled)
+            global_qno += 1
+
+        parts.append(fill_header(tail))
+
+    document_xml = "".join(parts).encode("utf-8")
+
+    out = BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+        for name, date_time, compress_type, external_attr, data in fragments["members"]:
+            info = zipfile.ZipInfo(name, date_time)  # fresh per render, never shared
+            info.compress_type = compress_type
+            info.external_attr = external_attr
+            package.writestr(info, document_xml if data is None else data)
+    out.seek(0)
+    return out
+
+def _run_content_xml(text: str) -> str:
+    """
+    `text` as run content, the way python-docx's Run.text setter writes
+    it: tabs -> <w:tab/>, CR/LF -> <w:br/>, the rest in <w:t> elements.
+    """
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+
+    parts = []
+    for chunk in re.split(r"(\t|\r|\n)", text):
+        if chunk == "\t":
+            parts.append("<w:tab/>")
+        elif chunk in ("\r", "\n"):
+            parts.append("<w:br/>")
+        elif chunk:
+            preserve = ' xml:space="preserve"' if len(chunk.strip()) < len(chunk) else ""
+            parts.append(f"<w:t{preserve}>{escape(chunk)}</w:t>")
+    return "".join(parts)
@@ -0,0 +1,129 @@
+# app/services/question_paper_export_service.py
+
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.extensions import db
+from app.models.question_paper import QuestionPaper
+from app.services.question_paper_render_cache_service import render_paper_docx, render_paper_pdf
+
+
+# name -> (document format, file suffix, extension)
+EXPORT_FORMATS = {
+    "student": ("draft", "Student_Copy", "docx"),
+    "official": ("official", "Official_Copy", "docx"),
+    "pdf": ("official", "Official_Copy", "pdf"),
+}
+
+
+class PaperExportError(Exception):
+    pass
+
+
+# -------------------------------------------------
+# Public API
+# -------------------------------------------------
+
+def stream_papers_zip(app, papers: list[tuple], formats: list[str]):
+    """
+    Iterator of ZIP bytes for `papers` = [(paper_id, paper_code, subject_code)].
+    Papers are rendered in parallel (EXPORT_RENDER_WORKERS threads, at most
+    2x that many renders in flight) and each member is flushed to the client
+    as soon as it is written, so the archive is never held in memory.
+    A paper that fails to render becomes an _errors/*.txt member instead of
+    aborting the download half way.
+    """
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown or not formats:
+        raise PaperExportError(f"Unknown export format(s): {', '.join(unknown) or 'none'}")
+
+    jobs = [
+        (paper_id, fmt, _member_name(subject_code, paper_code, paper_id, fmt))
+        for paper_id, paper_code, subject_code in papers
+        for fmt in formats
+    ]
+    return _zip_chunks(app, jobs)
+
+
+# -------------------------------------------------
+# Internals
+# -------------------------------------------------
+
+def _zip_chunks(app, jobs: list[tuple]):
+    sink = _ChunkSink()
+    workers = app.config["EXPORT_RENDER_WORKERS"]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qp-export") as pool, \
+            zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        # DOCX members are already deflated; storing them avoids a second pass
+        pending = deque()
+        jobs_iter = iter(jobs)
+
+        def submit_next():
+            job = next(jobs_iter, None)
+            if job is not None:
+                pending.append((job, pool.submit(_render_one, app, job[0], job[1])))
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        while pending:
+            (paper_id, fmt, name), future = pending.popleft()
+            submit_next()
+
+            try:
+                archive.writestr(name, future.result())
+            except Exception as e:
+                archive.writestr(f"_errors/{name}.txt", f"Paper #{paper_id} ({fmt}) failed: {e}")
+
+            yield sink.drain()
+
+    yield sink.drain()  # central directory
+
+
+def _render_one(app, paper_id: int, fmt: str) -> bytes:
+    # Own app context => own scoped session; removed on context teardown
+    with app.app_context():
+        paper = db.session.get(QuestionPaper, paper_id)
+        if paper is None:
+            raise PaperExportError("paper no longer exists")
+        doc_fmt, _, ext = EXPORT_FORMATS[fmt]
+        if ext == "pdf":
+            # Concurrent export renders land in the same converter batch
+            return render_paper_pdf(paper, doc_fmt).getvalue()
+        # Direct XML writer: same document, a fraction of python-docx's cost
+        return render_paper_docx(paper, doc_fmt, engine="xml").getvalue()
+
+
+def _member_name(subject_code: str, paper_code: str, paper_id: int, fmt: str) -> str:
+    folder = _safe_name(subject_code or "UNKNOWN")
+    _, suffix, ext = EXPORT_FORMATS[fmt]
+    return f"{folder}/{_safe_name(paper_code)}_{paper_id}_{suffix}.{ext}"
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(value)).strip("_") or "_"
+
+
+class _ChunkSink:
+    """
+    Write-only, non-seekable file object for ZipFile: zipfile then streams
+    members with data descriptors, and we hand out what was written so far.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,154 @@
+# app/services/question_paper_job_service.py
+
+from app.models.background_job import BackgroundJob
+from app.services.job_queue_service import JobError, job_queue, update_job_progress
+from app.services.question_constraint_service import KLevelInfeasibleError
+from app.services.question_bank_excel_validation_service import validate_and_parse_question_bank
+from app.services.question_bank_ingestion_service import (
+    QuestionBankIngestionError,
+    ingest_question_bank_excel
+)
+from app.services.question_paper_service import (
+    PaperSetInfeasibleError,
+    generate_question_paper_set,
+    generate_question_paper_skeleton
+)
+from app.services.question_paper_selection_service import auto_select_questions_for_paper
+
+
+GENERATE_PAPER_JOB = "GENERATE_PAPER"
+
+
+def enqueue_paper_generation(
+    *,
+    subject_version_id: int,
+    created_by: int,
+    paper_code: str,
+    paper_type: str,
+    question_bank_id: int | None = None,
+    file_bytes: bytes | None = None,
+    set_count: int = 1,
+    max_overlap: int = 0
+) -> BackgroundJob:
+    """
+    Queue the validate -> ingest -> skeleton -> auto-select pipeline.
+    Either `question_bank_id` (default bank) or `file_bytes` (upload) is required.
+    With `set_count` > 1, sets <code>-A, <code>-B, ... are generated together.
+    """
+    return job_queue.submit(
+        GENERATE_PAPER_JOB,
+        created_by=created_by,
+        payload={
+            "subject_version_id": subject_version_id,
+            "paper_code": paper_code,
+            "paper_type": paper_type,
+            "question_bank_id": question_bank_id,
+            "set_count": set_count,
+            "max_overlap": max_overlap
+        },
+        input_file=file_bytes
+    )
+
+
+@job_queue.handler(GENERATE_PAPER_JOB)
+def run_paper_generation(job: BackgroundJob):
+    payload = job.payload
+    result = job.result or {}
+    subject_version_id = payload["subject_version_id"]
+
+    bank_id = payload.get("question_bank_id") or result.get("bank_id")
+
+    # -------------------------------------------------
+    # 1️⃣ Validation + 2️⃣ Ingestion (upload mode only)
+    # -------------------------------------------------
+    if not bank_id:
+        file_bytes = job.input_file
+        if not file_bytes:
+            raise JobError("Question Bank Excel not uploaded")
+
+        update_job_progress(job, "VALIDATION", 10)
+        validation, parsed = validate_and_parse_question_bank(
+            file_bytes=file_bytes,
+            subject_version_id=subject_version_id
+        )
+        if not validation["valid"]:
+            raise JobError("Excel validation failed", validation["errors"])
+
+        update_job_progress(job, "INGESTION", 35)
+        try:
+            bank = ingest_question_bank_excel(
+                file_bytes=file_bytes,
+                subject_version_id=subject_version_id,
+                uploaded_by=job.created_by,
+                parsed=parsed
+            )
+        except QuestionBankIngestionError as e:
+            raise JobError(f"Ingestion failed: {str(e)}")
+        bank_id = bank.id
+        update_job_progress(job, "INGESTION", 60, bank_id=bank_id)
+
+    # -------------------------------------------------
+    # 3️⃣ Multi-set: one transaction, one pool, no overlap
+    # -------------------------------------------------
+    set_count = payload.get("set_count", 1)
+    if set_count > 1:
+        if result.get("paper_ids"):
+            return  # sets were committed before a restart
+
+        update_job_progress(job, "SELECTION", 70, bank_id=bank_id)
+        try:
+            # Not committed here: the ids are committed with the papers below
+            papers = generate_question_paper_set(
+                subject_version_id=subject_version_id,
+                created_by=job.created_by,
+                paper_codes=[f"{payload['paper_code']}-{chr(ord('A') + i)}" for i in range(set_count)],
+                paper_type=payload["paper_type"],
+                question_bank_id=bank_id,
+                max_overlap=payload.get("max_overlap", 0),
+                commit=False
+            )
+        except PaperSetInfeasibleError as e:
+            raise JobError(str(e), [
+                {
+                    "type": "INSUFFICIENT_QUESTIONS",
+                    "message": f"Unit {s['unit']} ({s['marks']} marks): "
+                               f"needs {s['required']}, bank has {s['available']}"
+                }
+                for s in e.shortfalls
+            ])
+        except KLevelInfeasibleError as e:
+            raise JobError(str(e), _k_level_errors(e))
+        update_job_progress(job, "SELECTION", 95, paper_ids=[p.id for p in papers])
+        return
+
+    # -------------------------------------------------
+    # 4️⃣ Skeleton (skipped when resuming after a restart)
+    # -------------------------------------------------
+    paper_id = result.get("paper_id")
+    if not paper_id:
+        update_job_progress(job, "SKELETON", 70)
+        # Committed together with paper_id, so a restart never creates it twice
+        paper = generate_question_paper_skeleton(
+            subject_version_id=subject_version_id,
+            created_by=job.created_by,
+            paper_code=payload["paper_code"],
+            paper_type=payload["paper_type"],
+            question_bank_id=bank_id,
+            commit=False
+        )
+        paper_id = paper.id
+        update_job_progress(job, "SELECTION", 80, bank_id=bank_id, paper_id=paper_id)
+
+    # -------------------------------------------------
+    # 5️⃣ Auto-Select (idempotent: filled slots are skipped)
+    # -------------------------------------------------
+    try:
+        auto_select_questions_for_paper(paper_id)
+    except KLevelInfeasibleError as e:
+        raise JobError(str(e), _k_level_errors(e))
+    except Exception as e:
+        raise JobError(f"Auto-selection failed: {str(e)}")
+
+
+def _k_level_errors(e: KLevelInfeasibleError) -> list[dict]:
+    return [{"type": "K_LEVEL_INFEASIBLE", "message": r["message"]} for r in e.report]
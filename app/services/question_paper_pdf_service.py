@@ -0,0 +1,202 @@
+# app/services/question_paper_pdf_service.py
+
+import json
+import logging
+import os
+import pathlib
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class PdfConversionError(Exception):
+    pass
+
+
+class PdfConverter:
+    """
+    DOCX -> PDF through headless LibreOffice.
+
+    Conversions wait in one bounded queue (PDF_QUEUE_SIZE). Each of the
+    PDF_CONVERTER_WORKERS threads takes up to PDF_BATCH_SIZE waiting
+    documents (lingering PDF_BATCH_WAIT_MS for more to arrive) and converts
+    them with a single soffice run, so the converter start-up is paid once
+    per batch instead of once per paper. Every worker has its own
+    LibreOffice profile; concurrent soffice runs sharing one would block
+    each other.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._queue = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------
+    # Setup
+    # -------------------------------------------------
+    def init_app(self, app):
+        self._app = app
+        self._queue = queue.Queue(maxsize=app.config["PDF_QUEUE_SIZE"])
+        app.extensions["pdf_converter"] = self
+
+    def _ensure_workers(self):
+        # Started on first use, so CLI commands never spawn converter threads
+        with self._lock:
+            if self._started:
+                return
+            for index in range(self._app.config["PDF_CONVERTER_WORKERS"]):
+                threading.Thread(
+                    target=self._work,
+                    args=(index,),
+                    name=f"qp-pdf-{index}",
+                    daemon=True
+                ).start()
+            self._started = True
+
+    # -------------------------------------------------
+    # Producer side
+    # -------------------------------------------------
+    def convert(self, docx: bytes) -> bytes:
+        """
+        PDF bytes for `docx`; blocks until its batch has been converted, for
+        at most PDF_QUEUE_WAIT_SECONDS + PDF_CONVERT_TIMEOUT_SECONDS.
+        """
+        self._ensure_workers()
+        config = self._app.config
+
+        future = Future()
+        try:
+            self._queue.put((docx, future), timeout=config["PDF_QUEUE_WAIT_SECONDS"])
+        except queue.Full:
+            raise PdfConversionError("The PDF converter is busy. Please try again shortly.")
+
+        try:
+            return future.result(
+                timeout=config["PDF_QUEUE_WAIT_SECONDS"] + config["PDF_CONVERT_TIMEOUT_SECONDS"]
+            )
+        except FutureTimeoutError:
+            future.cancel()  # still queued: the worker skips it
+            raise PdfConversionError("The PDF converter is busy. Please try again shortly.")
+
+    # -------------------------------------------------
+    # Worker side
+    # -------------------------------------------------
+    def _work(self, index: int):
+        profile_dir = tempfile.mkdtemp(prefix=f"qp-pdf-profile-{index}-")
+
+        while True:
+            # Callers that gave up waiting cancelled their futures
+            batch = [(docx, future) for docx, future in self._next_batch()
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._convert_batch(batch, profile_dir)
+                continue
+            except PdfConversionError as e:
+                logger.warning("PDF conversion batch failed: %s", e)
+                error = e
+            except Exception as e:
+                logger.exception("PDF conversion batch failed")
+                error = PdfConversionError(f"PDF conversion failed: {e}")
+
+            # Never leave a caller waiting
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _next_batch(self) -> list[tuple]:
+        batch = [self._queue.get()]
+        batch_size = self._app.config["PDF_BATCH_SIZE"]
+        deadline = time.monotonic() + self._app.config["PDF_BATCH_WAIT_MS"] / 1000
+
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _convert_batch(self, batch: list[tuple], profile_dir: str):
+        config = self._app.config
+
+        with tempfile.TemporaryDirectory(prefix="qp-pdf-") as work_dir:
+            # 1️⃣ One input file per waiting request
+            inputs = []
+            for i, (docx, future) in enumerate(batch):
+                path = os.path.join(work_dir, f"paper-{i}.docx")
+                with open(path, "wb") as f:
+                    f.write(docx)
+                inputs.append((path, future))
+
+            # 2️⃣ One converter run for the whole batch
+            out_dir = os.path.join(work_dir, "out")
+            command = [
+                config["PDF_CONVERTER_BINARY"],
+                "--headless", "--norestore", "--nologo", "--nodefault", "--nolockcheck",
+                f"-env:UserInstallation={pathlib.Path(profile_dir).as_uri()}",
+                "--convert-to", _pdf_filter(config.get("PDF_PERMISSION_PASSWORD")),
+                "--outdir", out_dir,
+                *(path for path, _ in inputs)
+            ]
+            try:
+                completed = subprocess.run(
+                    command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    timeout=config["PDF_CONVERT_TIMEOUT_SECONDS"]
+                )
+            except FileNotFoundError:
+                raise PdfConversionError(
+                    f"LibreOffice not found at '{config['PDF_CONVERTER_BINARY']}' "
+                    f"(set PDF_CONVERTER_BINARY)"
+                )
+            except subprocess.TimeoutExpired:
+                raise PdfConversionError(
+                    f"PDF conversion of {len(inputs)} document(s) took longer than "
+                    f"{config['PDF_CONVERT_TIMEOUT_SECONDS']}s"
+                )
+
+            # 3️⃣ Hand each caller its own PDF
+            for path, future in inputs:
+                pdf_path = os.path.join(out_dir, os.path.basename(path)[:-len(".docx")] + ".pdf")
+                try:
+                    with open(pdf_path, "rb") as f:
+                        future.set_result(f.read())
+                except FileNotFoundError:
+                    stderr = completed.stderr.decode("utf-8", "replace").strip()
+                    future.set_exception(PdfConversionError(
+                        f"LibreOffice produced no PDF (exit {completed.returncode}): "
+                        f"{stderr[-300:] or 'no output'}"
+                    ))
+
+
+def _pdf_filter(permission_password: str | None) -> str:
+    """
+    soffice --convert-to target; with a permission password the PDF opens
+    freely but cannot be edited or copied from without it.
+    """
+    if not permission_password:
+        return "pdf:writer_pdf_Export"
+
+    options = {
+        "RestrictPermissions": {"type": "boolean", "value": "true"},
+        "PermissionPassword": {"type": "string", "value": permission_password},
+        "Changes": {"type": "long", "value": "0"},
+        "EnableCopyingOfContent": {"type": "boolean", "value": "false"},
+    }
+    return "pdf:writer_pdf_Export:" + json.dumps(options, separators=(",", ":"))
+
+
+pdf_converter = PdfConverter()
@@ -0,0 +1,208 @@
+# app/services/question_paper_render_cache_service.py
+
+import datetime
+import glob
+import os
+import tempfile
+import zipfile
+import zlib
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from flask import current_app
+
+from app.services.question_paper_docx_service import (
+    DOCX_ENGINES,
+    format_download_time,
+    paper_snapshot
+)
+from app.services.question_paper_pdf_service import pdf_converter
+from app.services.question_paper_render_pool_service import render_pool
+
+
+DOCX_FORMATS = ("draft", "official")
+
+# Rendered in place of the DOWNLOADED: time, patched per download
+DOWNLOADED_AT_PLACEHOLDER = "@@DOWNLOADED_AT@@"
+
+_DOCUMENT_PART = "word/document.xml"
+
+
+class RenderCacheError(Exception):
+    pass
+
+
+# -------------------------------------------------
+# Public API
+# -------------------------------------------------
+
+def render_paper_docx(paper, fmt: str, *, engine: str = "python-docx") -> BytesIO:
+    """
+    DOCX for `paper` in `fmt` ("draft" | "official"), served from the disk
+    cache when the paper's content revision has been rendered before.
+    Only the DOWNLOADED: timestamp differs between downloads; it is
+    patched into the cached bytes instead of re-rendering.
+    Cache misses are rendered by the process pool from a plain snapshot,
+    with `engine` (both engines produce the same document, so they share
+    cache entries).
+    """
+    if fmt not in DOCX_FORMATS:
+        raise RenderCacheError(f"Unknown document format '{fmt}'")
+    if engine not in DOCX_ENGINES:
+        raise RenderCacheError(f"Unknown DOCX engine '{engine}'")
+
+    path = _cache_path(paper, fmt)
+    data = _read(path)
+
+    if data is None:
+        data = render_pool.render(
+            paper_snapshot(paper), fmt, downloaded_at=DOWNLOADED_AT_PLACEHOLDER, engine=engine
+        )
+        _check_package(data, paper.id, fmt)  # a bad render must not be served until the paper changes
+        _store(path, data, paper.id, fmt)
+
+    return BytesIO(patch_download_time(data, format_download_time()))
+
+
+def render_paper_pdf(paper, fmt: str = "official") -> BytesIO:
+    """
+    PDF of `paper` in `fmt`, converted by LibreOffice and cached per
+    content revision like the DOCX renders. A PDF cannot be patched, so
+    its DOWNLOADED: time is when this revision was first converted.
+    """
+    if fmt not in DOCX_FORMATS:
+        raise RenderCacheError(f"Unknown document format '{fmt}'")
+
+    path = _cache_path(paper, fmt, "pdf")
+    data = _read(path)
+
+    if data is None:
+        docx = render_pool.render(
+            paper_snapshot(paper), fmt, downloaded_at=format_download_time(), engine="xml"
+        )
+        _check_package(docx, paper.id, fmt)
+        data = pdf_converter.convert(docx)
+        _store(path, data, paper.id, fmt, "pdf")
+
+    return BytesIO(data)
+
+
+def patch_download_time(data: bytes, downloaded_at: str) -> bytes:
+    """
+    Swap the placeholder timestamp for `downloaded_at`; only the main
+    document part is touched, every other zip member is copied as is.
+    """
+    token = DOWNLOADED_AT_PLACEHOLDER.encode()
+    out = BytesIO()
+
+    with zipfile.ZipFile(BytesIO(data)) as src, \
+            zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            payload = src.read(info)
+            if info.filename == _DOCUMENT_PART:
+                payload = payload.replace(token, escape(downloaded_at).encode())
+            dst.writestr(info, payload)
+
+    return out.getvalue()
+
+
+def purge_paper_renders(paper_id: int):
+    """
+    Drop every cached render of a paper (e.g. when the paper is deleted).
+    """
+    for path in glob.glob(os.path.join(_cache_dir(), f"paper-{paper_id}-*")):
+        _remove(path)
+
+
+# -------------------------------------------------
+# Disk storage
+# -------------------------------------------------
+
+def _check_package(data: bytes, paper_id: int, fmt: str):
+    """
+    Raise RenderCacheError unless `data` is a readable zip whose members
+    all pass their CRC check.
+    """
+    try:
+        with zipfile.ZipFile(BytesIO(data)) as package:
+            bad_member = package.testzip()
+    except (zipfile.BadZipFile, zlib.error) as e:
+        raise RenderCacheError(f"Rendering paper #{paper_id} ({fmt}) produced an unreadable DOCX: {e}")
+
+    if bad_member is not None:
+        raise RenderCacheError(
+            f"Rendering paper #{paper_id} ({fmt}) produced a corrupt DOCX (bad CRC in {bad_member})"
+        )
+
+
+def _cache_dir() -> str:
+    directory = current_app.config.get("RENDER_CACHE_DIR") or os.path.join(
+        current_app.instance_path, "render_cache"
+    )
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _cache_path(paper, fmt: str, ext: str = "docx") -> str:
+    # The exam session line prints the current year, so it is part of the key
+    year = datetime.datetime.now().year
+    return os.path.join(
+        _cache_dir(),
+        f"paper-{paper.id}-{fmt}-r{paper.content_revision}-y{year}.{ext}"
+    )
+
+
+def _read(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    os.utime(path)  # mtime doubles as last-used time for eviction
+    return data
+
+
+def _store(path: str, data: bytes, paper_id: int, fmt: str, ext: str = "docx"):
+    directory = os.path.dirname(path)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)  # atomic: readers never see a partial file
+
+    # Older revisions of this paper/format can never be served again
+    for stale in glob.glob(os.path.join(directory, f"paper-{paper_id}-{fmt}-r*.{ext}")):
+        if stale != path:
+            _remove(stale)
+
+    _evict(directory)
+
+
+def _evict(directory: str):
+    """
+    Delete least-recently-used renders until the cache fits its size budget.
+    """
+    budget = current_app.config["RENDER_CACHE_MAX_MB"] * 1024 * 1024
+
+    entries = []
+    for path in glob.glob(os.path.join(directory, "paper-*")):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        _remove(path)
+        total -= size
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
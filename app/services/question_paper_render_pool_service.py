@@ -0,0 +1,136 @@
+# app/services/question_paper_render_pool_service.py
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class RenderError(Exception):
+    pass
+
+
+class RenderPool:
+    """
+    Renders DOCX files from paper_snapshot() dicts in worker processes, so
+    concurrent downloads use several cores instead of queueing on the GIL.
+
+    RENDER_POOL_WORKERS = 0 renders inline. The pool is started on first
+    use (CLI commands never spawn it); if it cannot start or breaks, jobs
+    fall back to inline rendering and the pool is rebuilt on the next call.
+    A render that exceeds RENDER_TIMEOUT_SECONDS recycles the pool: its
+    workers are terminated (a hung render would otherwise hold its slot for
+    good) and other renders still running on them fall back to inline.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------
+    # Setup
+    # -------------------------------------------------
+    def init_app(self, app):
+        self._app = app
+        app.extensions["render_pool"] = self
+
+    @property
+    def workers(self) -> int:
+        return self._app.config["RENDER_POOL_WORKERS"] if self._app else 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(
+                        self._app.config["RENDER_POOL_START_METHOD"]
+                    )
+                )
+            return self._executor
+
+    def _discard_executor(self, executor, *, terminate: bool = False):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # shutdown() forgets the processes, so collect them first
+        processes = list((getattr(executor, "_processes", None) or {}).values()) if terminate else []
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    # -------------------------------------------------
+    # Rendering
+    # -------------------------------------------------
+    def render(
+        self,
+        snapshot: dict,
+        fmt: str,
+        *,
+        downloaded_at: str | None = None,
+        engine: str = "python-docx"
+    ) -> bytes:
+        if self.workers <= 0:
+            return render_snapshot(snapshot, fmt, downloaded_at, engine)
+
+        timeout = self._app.config["RENDER_TIMEOUT_SECONDS"]
+
+        try:
+            executor = self._get_executor()
+            future = executor.submit(render_snapshot, snapshot, fmt, downloaded_at, engine)
+        except (OSError, RuntimeError, ValueError, BrokenProcessPool):
+            logger.exception("Render pool unavailable; rendering paper %s inline", snapshot.get("id"))
+            return render_snapshot(snapshot, fmt, downloaded_at, engine)
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # A running future cannot be cancelled: retire the pool and its workers
+            logger.error("Render of paper %s timed out; recycling the render pool", snapshot.get("id"))
+            self._discard_executor(executor, terminate=True)
+            raise RenderError(
+                f"Rendering paper #{snapshot.get('id')} took longer than {timeout}s"
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed): rebuild the pool next time
+            logger.exception("Render pool broke; rendering paper %s inline", snapshot.get("id"))
+            self._discard_executor(executor)
+            return render_snapshot(snapshot, fmt, downloaded_at, engine)
+
+
+def render_snapshot(
+    snapshot: dict,
+    fmt: str,
+    downloaded_at: str | None = None,
+    engine: str = "python-docx"
+) -> bytes:
+    """
+    Worker entry point (module-level so it pickles): snapshot -> DOCX bytes.
+    """
+    from app.services.question_paper_docx_service import (
+        generate_official_docx,
+        generate_question_paper_docx
+    )
+
+    renderers = {
+        "draft": generate_question_paper_docx,
+        "official": generate_official_docx,
+    }
+    if fmt not in renderers:
+        raise RenderError(f"Unknown document format '{fmt}'")
+
+    return renderers[fmt](snapshot, downloaded_at=downloaded_at, engine=engine).getvalue()
+
+
+render_pool = RenderPool()
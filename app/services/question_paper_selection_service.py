@@ -1,11 +1,19 @@
 # app/services/question_paper_selection_service.py
 
-from random import sample
-from collections import defaultdict
+import random
+import secrets
+from collections import Counter, defaultdict
 
 from app.extensions import db
 from app.models.question_paper import QuestionPaper
-from app.models.question_bank import QuestionBankItem
+from app.models.question_bank import QuestionBank, QuestionBankItem
+from app.models.question_master import QuestionMaster
+from app.services.bank_availability_service import get_bank_availability
+from app.services.compiled_pattern_service import get_compiled_pattern
+from app.services.question_constraint_service import (
+    k_level_bucket,
+    plan_k_level_counts
+)
 
 
 class QuestionSelectionError(Exception):
@@ -19,7 +27,12 @@ def auto_select_questions_for_paper(paper_id: int) -> QuestionPaper:
       - unit (from weightage)
       - marks (from pattern)
       - section (derived from marks)
+      - K-level quotas per section (from pattern structure_json)
       - total required placeholders
+
+    Costs a constant number of queries: the candidate pool is loaded once
+    and grouped in memory, then texts are fetched for the chosen items only.
+    The seed is stored on the paper so the selection can be rebuilt exactly.
     """
 
     paper = QuestionPaper.query.get_or_404(paper_id)
@@ -34,51 +47,236 @@ def auto_select_questions_for_paper(paper_id: int) -> QuestionPaper:
             "No Question Bank linked to this paper"
         )
 
+    if paper.selection_seed is None:
+        bank = db.session.get(QuestionBank, paper.source_question_bank_id)
+        paper.selection_seed = new_selection_seed()
+        paper.selection_bank_revision = bank.items_revision
+        paper.selection_pattern_version = paper.subject_version.pattern.version
+
+    _fill_placeholders(paper, random.Random(paper.selection_seed))
+
+    db.session.commit()
+    return paper
+
+
+def regenerate_paper_from_seed(paper_id: int, *, user_id: int) -> QuestionPaper:
+    """
+    Rebuild the paper's original item list from its stored seed; swaps and
+    manual edits are discarded. Seed + source bank + pattern replay the same
+    pool, quotas and draws only while the bank's items and the pattern are
+    as they were when the seed was drawn, so a change to either refuses.
+    """
+
+    paper = QuestionPaper.query.get_or_404(paper_id)
+
+    if paper.status not in ("GENERATED", "UNDER_SCRUTINY"):
+        raise QuestionSelectionError(
+            f"{paper.status} papers cannot be regenerated"
+        )
+
+    if paper.selection_seed is None:
+        raise QuestionSelectionError(
+            "This paper has no stored selection seed to regenerate from"
+        )
+
+    if not paper.source_question_bank_id:
+        raise QuestionSelectionError(
+            "No Question Bank linked to this paper"
+        )
+
+    bank = db.session.get(QuestionBank, paper.source_question_bank_id)
+    if bank.items_revision != paper.selection_bank_revision:
+        raise QuestionSelectionError(
+            "The Question Bank has changed since this paper was generated; "
+            "its seed would no longer reproduce it"
+        )
+
+    if paper.subject_version.pattern.version != paper.selection_pattern_version:
+        raise QuestionSelectionError(
+            "The Pattern has changed since this paper was generated; "
+            "its seed would no longer reproduce it"
+        )
+
+    for item in paper.items:
+        item.source_question_id = None
+        item.original_text = "[TO BE SELECTED]"
+        item.manual_text_override = None
+        item.k_level = None
+        item.is_duplicate_flag = False
+
+    _fill_placeholders(paper, random.Random(paper.selection_seed))
+
+    paper.last_modified_by = user_id
+    db.session.commit()
+    return paper
+
+
+def new_selection_seed() -> int:
+    # 63 bits: fits a signed BIGINT column
+    return secrets.randbits(63)
+
+
+def _fill_placeholders(paper: QuestionPaper, rng: random.Random):
+    """
+    Fill every empty placeholder of `paper` using `rng` (no commit).
+    """
+
     # -------------------------------------------------
     # 1️⃣ Group placeholders by (unit, marks)
     # -------------------------------------------------
+    quotas = get_compiled_pattern(paper.subject_version.pattern).k_level_quotas()
     required_map = defaultdict(list)
+    already_filled = Counter()
 
     for item in paper.items:
         if item.source_question_id:
-            continue  # idempotent safe
+            # idempotent safe; filled slots still count against quotas
+            already_filled[(item.section, item.k_level)] += 1
+            continue
 
         key = (item.unit, item.marks)
         required_map[key].append(item)
 
+    if not required_map:
+        return
+
     # -------------------------------------------------
-    # 2️⃣ Randomly select from QuestionBankItem
+    # 2️⃣ Feasibility from the bank's histogram (no items read)
     # -------------------------------------------------
-    for (unit, marks), items in required_map.items():
-        required_count = len(items)
-
-        candidates = (
-            QuestionBankItem.query
-            .filter_by(
-                question_bank_id=paper.source_question_bank_id,
-                unit=unit,
-                marks=marks
-            )
-            .all()
+    bank = db.session.get(QuestionBank, paper.source_question_bank_id)
+    availability = get_bank_availability(bank)
+
+    shortfalls = availability.shortfalls(
+        {key: len(items) for key, items in required_map.items()}
+    )
+    if shortfalls:
+        s = shortfalls[0]
+        raise QuestionSelectionError(
+            f"Not enough questions for "
+            f"Unit {s['unit']}, Marks {s['marks']} "
+            f"(required {s['required']}, found {s['available']})"
         )
 
-        if len(candidates) < required_count:
-            raise QuestionSelectionError(
-                f"Not enough questions for "
-                f"Unit {unit}, Marks {marks} "
-                f"(required {required_count}, found {len(candidates)})"
-            )
+    remaining_quotas = {
+        sec: {k: max(0, n - already_filled[(sec, k)]) for k, n in levels.items()}
+        for sec, levels in quotas.items()
+    }
+    if quotas:
+        # Own rng: the seeded one must draw exactly what the selection draws
+        plan_k_level_counts(
+            demand={
+                (items[0].section, unit): len(items)
+                for (unit, marks), items in required_map.items()
+            },
+            availability=availability.k_level_availability(
+                {(items[0].section, key[0]): key for key, items in required_map.items()},
+                remaining_quotas
+            ),
+            quotas=remaining_quotas,
+            rng=random.Random()
+        )
 
-        selected = sample(candidates, required_count)
+    # -------------------------------------------------
+    # 3️⃣ Load candidate pool ONCE, plan unit x section x K-level counts, sample
+    # -------------------------------------------------
+    pool = load_candidate_pool(paper.source_question_bank_id, required_map.keys())
+    selections = choose_with_k_levels(required_map, pool, remaining_quotas, rng)
 
-        # -------------------------------------------------
-        # 3️⃣ Assign questions to placeholders
-        # -------------------------------------------------
-        for paper_item, bank_item in zip(items, selected):
-            paper_item.source_question_id = bank_item.id
-            paper_item.original_text = bank_item.question.question_text
-            paper_item.k_level = bank_item.k_level
-            paper_item.source_type = "QBANK"
+    # -------------------------------------------------
+    # 4️⃣ Assign questions to placeholders
+    # -------------------------------------------------
+    texts = load_question_texts(c.question_id for _, c in selections)
 
-    db.session.commit()
-    return paper
+    for paper_item, candidate in selections:
+        paper_item.source_question_id = candidate.id
+        paper_item.original_text = texts[candidate.question_id]
+        paper_item.k_level = candidate.k_level
+        paper_item.source_type = "QBANK"
+
+
+# -------------------------------------------------
+# Pool Helpers
+# -------------------------------------------------
+
+def choose_with_k_levels(required_map: dict, pool: dict, quotas: dict, rng) -> list:
+    """
+    required_map {(unit, marks): [placeholder items]} -> [(item, candidate)]
+    honouring section K-level quotas (raises KLevelInfeasibleError).
+    A section has one marks value, so (section, unit) identifies each group.
+    """
+    group_of = {
+        (items[0].section, unit): (unit, marks)
+        for (unit, marks), items in required_map.items()
+    }
+
+    buckets = defaultdict(list)
+    for (section, unit), key in group_of.items():
+        for row in pool.get(key, []):
+            buckets[(section, unit, k_level_bucket(row.k_level, quotas.get(section)))].append(row)
+
+    plan = plan_k_level_counts(
+        demand={group: len(required_map[key]) for group, key in group_of.items()},
+        availability={cell: len(rows) for cell, rows in buckets.items()},
+        quotas=quotas,
+        rng=rng
+    )
+
+    chosen = defaultdict(list)
+    for (section, unit, bucket), count in plan.items():
+        chosen[group_of[(section, unit)]].extend(rng.sample(buckets[(section, unit, bucket)], count))
+
+    selections = []
+    for key, items in required_map.items():
+        rng.shuffle(chosen[key])
+        selections.extend(zip(items, chosen[key]))
+    return selections
+
+
+def load_candidate_pool(bank_id: int, keys=None) -> dict:
+    """
+    One query: lightweight (id, question_id, unit, section, marks, k_level)
+    rows for a bank, grouped by (unit, marks). `keys` narrows the pool to
+    the (unit, marks) groups actually needed.
+    """
+    query = (
+        db.session.query(
+            QuestionBankItem.id,
+            QuestionBankItem.question_id,
+            QuestionBankItem.unit,
+            QuestionBankItem.section,
+            QuestionBankItem.marks,
+            QuestionBankItem.k_level
+        )
+        .filter(QuestionBankItem.question_bank_id == bank_id)
+    )
+
+    if keys is not None:
+        keys = set(keys)
+        query = query.filter(
+            QuestionBankItem.unit.in_({u for u, _ in keys}),
+            QuestionBankItem.marks.in_({m for _, m in keys})
+        )
+
+    pool = defaultdict(list)
+    for row in query.order_by(QuestionBankItem.id).all():
+        key = (row.unit, row.marks)
+        if keys is None or key in keys:
+            pool[key].append(row)
+
+    return pool
+
+
+def load_question_texts(question_ids) -> dict:
+    """
+    One query: {question_master_id: question_text} for the chosen items.
+    """
+    ids = set(question_ids)
+    if not ids:
+        return {}
+
+    rows = (
+        db.session.query(QuestionMaster.id, QuestionMaster.question_text)
+        .filter(QuestionMaster.id.in_(ids))
+        .all()
+    )
+    return dict(rows)
@@ -1,17 +1,40 @@
 # app/services/question_paper_service.py
 
+import random
+from collections import Counter
 from datetime import datetime
 from app.extensions import db
 
 from app.models.subject_version import SubjectVersion
-from app.models.weightage import SubjectWeightage
 from app.models.question_bank import QuestionBank
 from app.models.question_paper import QuestionPaper
 from app.models.question_paper_item import QuestionPaperItem
+from app.services.bank_availability_service import get_bank_availability
+from app.services.compiled_pattern_service import get_compiled_pattern
+from app.services.question_constraint_service import (
+    k_level_bucket,
+    plan_k_level_counts
+)
+from app.services.weightage_matrix_service import get_weightage_matrix
+from app.services.question_paper_selection_service import (
+    load_candidate_pool,
+    load_question_texts
+)
 
 class PaperGenerationError(Exception):
     pass
 
+
+class PaperSetInfeasibleError(PaperGenerationError):
+    """
+    The bank cannot support the requested sets.
+    `shortfalls` holds one entry per (unit, marks) group that falls short.
+    """
+
+    def __init__(self, message: str, shortfalls: list[dict]):
+        super().__init__(message)
+        self.shortfalls = shortfalls
+
 # 🔴 DELETE THIS HARDCODED DICT
 # SECTION_MARKS = { "A": 2, "B": 5, "C": 10 } 
 
@@ -21,12 +44,254 @@ def generate_question_paper_skeleton(
     created_by: int,
     paper_code: str,
     paper_type: str = "NORMAL",
-    question_bank_id: int | None = None
+    question_bank_id: int | None = None,
+    commit: bool = True
 ) -> QuestionPaper:
     """
     Phase 3:
     Create QuestionPaper + placeholder QuestionPaperItems.
     Now uses DYNAMIC MARKS from the Subject Pattern.
+    With commit=False the paper is only flushed, so the caller can record
+    its id in the same transaction.
+    """
+
+    subject_version, marks_map, bank, weightages = _resolve_generation_context(
+        subject_version_id, question_bank_id
+    )
+
+    # -------------------------------------------------
+    # 4. Create QuestionPaper
+    # -------------------------------------------------
+    paper = QuestionPaper(
+        subject_version_id=subject_version_id,
+        source_question_bank_id=bank.id,
+        paper_code=paper_code,
+        paper_type=paper_type,
+        status="GENERATED",
+        created_by=created_by,
+        created_at=datetime.utcnow(),
+        last_modified_by=created_by,
+        last_modified_at=datetime.utcnow()
+    )
+
+    db.session.add(paper)
+    db.session.flush()  # get paper.id
+
+    # -------------------------------------------------
+    # 5. Create Placeholder Items (Using Dynamic Marks)
+    # -------------------------------------------------
+    for order_index, (section, unit, marks) in enumerate(_build_slots(weightages, marks_map), start=1):
+        _add_item(paper.id, section, unit, marks, order_index)
+
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+    return paper
+
+def generate_question_paper_set(
+    *,
+    subject_version_id: int,
+    created_by: int,
+    paper_codes: list[str],
+    paper_type: str = "NORMAL",
+    question_bank_id: int | None = None,
+    max_overlap: int = 0,
+    commit: bool = True
+) -> list[QuestionPaper]:
+    """
+    Generate N fully-selected papers (e.g. sets A, B, C + backup) in ONE
+    transaction from ONE candidate pool.
+    Any two sets share at most `max_overlap` questions (0 = fully disjoint);
+    used questions are tracked as bitsets over the pool's candidate ids.
+    Every set also meets the pattern's K-level quotas per section.
+    Requests the bank cannot meet are rejected from its availability
+    histogram, before any item is loaded.
+    With commit=False the papers are only flushed (see the skeleton).
+    """
+    if not paper_codes:
+        raise PaperGenerationError("At least one paper code is required")
+    if len(set(paper_codes)) != len(paper_codes):
+        raise PaperGenerationError("Paper codes must be unique within a set")
+    if max_overlap < 0:
+        raise PaperGenerationError("Maximum overlap cannot be negative")
+
+    subject_version, marks_map, bank, weightages = _resolve_generation_context(
+        subject_version_id, question_bank_id
+    )
+    slots = _build_slots(weightages, marks_map)
+
+    # -------------------------------------------------
+    # 1. Feasibility report from the bank's histogram
+    # -------------------------------------------------
+    required = Counter((unit, marks) for _, unit, marks in slots)
+    section_of = {(unit, marks): section for section, unit, marks in slots}
+    quotas = get_compiled_pattern(subject_version.pattern).k_level_quotas()
+    availability = get_bank_availability(bank)
+
+    set_count = len(paper_codes)
+    shortfalls = availability.shortfalls(required, times=set_count if max_overlap == 0 else 1)
+
+    if shortfalls:
+        raise PaperSetInfeasibleError(
+            f"Question Bank cannot support {set_count} "
+            f"{'disjoint ' if max_overlap == 0 else ''}sets: " + "; ".join(
+                f"Unit {s['unit']} Marks {s['marks']} needs {s['required']}, has {s['available']}"
+                for s in shortfalls
+            ),
+            shortfalls
+        )
+
+    group_of = {(section, key[0]): key for key, section in section_of.items()}
+    demand = {(section_of[key], key[0]): need for key, need in required.items()}
+
+    rng = random.Random()
+    remaining = None    # disjoint sets: cells of the N-set plan not yet handed out
+
+    if max_overlap == 0:
+        # N disjoint sets need N times every quota from the bank at once. The
+        # sets then split this plan between them: any part of it meeting one
+        # set's demand and quotas leaves a plan for the others, so an early
+        # set cannot take the K-level / unit mix a later set needs.
+        remaining = plan_k_level_counts(
+            demand={g: need * set_count for g, need in demand.items()},
+            availability=availability.k_level_availability(group_of, quotas),
+            quotas={sec: {k: n * set_count for k, n in levels.items()}
+                    for sec, levels in quotas.items()},
+            rng=rng
+        )
+
+    # -------------------------------------------------
+    # 2. Load pool ONCE, pick every set against the shared bitsets
+    # -------------------------------------------------
+    pool = load_candidate_pool(bank.id, required.keys())
+
+    # Bucket every group by the K-level quota its questions count against
+    cells = {}  # (section, unit, bucket) -> candidate rows
+    for (unit, marks), section in section_of.items():
+        for row in pool[(unit, marks)]:
+            bucket = k_level_bucket(row.k_level, quotas.get(section))
+            cells.setdefault((section, unit, bucket), []).append(row)
+
+    bit_of = {}
+    for candidates in pool.values():
+        for row in candidates:
+            bit_of[row.id] = len(bit_of)
+
+    set_masks = []      # one bitset per generated set
+    used_union = 0      # OR of all set_masks
+    picks = []          # per set: {(unit, marks): [candidate rows]}
+
+    for code in paper_codes:
+        mask = 0
+        overlaps = [0] * len(set_masks)
+        chosen_by_group = {key: [] for key in required}
+
+        # Split each group's count across K-levels: disjoint sets take their
+        # share of the N-set plan, overlapping sets plan against the whole pool
+        plan = plan_k_level_counts(
+            demand=demand,
+            availability=(
+                remaining if remaining is not None
+                else {cell: len(rows) for cell, rows in cells.items()}
+            ),
+            quotas=quotas,
+            rng=rng
+        )
+        if remaining is not None:
+            for cell, count in plan.items():
+                remaining[cell] -= count
+
+        for (section, unit, bucket), need in plan.items():
+            marks = group_of[(section, unit)][1]
+            # A histogram out of step with the pool yields a shortfall below, not a KeyError
+            candidates = cells.get((section, unit, bucket), [])[:]
+            rng.shuffle(candidates)
+
+            chosen = [c for c in candidates if not (used_union >> bit_of[c.id]) & 1][:need]
+
+            if len(chosen) < need and max_overlap:
+                for c in candidates:
+                    if len(chosen) == need:
+                        break
+                    bit = bit_of[c.id]
+                    if not (used_union >> bit) & 1:
+                        continue  # fresh candidates were already considered
+                    hits = [j for j, m in enumerate(set_masks) if (m >> bit) & 1]
+                    if all(overlaps[j] < max_overlap for j in hits):
+                        for j in hits:
+                            overlaps[j] += 1
+                        chosen.append(c)
+
+            if len(chosen) < need:
+                raise PaperSetInfeasibleError(
+                    f"Set {code}: Unit {unit} Marks {marks} needs {need} questions "
+                    f"within the overlap limit of {max_overlap}, found {len(chosen)}",
+                    [{"unit": unit, "marks": marks, "required": need, "available": len(chosen)}]
+                )
+
+            for c in chosen:
+                mask |= 1 << bit_of[c.id]
+            chosen_by_group[(unit, marks)].extend(chosen)
+
+        set_masks.append(mask)
+        used_union |= mask
+        picks.append(chosen_by_group)
+
+    # -------------------------------------------------
+    # 3. Persist all papers in one transaction
+    # -------------------------------------------------
+    texts = load_question_texts(
+        c.question_id for chosen_by_group in picks
+        for chosen in chosen_by_group.values() for c in chosen
+    )
+
+    now = datetime.utcnow()
+    papers = []
+    for code, chosen_by_group in zip(paper_codes, picks):
+        paper = QuestionPaper(
+            subject_version_id=subject_version_id,
+            source_question_bank_id=bank.id,
+            paper_code=code,
+            paper_type=paper_type,
+            status="GENERATED",
+            created_by=created_by,
+            created_at=now,
+            last_modified_by=created_by,
+            last_modified_at=now
+        )
+
+        queues = {key: list(chosen) for key, chosen in chosen_by_group.items()}
+        for queue in queues.values():
+            rng.shuffle(queue)  # picks come bucket by bucket: mix K-levels across the slots
+        for order_index, (section, unit, marks) in enumerate(slots, start=1):
+            c = queues[(unit, marks)].pop()
+            paper.items.append(QuestionPaperItem(
+                section=section,
+                unit=unit,
+                marks=marks,
+                order_index=order_index,
+                source_type="QBANK",
+                source_question_id=c.id,
+                original_text=texts[c.question_id],
+                k_level=c.k_level,
+                created_at=now,
+                last_modified_at=now
+            ))
+
+        db.session.add(paper)
+        papers.append(paper)
+
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+    return papers
+
+def _resolve_generation_context(subject_version_id: int, question_bank_id: int | None):
+    """
+    Validates SubjectVersion + Pattern, resolves the bank and loads weightage.
+    Returns (subject_version, marks_map, bank, weightages as a WeightageMatrix).
     """
 
     # -------------------------------------------------
@@ -39,15 +304,8 @@ def generate_question_paper_skeleton(
     if not subject_version.pattern:
          raise PaperGenerationError("Subject Version has no Pattern assigned")
 
-    # ✅ GET MARKS DYNAMICALLY FROM DB PATTERN
-    sections_config = subject_version.pattern.structure_json.get("sections", {})
-    
-    # Safely get marks, defaulting to 0 if section doesn't exist in pattern
-    marks_map = {
-        "A": sections_config.get("A", {}).get("marks", 0),
-        "B": sections_config.get("B", {}).get("marks", 0),
-        "C": sections_config.get("C", {}).get("marks", 0),
-    }
+    # ✅ GET MARKS DYNAMICALLY FROM DB PATTERN (0 if the pattern lacks a section)
+    marks_map = get_compiled_pattern(subject_version.pattern).marks_map()
 
     # -------------------------------------------------
     # 2. Resolve Question Bank
@@ -71,61 +329,26 @@ def generate_question_paper_skeleton(
         raise PaperGenerationError("No Question Bank found. Upload a Question Bank before generating paper.")
 
     # -------------------------------------------------
-    # 3. Load Weightage
+    # 3. Load Weightage (cached unit x section grid)
     # -------------------------------------------------
-    weightages = (
-        SubjectWeightage.query
-        .filter_by(subject_version_id=subject_version_id)
-        .order_by(SubjectWeightage.unit)
-        .all()
-    )
+    weightages = get_weightage_matrix(subject_version_id)
 
     if not weightages:
         raise PaperGenerationError("Weightage not defined")
 
-    # -------------------------------------------------
-    # 4. Create QuestionPaper
-    # -------------------------------------------------
-    paper = QuestionPaper(
-        subject_version_id=subject_version_id,
-        source_question_bank_id=bank.id,
-        paper_code=paper_code,
-        paper_type=paper_type,
-        status="GENERATED",
-        created_by=created_by,
-        created_at=datetime.utcnow(),
-        last_modified_by=created_by,
-        last_modified_at=datetime.utcnow()
-    )
-
-    db.session.add(paper)
-    db.session.flush()  # get paper.id
-
-    # -------------------------------------------------
-    # 5. Create Placeholder Items (Using Dynamic Marks)
-    # -------------------------------------------------
-    order_index = 1
-
-    for w in weightages:
-        unit = w.unit
+    return subject_version, marks_map, bank, weightages
 
-        # Section A
-        for _ in range(w.sec_a_count or 0):
-            _add_item(paper.id, "A", unit, marks_map["A"], order_index)
-            order_index += 1
 
-        # Section B
-        for _ in range(w.sec_b_count or 0):
-            _add_item(paper.id, "B", unit, marks_map["B"], order_index)
-            order_index += 1
-
-        # Section C
-        for _ in range(w.sec_c_count or 0):
-            _add_item(paper.id, "C", unit, marks_map["C"], order_index)
-            order_index += 1
-
-    db.session.commit()
-    return paper
+def _build_slots(weightages, marks_map) -> list[tuple[str, int, int]]:
+    """
+    Paper layout as ordered (section, unit, marks) slots: unit by unit, A -> B -> C.
+    """
+    slots = []
+    for unit, a, b, c in weightages.rows():
+        slots.extend([("A", unit, marks_map["A"])] * a)
+        slots.extend([("B", unit, marks_map["B"])] * b)
+        slots.extend([("C", unit, marks_map["C"])] * c)
+    return slots
 
 # ... (create_question_bank and _add_item functions remain unchanged) ...
 def create_question_bank(*, subject_version_id: int, uploaded_by: int) -> QuestionBank:
@@ -2,7 +2,14 @@ import random
 from collections import defaultdict
 
 from app.models.subject_version import SubjectVersion
-from app.models.weightage import SubjectWeightage
+from app.services.weightage_matrix_service import get_weightage_matrix
+from app.services.compiled_pattern_service import get_compiled_pattern
+from app.services.question_constraint_service import (
+    KLevelInfeasibleError,
+    k_level_bucket,
+    plan_k_level_counts
+)
+from app.services.question_paper_selection_service import new_selection_seed
 
 
 class RandomSelectionError(Exception):
@@ -20,32 +27,24 @@ def select_random_questions(
     - unit
     - section
     - weightage counts
+    - K-level quotas per section (from pattern structure_json)
 
-    Returns grouped result for UI preview.
+    Returns grouped result for UI preview. Each call draws from its own
+    RNG; pass the returned `seed` back to reproduce the same preview.
     """
 
-    if seed is not None:
-        random.seed(seed)
+    if seed is None:
+        seed = new_selection_seed()
+    rng = random.Random(seed)
 
     # -------------------------------------------------
     # 1️⃣ Load weightage
     # -------------------------------------------------
-    weightages = (
-        SubjectWeightage.query
-        .filter_by(subject_version_id=subject_version_id)
-        .all()
-    )
+    weightages = get_weightage_matrix(subject_version_id)
 
     if not weightages:
         raise RandomSelectionError("Weightage not defined")
 
-    # required_count[(unit, section)] = count
-    required_count = {}
-    for w in weightages:
-        required_count[(w.unit, "A")] = w.sec_a_count or 0
-        required_count[(w.unit, "B")] = w.sec_b_count or 0
-        required_count[(w.unit, "C")] = w.sec_c_count or 0
-
     # -------------------------------------------------
     # 2️⃣ Group questions by (unit, section)
     # -------------------------------------------------
@@ -58,35 +57,55 @@ def select_random_questions(
     # -------------------------------------------------
     # 3️⃣ Validate availability (ONE error per group)
     # -------------------------------------------------
-    errors = []
-
-    for key, required in required_count.items():
-        available = len(pool.get(key, []))
-        if available < required:
-            unit, section = key
-            errors.append({
-                "type": "INSUFFICIENT_QUESTIONS",
-                "message": (
-                    f"Unit {unit} Section {section}: "
-                    f"required {required}, found {available}"
-                )
-            })
+    errors = [
+        {
+            "type": "INSUFFICIENT_QUESTIONS",
+            "message": (
+                f"Unit {unit} Section {section}: "
+                f"required {required}, found {available}"
+            )
+        }
+        for unit, section, required, available in weightages.shortfalls(
+            {key: len(qs) for key, qs in pool.items()}
+        )
+    ]
 
     if errors:
         return {"valid": False, "errors": errors}
 
     # -------------------------------------------------
-    # 4️⃣ Random selection
+    # 4️⃣ Plan K-level split, then random selection
     # -------------------------------------------------
+    subject_version = SubjectVersion.query.get(subject_version_id)
+    quotas = get_compiled_pattern(subject_version.pattern).k_level_quotas() if subject_version.pattern else {}
+
+    buckets = defaultdict(list)
+    for (unit, section), qs in pool.items():
+        for q in qs:
+            buckets[(section, unit, k_level_bucket(q.get("k_level"), quotas.get(section)))].append(q)
+
+    try:
+        plan = plan_k_level_counts(
+            demand={(section, unit): n for (unit, section), n in weightages.required().items()},
+            availability={cell: len(qs) for cell, qs in buckets.items()},
+            quotas=quotas,
+            rng=rng
+        )
+    except KLevelInfeasibleError as e:
+        return {
+            "valid": False,
+            "errors": [
+                {"type": "K_LEVEL_INFEASIBLE", "message": r["message"]}
+                for r in e.report
+            ]
+        }
+
     selected = []
     used_ids = set()
 
-    for key, required in required_count.items():
-        if required == 0:
-            continue
-
-        candidates = pool[key][:]
-        random.shuffle(candidates)
+    for cell, required in plan.items():
+        candidates = buckets[cell][:]
+        rng.shuffle(candidates)
 
         chosen = candidates[:required]
         for q in chosen:
@@ -104,6 +123,7 @@ def select_random_questions(
 
     return {
         "valid": True,
+        "seed": seed,
         "selected_count": len(selected),
         "grouped": {
             f"Unit {u} Section {s}": qs
@@ -0,0 +1,226 @@
+# app/services/reference_data_service.py
+
+import threading
+import time
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.department import Department
+from app.models.grid_type import GridType
+from app.models.pattern import Pattern
+from app.models.school import School
+from app.models.subject import Subject
+from app.models.subject_version import SubjectVersion
+
+
+# One generation counter per kind; the owning service bumps it after a committed write
+REFERENCE_KINDS = ("schools", "departments", "patterns", "subjects")
+
+
+class SchoolRef(NamedTuple):
+    id: int
+    name: str
+
+
+class DepartmentRef(NamedTuple):
+    id: int
+    code: str
+    name: str
+    level: str
+    school_id: int
+    school: SchoolRef
+
+
+class PatternRef(NamedTuple):
+    id: int
+    name: str
+    total_marks: int
+    structure_json: dict  # shared between requests: read only
+    is_active: bool
+    version: int
+
+
+class GridTypeRef(NamedTuple):
+    id: int
+    name: str
+
+
+class SubjectOptionRef(NamedTuple):
+    id: int                         # subject version id
+    code: str
+    name: str
+
+
+class ReferenceData(NamedTuple):
+    """
+    Immutable snapshot of the dropdown data, with per-school and
+    per-department indexes precomputed.
+    """
+    generation: tuple               # REFERENCE_KINDS counters it was built at
+    schools: tuple                  # by name
+    departments: tuple              # by school name, department name
+    departments_by_school: dict     # school_id -> departments by name
+    patterns: tuple                 # by name
+    grid_types: tuple               # by name
+    batches: tuple                  # newest first
+    batches_by_department: dict     # department_id -> batches, newest first
+    semesters: tuple                # ascending
+    semesters_by_batch: dict        # (department_id, batch) -> semesters, ascending
+    subjects_by_term: dict          # (department_id, batch, semester) -> active versions by code
+
+    def schools_for(self, school_ids) -> list:
+        allowed = set(school_ids or ())
+        return [s for s in self.schools if s.id in allowed]
+
+    def departments_of(self, school_id) -> list:
+        return list(self.departments_by_school.get(school_id, ()))
+
+
+_lock = threading.Lock()
+_generations = dict.fromkeys(REFERENCE_KINDS, 0)
+_snapshot = None
+_built_at = 0.0
+
+
+# ---------------------------------------------------
+# Public API
+# ---------------------------------------------------
+
+def get_reference_data() -> ReferenceData:
+    """
+    The current snapshot; rebuilt after a write bumped a generation in this
+    process, or after REFERENCE_CACHE_TTL_SECONDS (writes made by other
+    worker processes).
+    """
+    global _snapshot, _built_at
+
+    ttl = current_app.config["REFERENCE_CACHE_TTL_SECONDS"]
+    with _lock:
+        generation = _current_generation()
+        snapshot, built_at = _snapshot, _built_at
+
+    if (
+        snapshot is not None
+        and snapshot.generation == generation
+        and time.monotonic() - built_at < ttl
+    ):
+        return snapshot
+
+    snapshot = _build(generation)
+
+    with _lock:
+        # A write that landed while building leaves the old generation behind
+        if _current_generation() == generation:
+            _snapshot, _built_at = snapshot, time.monotonic()
+
+    return snapshot
+
+
+def current_generation() -> tuple:
+    """
+    This process's counters, without building a snapshot.
+    """
+    with _lock:
+        return _current_generation()
+
+
+def bump_reference_generation(*kinds: str):
+    """
+    Call after committing a write to schools / departments / patterns / subjects.
+    """
+    with _lock:
+        for kind in kinds:
+            _generations[kind] += 1
+
+
+# ---------------------------------------------------
+# Internals
+# ---------------------------------------------------
+
+def _current_generation() -> tuple:
+    return tuple(_generations[kind] for kind in REFERENCE_KINDS)
+
+
+def _build(generation: tuple) -> ReferenceData:
+    # Own connection: the request's transaction may predate the write that
+    # bumped the generation
+    with db.engine.connect() as conn:
+        schools = tuple(
+            SchoolRef(*row)
+            for row in conn.execute(select(School.id, School.name).order_by(School.name))
+        )
+        school_by_id = {s.id: s for s in schools}
+
+        departments = tuple(
+            DepartmentRef(id, code, name, level, school_id, school_by_id.get(school_id))
+            for id, code, name, level, school_id in conn.execute(
+                select(Department.id, Department.code, Department.name, Department.level, Department.school_id)
+                .join(School, Department.school_id == School.id)
+                .order_by(School.name, Department.name)
+            )
+        )
+
+        patterns = tuple(
+            PatternRef(*row)
+            for row in conn.execute(
+                select(
+                    Pattern.id, Pattern.name, Pattern.total_marks, Pattern.structure_json,
+                    Pattern.is_active, Pattern.version
+                )
+                .order_by(Pattern.name)
+            )
+        )
+
+        grid_types = tuple(
+            GridTypeRef(*row)
+            for row in conn.execute(select(GridType.id, GridType.name).order_by(GridType.name))
+        )
+
+        version_keys = conn.execute(
+            select(SubjectVersion.department_id, SubjectVersion.batch, SubjectVersion.semester).distinct()
+        ).all()
+
+        active_versions = conn.execute(
+            select(
+                SubjectVersion.department_id, SubjectVersion.batch, SubjectVersion.semester,
+                SubjectVersion.id, Subject.code, Subject.name
+            )
+            .join(Subject, SubjectVersion.subject_id == Subject.id)
+            .where(SubjectVersion.is_active.is_(True))
+            .order_by(Subject.code, SubjectVersion.id)
+        ).all()
+
+    departments_by_school = {}
+    for dept in sorted(departments, key=lambda d: d.name):
+        departments_by_school.setdefault(dept.school_id, []).append(dept)
+
+    batches_by_department = {}
+    semesters_by_batch = {}
+    for department_id, batch, semester in version_keys:
+        batches_by_department.setdefault(department_id, set()).add(batch)
+        semesters_by_batch.setdefault((department_id, batch), set()).add(semester)
+
+    subjects_by_term = {}
+    for department_id, batch, semester, sv_id, code, name in active_versions:
+        subjects_by_term.setdefault((department_id, batch, semester), []).append(
+            SubjectOptionRef(sv_id, code, name)
+        )
+
+    return ReferenceData(
+        generation=generation,
+        schools=schools,
+        departments=departments,
+        departments_by_school={k: tuple(v) for k, v in departments_by_school.items()},
+        patterns=patterns,
+        grid_types=grid_types,
+        batches=tuple(sorted({batch for _, batch, _ in version_keys}, reverse=True)),
+        batches_by_department={
+            k: tuple(sorted(v, reverse=True)) for k, v in batches_by_department.items()
+        },
+        semesters=tuple(sorted({semester for _, _, semester in version_keys})),
+        semesters_by_batch={k: tuple(sorted(v)) for k, v in semesters_by_batch.items()},
+        subjects_by_term={k: tuple(v) for k, v in subjects_by_term.items()},
+    )
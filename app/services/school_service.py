@@ -1,8 +1,8 @@
-import pandas as pd
 from io import StringIO
 from app.extensions import db
 from app.models.school import School
 from app.models.department import Department
+from app.services.reference_data_service import bump_reference_generation
 
 def get_all_schools():
     return School.query.order_by(School.name).all()
@@ -15,6 +15,7 @@ def add_school(name: str):
     school = School(name=name.strip())
     db.session.add(school)
     db.session.commit()
+    bump_reference_generation("schools")
 
 
 def delete_school(school_id: int):
@@ -26,6 +27,7 @@ def delete_school(school_id: int):
 
     db.session.delete(school)
     db.session.commit()
+    bump_reference_generation("schools")
 
 
 def get_schools_as_csv():
@@ -39,6 +41,7 @@ def get_schools_as_csv():
         for s in schools
     ]
 
+    import pandas as pd
     df = pd.DataFrame(data)
 
     csv_buffer = StringIO()
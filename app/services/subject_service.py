@@ -1,5 +1,4 @@
 # app/services/subject_service.py
-import pandas as pd
 from io import StringIO
 from sqlalchemy.sql import exists
 
@@ -11,6 +10,8 @@ from app.models.grid_type import GridType
 from app.models.weightage import SubjectWeightage
 from app.models.question_paper import QuestionPaper
 from app.models.question_bank import QuestionBank
+from app.services.reference_data_service import bump_reference_generation
+from app.services.weightage_matrix_service import invalidate_weightage_matrix
 
 # =========================================================
 # SUBJECT READ OPERATIONS
@@ -114,6 +115,7 @@ def add_subject_version(code, name, department_id, semester, batch, grid_type_id
 
     db.session.add(sv)
     db.session.commit()
+    bump_reference_generation("subjects")
     return sv
 
 # =========================================================
@@ -140,6 +142,7 @@ def get_subjects_as_csv(batch=None, semester=None, department_id=None):
             "Grid Type": sv.subject.grid_type.name if sv.subject.grid_type else ""
         })
 
+    import pandas as pd
     df = pd.DataFrame(rows)
 
     buffer = StringIO()
@@ -263,6 +266,7 @@ def delete_subject_version_only(subject_version_id: int):
     # 3. Safe to Delete
     db.session.delete(sv)
     db.session.commit()
+    bump_reference_generation("subjects")
 
 def delete_subject_and_weightage(subject_version_id: int):
     """
@@ -280,4 +284,6 @@ def delete_subject_and_weightage(subject_version_id: int):
     
     # 3. Delete Subject
     db.session.delete(sv)
-    db.session.commit()
\ No newline at end of file
+    db.session.commit()
+    invalidate_weightage_matrix(subject_version_id)
+    bump_reference_generation("subjects")
\ No newline at end of file
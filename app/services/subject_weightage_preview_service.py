@@ -1,14 +1,26 @@
 #app\services\subject_weightage_preview_service.py
+import time
+
+from flask import current_app
+
+from app.config import Config
 from app.models.subject_version import SubjectVersion
 from app.models.subject_version_pattern import SubjectVersionPattern
 from app.models.pattern import Pattern
-from app.models.weightage import SubjectWeightage
+from app.services.compiled_pattern_service import get_compiled_pattern
+from app.services.reference_data_service import current_generation
+from app.services.weightage_matrix_service import get_weightage_matrix
+from app.utils.cache import LRUCache
 
 
 class WeightagePreviewError(Exception):
     pass
 
 
+# subject_version_id -> (expires_at, reference generation, payload)
+_generation_preview_cache = LRUCache(maxsize=Config.WEIGHTAGE_PREVIEW_CACHE_SIZE)
+
+
 def get_subject_weightage_preview(*, subject_id: int, department_id: int, batch: int, semester: int):
     """
     Read-only preview of:
@@ -31,19 +43,14 @@ def get_subject_weightage_preview(*, subject_id: int, department_id: int, batch:
 
     pattern = Pattern.query.get(subject_version.pattern_id)
 
-    # 3️⃣ Load Weightage rows
-    weightages = (
-        SubjectWeightage.query
-        .filter_by(subject_version_id=subject_version.id)
-        .order_by(SubjectWeightage.unit)
-        .all()
-    )
+    # 3️⃣ Load Weightage grid
+    weightages = get_weightage_matrix(subject_version.id)
 
     if not weightages:
         raise WeightagePreviewError("Weightage not defined")
 
     # 4️⃣ Shape response (frontend friendly)
-    sections = pattern.structure_json.get("sections", {})
+    compiled = get_compiled_pattern(pattern)
 
     return {
         "subject_version_id": subject_version.id,
@@ -54,17 +61,82 @@ def get_subject_weightage_preview(*, subject_id: int, department_id: int, batch:
         },
         "pattern": {
             "name": pattern.name,
-            "sectionA": sections.get("A", {}).get("total", 0),
-            "sectionB": sections.get("B", {}).get("total", 0),
-            "sectionC": sections.get("C", {}).get("total", 0),
+            "sectionA": compiled.total_of("A"),
+            "sectionB": compiled.total_of("B"),
+            "sectionC": compiled.total_of("C"),
+        },
+        "weightage": [
+            {
+                "unit": unit,
+                "A": a,
+                "B": b,
+                "C": c
+            }
+            for unit, a, b, c in weightages.rows()
+        ]
+    }
+
+
+# ---------------------------------------------------
+# Generate-paper preview (cached)
+# ---------------------------------------------------
+
+def get_generation_preview(subject_version_id: int) -> dict:
+    """
+    Pattern section totals + unit-wise weightage of one subject version,
+    for the generate-paper screen. Cached per process until its weightage
+    is saved (invalidate_generation_preview), a pattern/subject write bumps
+    the reference generation, or REFERENCE_CACHE_TTL_SECONDS passes.
+    Raises WeightagePreviewError when there is nothing to preview.
+    """
+    generation = current_generation()
+    cached = _generation_preview_cache.get(subject_version_id)
+    if cached is not None and cached[0] > time.monotonic() and cached[1] == generation:
+        return cached[2]
+
+    # 1️⃣ Resolve SubjectVersion (404 if unknown)
+    sv = SubjectVersion.query.get_or_404(subject_version_id)
+
+    # 2️⃣ Load Weightage grid
+    weightages = get_weightage_matrix(subject_version_id)
+    if not weightages:
+        raise WeightagePreviewError("Weightage not defined for this subject")
+
+    pattern = sv.pattern
+    if not pattern:
+        raise WeightagePreviewError("Pattern not assigned")
+
+    # 3️⃣ Shape response
+    compiled = get_compiled_pattern(pattern)
+
+    payload = {
+        "subject_version_id": sv.id,
+        "pattern": {
+            "name": pattern.name,
+            "sectionA": compiled.total_of("A"),
+            "sectionB": compiled.total_of("B"),
+            "sectionC": compiled.total_of("C"),
         },
         "weightage": [
             {
-                "unit": w.unit,
-                "A": w.sec_a_count,
-                "B": w.sec_b_count,
-                "C": w.sec_c_count
+                "unit": unit,
+                "A": a,
+                "B": b,
+                "C": c
             }
-            for w in weightages
+            for unit, a, b, c in weightages.rows()
         ]
     }
+
+    ttl = current_app.config["REFERENCE_CACHE_TTL_SECONDS"]
+    _generation_preview_cache.put(
+        subject_version_id, (time.monotonic() + ttl, generation, payload)
+    )
+    return payload
+
+
+def invalidate_generation_preview(subject_version_id: int):
+    """
+    Call after committing a weightage change for `subject_version_id`.
+    """
+    _generation_preview_cache.pop(subject_version_id)
@@ -1,8 +1,65 @@
+import time
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app.config import Config
 from app.extensions import db
 from app.models.user import User
 from app.models.school import School
+from app.utils.cache import LRUCache
 from werkzeug.security import generate_password_hash
 
+
+class SessionUser(NamedTuple):
+    """
+    What a request needs to know about the logged-in user (g.user).
+    """
+    id: int
+    username: str
+    role: str
+    school_ids: tuple
+
+
+# user_id -> (expires_at, SessionUser)
+_session_user_cache = LRUCache(maxsize=Config.USER_CACHE_SIZE)
+
+
+def get_session_user(user_id) -> SessionUser | None:
+    """
+    The user behind a session, or None if they no longer exist. Served from
+    a short-lived in-process cache; the mutations below evict it.
+    """
+    cached = _session_user_cache.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    user = (
+        User.query.options(joinedload(User.schools))
+        .filter(User.id == user_id)
+        .first()
+    )
+    if user is None:
+        _session_user_cache.pop(user_id)
+        return None
+
+    snapshot = SessionUser(
+        id=user.id,
+        username=user.username,
+        role=user.role,
+        school_ids=tuple(s.id for s in user.schools)
+    )
+    ttl = current_app.config["USER_CACHE_TTL_SECONDS"]
+    if ttl > 0:
+        _session_user_cache.put(user_id, (time.monotonic() + ttl, snapshot))
+    return snapshot
+
+
+def invalidate_session_user(user_id):
+    _session_user_cache.pop(int(user_id))
+
+
 def create_user(username, password, role, school_ids=None):
     # Check if user already exists
     if User.query.filter_by(username=username).first():
@@ -45,6 +102,7 @@ def update_user_schools(user_id, school_ids):
         user.schools = []
         
     db.session.commit()
+    invalidate_session_user(user_id)
     return True
 
 def reset_user_school_access(user_id):
@@ -52,6 +110,7 @@ def reset_user_school_access(user_id):
     # Clear the relationship list
     user.schools = []
     db.session.commit()
+    invalidate_session_user(user_id)
     return True
 
 def reset_user_password(user_id, new_password):
@@ -60,6 +119,7 @@ def reset_user_password(user_id, new_password):
     # By updating the password, the next time the user tries to authenticate
     # or if we implement a 'password_hash' check in g.user, they'll be out.
     db.session.commit()
+    invalidate_session_user(user_id)
 
 # app/services/user_service.py
 
@@ -79,4 +139,5 @@ def delete_user(user_id, current_admin_id):
     
     db.session.delete(user)
     db.session.commit()
+    invalidate_session_user(user_id)
     return True
\ No newline at end of file
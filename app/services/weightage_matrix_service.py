@@ -0,0 +1,165 @@
+# app/services/weightage_matrix_service.py
+
+import time
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.config import Config
+from app.extensions import db
+from app.models.weightage import SubjectWeightage
+from app.services.compiled_pattern_service import PAPER_SECTIONS
+from app.utils.cache import LRUCache
+
+
+UNITS = (1, 2, 3, 4, 5)
+
+_EMPTY_ROW = (0,) * len(PAPER_SECTIONS)
+
+
+class WeightageMatrix:
+    """
+    Question counts of one subject version as a units x sections grid
+    (5 x 3: units 1-5, sections A/B/C), plus which units have a weightage
+    row at all (a unit without one allows no questions; a row of zeros
+    allows the unit with nothing required).
+    Shared between requests: read only.
+    """
+    __slots__ = ("subject_version_id", "counts", "units")
+
+    def __init__(self, subject_version_id, counts: tuple, units: tuple):
+        self.subject_version_id = subject_version_id
+        self.counts = counts            # counts[unit - 1][section index]
+        self.units = units              # units with a weightage row, ascending
+
+    def __repr__(self):
+        return f"<WeightageMatrix sv={self.subject_version_id} {self.counts}>"
+
+    @classmethod
+    def from_rows(cls, subject_version_id, rows) -> "WeightageMatrix":
+        """
+        `rows`: (unit, a, b, c) tuples; units outside 1-5 are ignored.
+        """
+        grid = [_EMPTY_ROW] * len(UNITS)
+        units = set()
+        for unit, a, b, c in rows:
+            if unit in UNITS:
+                grid[unit - 1] = (a or 0, b or 0, c or 0)
+                units.add(unit)
+        return cls(subject_version_id, tuple(grid), tuple(sorted(units)))
+
+    def __bool__(self):
+        return bool(self.units)
+
+    def defines(self, unit) -> bool:
+        return unit in self.units
+
+    def count(self, unit: int, section: str) -> int:
+        return self.counts[unit - 1][PAPER_SECTIONS.index(section)]
+
+    def rows(self):
+        """
+        (unit, a, b, c) for each unit with a weightage row.
+        """
+        for unit in self.units:
+            yield (unit, *self.counts[unit - 1])
+
+    def required(self) -> dict:
+        """
+        {(unit, section): count} over the defined units.
+        """
+        return {
+            (unit, section): n
+            for unit in self.units
+            for section, n in zip(PAPER_SECTIONS, self.counts[unit - 1])
+        }
+
+    def section_totals(self) -> tuple:
+        """
+        Column sums: questions required per section, (A, B, C).
+        """
+        return tuple(sum(column) for column in zip(*self.counts))
+
+    # ---------------------------------------------------
+    # Whole-matrix checks
+    # ---------------------------------------------------
+
+    def pattern_mismatches(self, pattern) -> list[tuple[str, int, int]]:
+        """
+        (section, pattern total, weightage total) for each section of the
+        compiled `pattern` whose column sum differs from its total.
+        """
+        return [
+            (section, pattern.total_of(section), current)
+            for section, current in zip(PAPER_SECTIONS, self.section_totals())
+            if pattern.section(section) and current != pattern.total_of(section)
+        ]
+
+    def shortfalls(self, available, *, times: int = 1) -> list[tuple[int, str, int, int]]:
+        """
+        (unit, section, required, available) for each defined cell where
+        `available` ({(unit, section): count}, or a grid shaped like
+        `counts`) holds fewer than `times` x the required questions.
+        """
+        grid = available if isinstance(available, tuple) else availability_grid(available)
+        return [
+            (unit, section, need * times, have)
+            for unit in self.units
+            for section, need, have in zip(PAPER_SECTIONS, self.counts[unit - 1], grid[unit - 1])
+            if have < need * times
+        ]
+
+
+def availability_grid(counts: dict) -> tuple:
+    """
+    {(unit, section): count} -> a grid shaped like WeightageMatrix.counts
+    (cells outside units 1-5 / sections A-C are dropped).
+    """
+    grid = [list(_EMPTY_ROW) for _ in UNITS]
+    for (unit, section), n in counts.items():
+        if unit in UNITS and section in PAPER_SECTIONS:
+            grid[unit - 1][PAPER_SECTIONS.index(section)] = n
+    return tuple(tuple(row) for row in grid)
+
+
+# subject_version_id -> (expires_at, WeightageMatrix)
+_matrix_cache = LRUCache(maxsize=Config.WEIGHTAGE_CACHE_SIZE)
+
+
+# ---------------------------------------------------
+# Public API
+# ---------------------------------------------------
+
+def get_weightage_matrix(subject_version_id: int) -> WeightageMatrix:
+    """
+    The subject version's weightage (empty, i.e. falsy, when none is
+    defined). Cached per process; weightage writes here evict it, writes
+    made by other processes show within WEIGHTAGE_CACHE_TTL_SECONDS.
+    """
+    cached = _matrix_cache.get(subject_version_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    rows = db.session.execute(
+        select(
+            SubjectWeightage.unit,
+            SubjectWeightage.sec_a_count,
+            SubjectWeightage.sec_b_count,
+            SubjectWeightage.sec_c_count
+        )
+        .where(SubjectWeightage.subject_version_id == subject_version_id)
+        .order_by(SubjectWeightage.unit)
+    ).all()
+    matrix = WeightageMatrix.from_rows(subject_version_id, rows)
+
+    ttl = current_app.config["WEIGHTAGE_CACHE_TTL_SECONDS"]
+    if ttl > 0:
+        _matrix_cache.put(subject_version_id, (time.monotonic() + ttl, matrix))
+    return matrix
+
+
+def invalidate_weightage_matrix(subject_version_id: int):
+    """
+    Call after committing a weightage change for `subject_version_id`.
+    """
+    _matrix_cache.pop(subject_version_id)
@@ -1,7 +1,11 @@
 from app.extensions import db
 from app.models.subject_version import SubjectVersion
 from app.models.weightage import SubjectWeightage
+from app.services.compiled_pattern_service import get_compiled_pattern
 from app.services.pattern_service import get_active_pattern_for_subject_version
+from app.services.question_bank_excel_validation_service import invalidate_validation_cache
+from app.services.subject_weightage_preview_service import invalidate_generation_preview
+from app.services.weightage_matrix_service import WeightageMatrix, invalidate_weightage_matrix
 
 
 # ----------------------------
@@ -62,6 +66,9 @@ def add_or_update_multiple_weightages(subject_version_id: int, rows: list[dict])
         )
 
     db.session.commit()
+    invalidate_weightage_matrix(subject_version_id)
+    invalidate_validation_cache(subject_version_id=subject_version_id)
+    invalidate_generation_preview(subject_version_id)
 
 
 def validate_weightage_against_pattern(subject_version_id: int, rows: list[dict]):
@@ -70,33 +77,20 @@ def validate_weightage_against_pattern(subject_version_id: int, rows: list[dict]
     if not sv or not sv.pattern:
         raise ValueError("No active pattern assigned to this subject version.")
 
-    pattern = sv.pattern
-    # In production-grade models, pattern details are in structure_json
-    rules = pattern.structure_json or {}
-    section_rules = rules.get("sections", {})
+    pattern = get_compiled_pattern(sv.pattern)
 
-    # 1. Initialize totals for each section
-    totals = {"A": 0, "B": 0, "C": 0}
+    # 1. Lay the submitted rows (units 1-5) out as a unit x section grid
+    matrix = WeightageMatrix.from_rows(subject_version_id, [
+        (row["unit"], int(row.get("a", 0)), int(row.get("b", 0)), int(row.get("c", 0)))
+        for row in rows
+    ])
 
-    # 2. Sum the counts provided in the rows (for units 1-5)
-    for row in rows:
-        totals["A"] += int(row.get("a", 0))
-        totals["B"] += int(row.get("b", 0))
-        totals["C"] += int(row.get("c", 0))
-
-    # 3. Compare aggregate totals against pattern requirements
-    errors = []
-    for sec_key in ["A", "B", "C"]:
-        if sec_key in section_rules:
-            # 'total' represents the "Total in Paper" defined in the Pattern
-            required = int(section_rules[sec_key].get("total", 0))
-            current = totals[sec_key]
-            
-            if current != required:
-                errors.append(
-                    f"Section {sec_key}: Sum of all units must be {required} "
-                    f"(currently {current})"
-                )
+    # 2. Compare column sums against the pattern's "Total in Paper"
+    errors = [
+        f"Section {sec_key}: Sum of all units must be {required} "
+        f"(currently {current})"
+        for sec_key, required, current in matrix.pattern_mismatches(pattern)
+    ]
 
     if errors:
         # Join multiple errors for a comprehensive flash message
@@ -110,3 +104,6 @@ def delete_weightage_by_subject_version(subject_version_id: int):
         subject_version_id=subject_version_id
     ).delete()
     db.session.commit()
+    invalidate_weightage_matrix(subject_version_id)
+    invalidate_validation_cache(subject_version_id=subject_version_id)
+    invalidate_generation_preview(subject_version_id)
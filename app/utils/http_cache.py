@@ -0,0 +1,23 @@
+import hashlib
+import json
+
+from flask import Response, request
+
+
+def conditional_json(payload) -> Response:
+    """
+    JSON response carrying a strong ETag of its body. When the request's
+    If-None-Match already holds that tag the body is dropped and a 304 is
+    sent instead. Cache-Control makes browsers revalidate before reuse.
+    """
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    etag = hashlib.sha1(body.encode()).hexdigest()
+
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
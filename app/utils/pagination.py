@@ -0,0 +1,139 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy import and_, func, or_, select
+
+from app.extensions import db
+
+
+class KeysetPage(NamedTuple):
+    items: list
+    next_cursor: str | None
+    prev_cursor: str | None
+    page_size: int
+    count: int          # exact up to LIST_COUNT_CAP, then the cap
+    count_exact: bool
+
+    @property
+    def count_label(self) -> str:
+        return f"{self.count:,}" if self.count_exact else f"{self.count:,}+"
+
+
+def keyset_page(query, *, order: list, args) -> KeysetPage:
+    """
+    One page of `query`, newest first, seeking on the `order` columns
+    (all sorted DESC; the last one must be unique, e.g. the id) instead of
+    OFFSET, so page 1000 costs the same as page 1 and rows inserted
+    meanwhile never shift a page.
+
+    `args` supplies ?cursor= (from a previous page) and ?page_size=.
+    """
+    page_size = min(
+        args.get("page_size", current_app.config["LIST_PAGE_SIZE"], type=int),
+        current_app.config["LIST_MAX_PAGE_SIZE"]
+    )
+    page_size = max(page_size, 1)
+    direction, key = decode_cursor(args.get("cursor"))
+    if key is not None and len(key) != len(order):
+        direction, key = "next", None  # cursor from another list
+
+    # 1️⃣ Seek + fetch one extra row to learn whether there is more
+    if direction == "prev":
+        rows = (
+            query.filter(_seek(order, key, newer=True))
+            .order_by(*(col.asc() for col in order))
+            .limit(page_size + 1)
+            .all()
+        )
+        has_more = len(rows) > page_size
+        items = rows[:page_size][::-1]
+        has_prev, has_next = has_more, True
+    else:
+        seek_query = query.filter(_seek(order, key, newer=False)) if key else query
+        rows = (
+            seek_query
+            .order_by(*(col.desc() for col in order))
+            .limit(page_size + 1)
+            .all()
+        )
+        has_more = len(rows) > page_size
+        items = rows[:page_size]
+        has_prev, has_next = key is not None, has_more
+
+    # 2️⃣ Cursors point at the first/last row shown
+    next_cursor = encode_cursor("next", _key_of(items[-1], order)) if has_next and items else None
+    prev_cursor = encode_cursor("prev", _key_of(items[0], order)) if has_prev and items else None
+
+    count, exact = estimate_count(query)
+    return KeysetPage(items, next_cursor, prev_cursor, page_size, count, exact)
+
+
+def estimate_count(query) -> tuple[int, bool]:
+    """
+    Row count that stops scanning at LIST_COUNT_CAP: (count, exact).
+    """
+    cap = current_app.config["LIST_COUNT_CAP"]
+    capped = query.order_by(None).limit(cap + 1).subquery()
+    count = db.session.execute(select(func.count()).select_from(capped)).scalar()
+    return (count, True) if count <= cap else (cap, False)
+
+
+# -------------------------------------------------
+# Cursors
+# -------------------------------------------------
+
+def encode_cursor(direction: str, key: list) -> str:
+    payload = json.dumps([direction, [_encode_value(v) for v in key]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str | None) -> tuple[str, list | None]:
+    """
+    ("next" | "prev", key values); a missing or mangled cursor means page 1.
+    """
+    if not token:
+        return "next", None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, key = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("next", "prev") or not isinstance(key, list):
+            raise ValueError(direction)
+        return direction, [_decode_value(v) for v in key]
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return "next", None
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+# -------------------------------------------------
+# Seek predicates
+# -------------------------------------------------
+
+def _seek(order: list, key: list, *, newer: bool):
+    """
+    Rows strictly after `key` in DESC order (older), or before it (newer):
+    (a < :a) OR (a = :a AND b < :b) ... spelled out so MySQL can range-scan.
+    """
+    clauses = []
+    for i, col in enumerate(order):
+        beyond = col > key[i] if newer else col < key[i]
+        clauses.append(and_(*(order[j] == key[j] for j in range(i)), beyond))
+    return or_(*clauses)
+
+
+def _key_of(row, order: list) -> list:
+    return [getattr(row, col.key) for col in order]
@@ -0,0 +1,29 @@
+from sqlalchemy import event
+
+
+class StatementCounter:
+    """
+    Records every SQL statement sent through `engine` while active:
+
+        with StatementCounter(db.engine) as counter:
+            client.get(url)
+        counter.count
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
@@ -0,0 +1,44 @@
+"""Add background_job table
+
+Revision ID: 3f6c2a9d4b17
+Revises: 919a915ce050
+Create Date: 2026-10-17 10:12:41.208113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6c2a9d4b17'
+down_revision = '919a915ce050'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('background_job',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('job_type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('stage', sa.String(length=30), nullable=False),
+    sa.Column('progress', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('input_file', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('errors', sa.JSON(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_background_job_status_created', 'background_job', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_background_job_status_created', table_name='background_job')
+    op.drop_table('background_job')
@@ -0,0 +1,52 @@
+"""Add composite indexes for hot filter paths
+
+Revision ID: a7d41c0e9b52
+Revises: 3f6c2a9d4b17
+Create Date: 2026-10-17 11:02:17.540921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d41c0e9b52'
+down_revision = '3f6c2a9d4b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # auto-select + swap candidates
+    op.create_index('ix_qbank_item_bank_unit_marks', 'question_bank_item', ['question_bank_id', 'unit', 'marks'], unique=False)
+    # paper items are always read ordered by order_index
+    op.create_index('ix_qpaper_item_paper_order', 'question_paper_item', ['question_paper_id', 'order_index'], unique=False)
+    # activation / dependency checks, staff + admin listings, dashboards
+    op.create_index('ix_question_paper_sv_status', 'question_paper', ['subject_version_id', 'status'], unique=False)
+    op.create_index('ix_question_paper_creator_modified', 'question_paper', ['created_by', 'last_modified_at'], unique=False)
+    op.create_index('ix_question_paper_status_modified', 'question_paper', ['status', 'last_modified_at'], unique=False)
+    # default-bank lookup
+    op.create_index('ix_question_bank_sv_default_status', 'question_bank', ['subject_version_id', 'is_default', 'status'], unique=False)
+    # weightage is always read per subject version, ordered by unit
+    op.create_index('ix_subject_weightage_sv_unit', 'subject_weightage', ['subject_version_id', 'unit'], unique=False)
+    # staff dropdowns (department -> semester -> batch) and subject filters
+    op.create_index('ix_subject_version_dept_sem_batch_active', 'subject_version', ['department_id', 'semester', 'batch', 'is_active'], unique=False)
+
+
+def downgrade():
+    _drop_fk_backing_index('ix_subject_version_dept_sem_batch_active', 'subject_version', 'department_id')
+    _drop_fk_backing_index('ix_subject_weightage_sv_unit', 'subject_weightage', 'subject_version_id')
+    _drop_fk_backing_index('ix_question_bank_sv_default_status', 'question_bank', 'subject_version_id')
+    op.drop_index('ix_question_paper_status_modified', table_name='question_paper')
+    _drop_fk_backing_index('ix_question_paper_creator_modified', 'question_paper', 'created_by')
+    _drop_fk_backing_index('ix_question_paper_sv_status', 'question_paper', 'subject_version_id')
+    _drop_fk_backing_index('ix_qpaper_item_paper_order', 'question_paper_item', 'question_paper_id')
+    _drop_fk_backing_index('ix_qbank_item_bank_unit_marks', 'question_bank_item', 'question_bank_id')
+
+
+def _drop_fk_backing_index(name, table, fk_column):
+    # MySQL silently drops the implicit FK index once a composite index can
+    # back the constraint; recreate a plain one so the drop is allowed.
+    if op.get_bind().dialect.name == 'mysql':
+        op.create_index(f'ix_{table}_{fk_column}', table, [fk_column], unique=False)
+    op.drop_index(name, table_name=table)
@@ -0,0 +1,54 @@
+"""Add question_bank.availability (per-bank availability histogram)
+
+Revision ID: a9d2c47e1f08
+Revises: f3c8e1b5a692
+Create Date: 2026-10-17 22:41:53.118274
+
+"""
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d2c47e1f08'
+down_revision = 'f3c8e1b5a692'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('question_bank', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('availability', sa.JSON(), nullable=True))
+
+    # Backfill from the existing items
+    bank = sa.table('question_bank', sa.column('id'), sa.column('availability', sa.JSON()))
+    bank_item = sa.table('question_bank_item', sa.column('question_bank_id'), sa.column('unit'),
+                         sa.column('section'), sa.column('marks'), sa.column('k_level'))
+
+    conn = op.get_bind()
+    counts = {bank_id: Counter() for (bank_id,) in conn.execute(sa.select(bank.c.id))}
+
+    for bank_id, unit, section, marks, k_level, total in conn.execute(
+        sa.select(bank_item.c.question_bank_id, bank_item.c.unit, bank_item.c.section,
+                  bank_item.c.marks, bank_item.c.k_level, sa.func.count())
+        .group_by(bank_item.c.question_bank_id, bank_item.c.unit, bank_item.c.section,
+                  bank_item.c.marks, bank_item.c.k_level)
+    ):
+        counts.setdefault(bank_id, Counter())[(unit, section, marks, k_level)] = total
+
+    for bank_id, cells in sorted(counts.items()):
+        conn.execute(
+            bank.update().where(bank.c.id == bank_id).values(availability=[
+                [unit, section, marks, k_level, total]
+                for (unit, section, marks, k_level), total in sorted(
+                    cells.items(), key=lambda kv: (kv[0][0], kv[0][1], kv[0][2], kv[0][3] or '')
+                )
+            ])
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('question_bank', schema=None) as batch_op:
+        batch_op.drop_column('availability')
@@ -0,0 +1,54 @@
+"""Add question_bank.items_revision and the bank/pattern versions of paper seeds
+
+Revision ID: b6e3f9d2a471
+Revises: a9d2c47e1f08
+Create Date: 2026-10-18 10:12:37.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e3f9d2a471'
+down_revision = 'a9d2c47e1f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('question_bank', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('items_revision', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('question_paper', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('selection_bank_revision', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('selection_pattern_version', sa.Integer(), nullable=True))
+
+    # Existing seeds were drawn against the banks and patterns as they are now
+    paper = sa.table('question_paper', sa.column('selection_seed'), sa.column('subject_version_id'),
+                     sa.column('selection_bank_revision'), sa.column('selection_pattern_version'))
+    subject_version = sa.table('subject_version', sa.column('id'), sa.column('pattern_id'))
+    pattern = sa.table('pattern', sa.column('id'), sa.column('version'))
+
+    op.execute(
+        paper.update()
+        .where(paper.c.selection_seed.isnot(None))
+        .values(
+            selection_bank_revision=1,
+            selection_pattern_version=(
+                sa.select(pattern.c.version)
+                .select_from(subject_version.join(pattern, subject_version.c.pattern_id == pattern.c.id))
+                .where(subject_version.c.id == paper.c.subject_version_id)
+                .scalar_subquery()
+            )
+        )
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('question_paper', schema=None) as batch_op:
+        batch_op.drop_column('selection_pattern_version')
+        batch_op.drop_column('selection_bank_revision')
+
+    with op.batch_alter_table('question_bank', schema=None) as batch_op:
+        batch_op.drop_column('items_revision')
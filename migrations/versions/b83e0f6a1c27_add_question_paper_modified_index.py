@@ -0,0 +1,26 @@
+"""Index question_paper.last_modified_at for keyset-paginated lists
+
+Revision ID: b83e0f6a1c27
+Revises: e2b97d4c8a13
+Create Date: 2026-10-17 14:20:41.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e0f6a1c27'
+down_revision = 'e2b97d4c8a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # admin archive with no filters: ORDER BY last_modified_at DESC, id DESC
+    # (InnoDB secondary indexes carry the primary key, so id comes for free)
+    op.create_index('ix_question_paper_modified', 'question_paper', ['last_modified_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_question_paper_modified', table_name='question_paper')
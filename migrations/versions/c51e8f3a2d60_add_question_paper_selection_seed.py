@@ -0,0 +1,26 @@
+"""Add selection_seed to question_paper
+
+Revision ID: c51e8f3a2d60
+Revises: a7d41c0e9b52
+Create Date: 2026-10-17 13:40:09.317254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51e8f3a2d60'
+down_revision = 'a7d41c0e9b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('question_paper', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('selection_seed', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('question_paper', schema=None) as batch_op:
+        batch_op.drop_column('selection_seed')
@@ -0,0 +1,82 @@
+"""Add dashboard_stats table
+
+Revision ID: d4a19e6c7b35
+Revises: b83e0f6a1c27
+Create Date: 2026-10-17 18:04:27.519830
+
+"""
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a19e6c7b35'
+down_revision = 'b83e0f6a1c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dashboard_stats = op.create_table('dashboard_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('subject_version_id', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(length=40), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['subject_version_id'], ['subject_version.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'subject_version_id', 'metric', name='uq_dashboard_stats_key')
+    )
+    op.create_index('ix_dashboard_stats_sv', 'dashboard_stats', ['subject_version_id'], unique=False)
+
+    # Backfill from the existing papers, banks and items
+    paper = sa.table('question_paper', sa.column('id'), sa.column('created_by'),
+                     sa.column('subject_version_id'), sa.column('status'))
+    paper_item = sa.table('question_paper_item', sa.column('question_paper_id'))
+    bank = sa.table('question_bank', sa.column('id'), sa.column('uploaded_by'),
+                    sa.column('subject_version_id'))
+    bank_item = sa.table('question_bank_item', sa.column('question_bank_id'))
+
+    conn = op.get_bind()
+    counts = Counter()
+
+    for user_id, sv_id, status, total in conn.execute(
+        sa.select(paper.c.created_by, paper.c.subject_version_id, paper.c.status, sa.func.count())
+        .group_by(paper.c.created_by, paper.c.subject_version_id, paper.c.status)
+    ):
+        counts[(user_id, sv_id, 'papers')] += total
+        counts[(user_id, sv_id, f'status:{status}')] += total
+
+    for user_id, sv_id, total in conn.execute(
+        sa.select(bank.c.uploaded_by, bank.c.subject_version_id, sa.func.count())
+        .group_by(bank.c.uploaded_by, bank.c.subject_version_id)
+    ):
+        counts[(user_id, sv_id, 'banks')] += total
+
+    for user_id, sv_id, total in conn.execute(
+        sa.select(paper.c.created_by, paper.c.subject_version_id, sa.func.count())
+        .select_from(paper.join(paper_item, paper_item.c.question_paper_id == paper.c.id))
+        .group_by(paper.c.created_by, paper.c.subject_version_id)
+    ):
+        counts[(user_id, sv_id, 'paper_items')] += total
+
+    for user_id, sv_id, total in conn.execute(
+        sa.select(bank.c.uploaded_by, bank.c.subject_version_id, sa.func.count())
+        .select_from(bank.join(bank_item, bank_item.c.question_bank_id == bank.c.id))
+        .group_by(bank.c.uploaded_by, bank.c.subject_version_id)
+    ):
+        counts[(user_id, sv_id, 'bank_items')] += total
+
+    if counts:
+        op.bulk_insert(dashboard_stats, [
+            {'user_id': user_id, 'subject_version_id': sv_id, 'metric': metric, 'total': total}
+            for (user_id, sv_id, metric), total in sorted(counts.items())
+        ])
+
+
+def downgrade():
+    op.drop_index('ix_dashboard_stats_sv', table_name='dashboard_stats')
+    op.drop_table('dashboard_stats')
@@ -0,0 +1,26 @@
+"""Add content_revision to question_paper
+
+Revision ID: e2b97d4c8a13
+Revises: c51e8f3a2d60
+Create Date: 2026-10-17 14:21:52.806413
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b97d4c8a13'
+down_revision = 'c51e8f3a2d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('question_paper', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_revision', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('question_paper', schema=None) as batch_op:
+        batch_op.drop_column('content_revision')
@@ -0,0 +1,26 @@
+"""Add pattern.version (row version for compiled-pattern caches)
+
+Revision ID: f3c8e1b5a692
+Revises: d4a19e6c7b35
+Create Date: 2026-10-17 21:12:06.204417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8e1b5a692'
+down_revision = 'd4a19e6c7b35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('pattern', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('pattern', schema=None) as batch_op:
+        batch_op.drop_column('version')